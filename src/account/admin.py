@@ -2,4 +2,12 @@ from django.contrib import admin
 
 from .models import CustomUser
 
-admin.site.register(CustomUser)
+
+@admin.register(CustomUser)
+class CustomUserAdmin(admin.ModelAdmin):
+    list_display = ('email', 'first_name', 'last_name', 'is_staff', 'is_active')
+    list_filter = ('is_staff', 'is_active')
+    # Needed by the created_by autocomplete widgets in the commands admin
+    search_fields = ('^email', '^first_name', '^last_name')
+    ordering = ('email',)
+#:
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _t
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import auth_user_cache_key, shared_auth_cache_enabled, get_local_auth_user, set_local_auth_user
+
+
+# What is cached of a user: enough for the permission checks. Everything
+# else (email, names, the password hash) is loaded only if a view reads it.
+CACHED_USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the resolved user's flags for a short while
+    instead of selecting the user on every request: in this process for
+    AUTH_USER_CACHE_LOCAL_SECONDS, and behind that in the shared cache for
+    AUTH_USER_CACHE_TIMEOUT when it isn't database-backed (see account/cache.py).
+    Entries are dropped when the user is saved or deleted (see account/models.py).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        #:
+
+        except KeyError:
+            raise InvalidToken(_t("Token contained no recognizable user identification"))
+        #:
+
+        shared = shared_auth_cache_enabled()
+        cached = get_local_auth_user(user_id)
+
+        if cached is None and shared:
+            cached = cache.get(auth_user_cache_key(user_id))
+
+            if cached is not None:
+                set_local_auth_user(user_id, cached)
+            #:
+        #:
+
+        if cached is None:
+            # Runs the active/revoked checks itself before we cache anything
+            user = super().get_user(validated_token)
+            cached = self.to_cached(user)
+            set_local_auth_user(user_id, cached)
+
+            if shared:
+                cache.set(auth_user_cache_key(user_id), cached, settings.AUTH_USER_CACHE_TIMEOUT)
+            #:
+            return user
+        #:
+
+        values, password_marker = cached
+        user = self.from_cached(values)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_t("User is inactive"), code="user_inactive")
+        #:
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_marker:
+                raise AuthenticationFailed(_t("The user's password has been changed."), code="password_changed")
+            #:
+        #:
+        return user
+    #:
+
+    def to_cached(self, user) -> tuple:
+        """(CACHED_USER_FIELDS values, password-change marker); the marker is what revoke claims are made of."""
+        return tuple(getattr(user, field) for field in CACHED_USER_FIELDS), get_md5_hash_password(user.password)
+    #:
+
+    def from_cached(self, values: tuple):
+        """A user instance with only the cached fields loaded, the others deferred."""
+        model = get_user_model()
+        by_field = dict(zip(CACHED_USER_FIELDS, values))
+        # from_db() wants the loaded fields in model order
+        fields = [field.attname for field in model._meta.concrete_fields if field.attname in by_field]
+        return model.from_db(model.objects.db, fields, [by_field[field] for field in fields])
+    #:
+#:
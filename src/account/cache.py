@@ -0,0 +1,74 @@
+"""
+
+Cache keys and the in-process tier for authenticated user lookups.
+
+CachedJWTAuthentication keeps a user's flags in this process first, for
+AUTH_USER_CACHE_LOCAL_SECONDS, and behind that in the shared cache. The shared
+tier is only used when the cache isn't the database itself (the default
+without REDIS_URL): there a cache read is a SELECT like the user lookup it
+would replace, and a miss adds a write on top.
+
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.db import BaseDatabaseCache
+
+AUTH_USER_CACHE_PREFIX = 'account:auth-user'
+
+# Cap on how many users one process remembers
+AUTH_USER_LOCAL_MAX_USERS = 10000
+
+
+# user id -> (cached flags, monotonic expiry), this process' tier
+_local_users = {}
+_local_lock = threading.Lock()
+
+
+def auth_user_cache_key(user_id) -> str:
+    return f'{AUTH_USER_CACHE_PREFIX}:{user_id}'
+#:
+
+
+def shared_auth_cache_enabled() -> bool:
+    """Whether the shared cache saves anything over selecting the user."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], BaseDatabaseCache)
+#:
+
+
+def get_local_auth_user(user_id):
+    """This process' copy of the user's cached flags, None when missing or expired."""
+    with _local_lock:
+        cached = _local_users.get(user_id)
+    #:
+
+    if cached is None or cached[1] <= time.monotonic():
+        return None
+    #:
+    return cached[0]
+#:
+
+
+def set_local_auth_user(user_id, values) -> None:
+    with _local_lock:
+        if len(_local_users) >= AUTH_USER_LOCAL_MAX_USERS:
+            _local_users.clear()
+        #:
+        _local_users[user_id] = (values, time.monotonic() + settings.AUTH_USER_CACHE_LOCAL_SECONDS)
+    #:
+#:
+
+
+def forget_auth_user(user_id) -> None:
+    """Drop the user's cached flags from this process and from the shared cache."""
+    with _local_lock:
+        _local_users.pop(user_id, None)
+    #:
+
+    if shared_auth_cache_enabled():
+        cache.delete(auth_user_cache_key(user_id))
+    #:
+#:
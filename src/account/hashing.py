@@ -0,0 +1,218 @@
+"""
+
+Bounded executor for password hashing.
+
+PBKDF2 work (registration, login) runs on a small dedicated thread pool
+instead of inline, with a cap on how many hashes may wait for it. hashlib
+releases the GIL while hashing, so the pool bounds the CPU spent on it, and
+once the pool and its queue are full new requests are refused straight away
+with a 503 instead of piling up on the request workers that serve catalog
+reads. A request also stops waiting after PASSWORD_HASHING_TIMEOUT seconds;
+its hash keeps its slot until it really finishes, so a stuck pool fills up
+and refuses work rather than taking more. Both 503s carry a Retry-After.
+
+The pool is per process, which only bounds anything under a threaded server:
+a sync worker serves one request at a time and never fills it. So every hash
+also takes one of PASSWORD_HASHING_SHARED_SLOTS slots in the shared cache,
+held by the request while it waits. Once all of them are taken, across every
+worker process, further sign-ins are refused with the same 503 and the
+workers stay free for catalog reads.
+
+"""
+
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _t
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _t("Too many sign-in or sign-up requests right now, please retry shortly.")
+    default_code = 'password_hashing_saturated'
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        # Sent as Retry-After by DRF's exception handler
+        self.wait = settings.PASSWORD_HASHING_RETRY_AFTER
+    #:
+#:
+
+
+class SharedHashingSlots:
+    """
+    A cross-process semaphore made of `count` keys in the shared cache; add() only
+    succeeds for a key nobody holds. A process that dies holding a slot keeps it
+    until the key expires, twice the longest a request waits for its hash.
+    """
+
+    def __init__(self, count: int, prefix: str = 'account:hashing-slot'):
+        self.count = count
+        self.prefix = prefix
+    #:
+
+    def acquire(self):
+        """The key of a free slot, now held, or None when every slot is taken."""
+        # Random order so waiting requests don't all queue up on the first keys
+        for index in random.sample(range(self.count), self.count):
+            key = f'{self.prefix}:{index}'
+
+            if cache.add(key, 1, timeout=settings.PASSWORD_HASHING_TIMEOUT * 2):
+                return key
+            #:
+        #:
+        return None
+    #:
+
+    def release(self, key: str) -> None:
+        cache.delete(key)
+    #:
+#:
+
+
+class PasswordHashingExecutor:
+
+    def __init__(self, max_workers: int, max_queue: int, shared_slots: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.shared_slots = SharedHashingSlots(shared_slots)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hashing')
+        # One slot per running or waiting job; acquiring never blocks
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+    #:
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn on the pool and wait for its result, or raise PasswordHashingUnavailable when full or too slow."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHashingUnavailable()
+        #:
+
+        # Taken and given back on the request thread, which owns the cache's connections
+        shared_slot = self.shared_slots.acquire()
+
+        if shared_slot is None:
+            self._slots.release()
+
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHashingUnavailable()
+        #:
+
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+        #:
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        #:
+
+        except BaseException:
+            self.shared_slots.release(shared_slot)
+            self._finished(None)
+            raise
+        #:
+
+        # The local slot is held until the hash is done, not until we stop waiting
+        future.add_done_callback(self._finished)
+
+        try:
+            return future.result(timeout=settings.PASSWORD_HASHING_TIMEOUT)
+        #:
+
+        except FutureTimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            raise PasswordHashingUnavailable()
+        #:
+
+        finally:
+            self.shared_slots.release(shared_slot)
+        #:
+    #:
+
+    def _finished(self, future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+    #:
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'shared_slots': self.shared_slots.count,
+                'in_flight': self._in_flight,
+                'queued': max(self._in_flight - self.max_workers, 0),
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+            }
+        #:
+    #:
+#:
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor() -> PasswordHashingExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = PasswordHashingExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    max_queue=settings.PASSWORD_HASHING_QUEUE_SIZE,
+                    shared_slots=settings.PASSWORD_HASHING_SHARED_SLOTS,
+                )
+            #:
+        #:
+    #:
+    return _executor
+#:
+
+
+def set_user_password(user, raw_password: str) -> None:
+    """user.set_password() on the hashing pool (no DB access happens there)."""
+    get_hashing_executor().run(user.set_password, raw_password)
+#:
+
+
+def check_user_password(user, raw_password: str) -> bool:
+    """
+    user.check_password() with the hash verification on the hashing pool.
+    Like check_password(), upgrades the stored hash when the hasher settings changed.
+    """
+    executor = get_hashing_executor()
+    # check_password() calls the setter when the hash needs upgrading; here it only takes note,
+    # the new hash and the save happen below
+    must_update = []
+    is_correct = executor.run(hashers.check_password, raw_password, user.password, setter=must_update.append)
+
+    if is_correct and must_update:
+        executor.run(user.set_password, raw_password)
+        # The save stays on the request thread, it owns the DB connection
+        user.save(update_fields=['password'])
+    #:
+    return is_correct
+#:
@@ -0,0 +1,99 @@
+"""
+
+Login throughput benchmark.
+
+Times the token endpoint's serializer against the previous login flow
+(exists() + authenticate() + TokenObtainPairSerializer.validate, which hashed
+the password twice) and counts password hash verifications per login.
+Everything runs inside a transaction that is rolled back.
+
+    python manage.py bench_login --logins 20
+
+"""
+
+import time
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from account.models import CustomUser
+from account.serializers import CustomTokenObtainPairSerializer
+
+
+BENCH_EMAIL = 'bench-login@example.invalid'
+BENCH_PASSWORD = 'BenchLogin1234'
+
+
+class Rollback(Exception):
+    pass
+#:
+
+
+def legacy_login(attrs):
+    CustomUser.objects.filter(email=attrs['email']).exists()
+    authenticate(email=attrs['email'], password=attrs['password'])
+
+    serializer = TokenObtainPairSerializer(data=attrs)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+#:
+
+
+def current_login(attrs):
+    serializer = CustomTokenObtainPairSerializer(data=attrs)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+#:
+
+
+class Command(BaseCommand):
+    help = "Benchmark login throughput and password hashes per login"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+    #:
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+
+        try:
+            with transaction.atomic():
+                CustomUser.objects.create_user(email=BENCH_EMAIL, password=BENCH_PASSWORD)
+                attrs = {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}
+
+                for label, login in (('legacy', legacy_login), ('current', current_login)):
+                    self.run(label, login, attrs, logins)
+                #:
+                raise Rollback()
+            #:
+        #:
+
+        except Rollback:
+            pass
+        #:
+    #:
+
+    def run(self, label, login, attrs, logins):
+        hasher_class = type(get_hasher())
+        login(attrs) # Warm up
+
+        with mock.patch.object(hasher_class, 'verify', autospec=True, side_effect=hasher_class.verify) as verify:
+            started = time.perf_counter()
+
+            for _ in range(logins):
+                login(attrs)
+            #:
+            elapsed = time.perf_counter() - started
+        #:
+
+        self.stdout.write(
+            f"{label:>8}: {logins / elapsed:8.2f} logins/s, "
+            f"{elapsed / logins * 1000:8.1f} ms/login, "
+            f"{verify.call_count / logins:.1f} hash verifications/login"
+        )
+    #:
+#:
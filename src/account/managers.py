@@ -3,6 +3,8 @@ from django.utils.translation import gettext_lazy as _t
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email 
 
+from .hashing import set_user_password
+
 
 
 class CustomUserManager(BaseUserManager):
@@ -22,7 +24,7 @@ class CustomUserManager(BaseUserManager):
             **other_fields
         )
         
-        user.set_password(password)
+        set_user_password(user, password) # Hashed on the bounded hashing pool
         user.save()
         return user
     #:
@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _t
 
 from .managers import CustomUserManager
+from .cache import forget_auth_user
 
 
 FIRST_NAME_MAX_LENGTH = 100
@@ -28,3 +31,13 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         return self.email
     #:
 #:
+
+
+# Drop the cached copies used by CachedJWTAuthentication whenever the user changes.
+# Other processes keep theirs for up to AUTH_USER_CACHE_LOCAL_SECONDS.
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_auth_user(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_auth_user(user_id))
+#:
@@ -5,9 +5,11 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.validators import validate_email as django_validate_email
 from django.utils.translation import gettext_lazy as _t
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.contrib.auth import authenticate
+from rest_framework_simplejwt.settings import api_settings as jwt_api_settings
+from django.contrib.auth.models import update_last_login
 
 from .models import CustomUser
+from .hashing import check_user_password
 
 
 
@@ -122,29 +124,36 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         password = attrs.get('password')
 
         if email and password:
-            # Check if user exists first (without revealing if password is correct yet)
-            from django.contrib.auth import get_user_model
-            CustomUser = get_user_model() # Use get_user_model() for custom user
+            # Load the user once; everything below works off this instance
+            user = CustomUser.objects.filter(email=email).first()
 
-            if not CustomUser.objects.filter(email=email).exists():
+            if user is None:
                 # If email doesn't exist, return a specific error
                 raise serializers.ValidationError(
                     {"email": "No account found with this email address."}
                 )
             #:
 
-            # If email exists, try to authenticate
-            user = authenticate(request=self.context.get('request'), email=email, password=password)
-
-            if not user:
-                # If authentication fails (wrong password or inactive user)
+            # Verify the password exactly once (authenticate() + super().validate() used to hash it twice).
+            # Inactive users are refused the same way ModelBackend refused them, without hashing.
+            if not user.is_active or not check_user_password(user, password):
                 raise serializers.ValidationError(
                     {"password": "Incorrect password for this email address."}
                 )
             #:
-            
-            # If authentication succeeds, proceed with original validation
-            data = super().validate(attrs)
+
+            # Same token payload as TokenObtainPairSerializer.validate, minus its authenticate()
+            self.user = user
+            refresh = self.get_token(user)
+
+            data = {
+                'refresh': str(refresh),
+                'access': str(refresh.access_token),
+            }
+
+            if jwt_api_settings.UPDATE_LAST_LOGIN:
+                update_last_login(None, user)
+            #:
             return data
         #:
 
@@ -154,4 +163,3 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         #:
     #:
 #:
-
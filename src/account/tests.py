@@ -1,3 +1,191 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication
+from .cache import auth_user_cache_key, forget_auth_user
+from .hashing import PasswordHashingExecutor, PasswordHashingUnavailable, SharedHashingSlots, check_user_password
+from .models import CustomUser
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """The authenticated user is looked up once, then served from the cache tiers until it changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='auth@example.com', password='Auth-Pass-1234')
+    #:
+
+    def setUp(self):
+        forget_auth_user(self.user.pk)
+        self.token = AccessToken.for_user(self.user)
+    #:
+
+    def authenticate(self):
+        return CachedJWTAuthentication().get_user(self.token)
+    #:
+
+    def test_cache_hit(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        #:
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        #:
+        self.assertEqual((user.pk, user.is_active, user.is_staff), (self.user.pk, True, False))
+    #:
+
+    def test_database_cache_is_not_used(self):
+        self.authenticate()
+
+        # A read from the database cache would cost what selecting the user does
+        self.assertIsNone(cache.get(auth_user_cache_key(self.user.pk)))
+    #:
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_shared_cache_hit(self):
+        self.authenticate()
+        self.assertIsNotNone(cache.get(auth_user_cache_key(self.user.pk)))
+
+        # Another process: nothing cached locally, the shared entry is used
+        with mock.patch.dict('account.cache._local_users', clear=True), self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().pk, self.user.pk)
+        #:
+    #:
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        #:
+    #:
+
+    def test_deactivated_user(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        #:
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        #:
+    #:
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_save_invalidates(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        #:
+        self.assertIsNone(cache.get(auth_user_cache_key(self.user.pk)))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.authenticate().is_staff)
+        #:
+    #:
+#:
+
+
+# The jobs below take cache slots from other threads, which the test transaction would lock out of the database cache
+@override_settings(CACHES=LOCMEM_CACHES)
+class PasswordHashingTests(TestCase):
+    """The hashing pool refuses work it can't take, stops waiting after the timeout, and says when to retry."""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+    #:
+
+    def block(self):
+        self.release.wait(5)
+        return 'done'
+    #:
+
+    def test_rejected_when_full(self):
+        executor = PasswordHashingExecutor(max_workers=1, max_queue=0, shared_slots=4)
+        waiting = threading.Thread(target=executor.run, args=[self.block])
+        waiting.start()
+
+        # Wait for the first job to hold the only slot
+        deadline = time.monotonic() + 5
+
+        while executor.metrics()['in_flight'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        #:
+
+        with self.assertRaises(PasswordHashingUnavailable):
+            executor.run(self.block)
+        #:
+
+        self.release.set()
+        waiting.join()
+        self.assertEqual(executor.metrics()['rejected'], 1)
+        self.assertEqual(executor.run(str, 'free again'), 'free again')
+    #:
+
+    def test_rejected_when_shared_slots_taken(self):
+        # The other slot is held by a request in another process
+        other_process = SharedHashingSlots(2)
+        held = [other_process.acquire(), other_process.acquire()]
+        executor = PasswordHashingExecutor(max_workers=2, max_queue=2, shared_slots=2)
+
+        with self.assertRaises(PasswordHashingUnavailable):
+            executor.run(str, 'password')
+        #:
+
+        other_process.release(held[0])
+        self.assertEqual(executor.run(str, 'password'), 'password')
+        self.assertEqual(executor.metrics()['in_flight'], 0)
+    #:
+
+    @override_settings(PASSWORD_HASHING_TIMEOUT=0.05)
+    def test_timeout(self):
+        executor = PasswordHashingExecutor(max_workers=1, max_queue=0, shared_slots=4)
+
+        with self.assertRaises(PasswordHashingUnavailable):
+            executor.run(self.block)
+        #:
+
+        # The hash keeps its slot until it really finishes
+        self.assertEqual(executor.metrics()['timed_out'], 1)
+        self.assertEqual(executor.metrics()['in_flight'], 1)
+
+        with self.assertRaises(PasswordHashingUnavailable):
+            executor.run(str, 'password')
+        #:
+    #:
+
+    def test_retry_after(self):
+        CustomUser.objects.create_user(email='busy@example.com', password='Busy-Pass-1234')
+
+        with mock.patch.object(PasswordHashingExecutor, 'run', side_effect=PasswordHashingUnavailable):
+            response = self.client.post('/token/', {'email': 'busy@example.com', 'password': 'Busy-Pass-1234'})
+        #:
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(settings.PASSWORD_HASHING_RETRY_AFTER))
+    #:
+
+    def test_check_password(self):
+        user = CustomUser.objects.create_user(email='check@example.com', password='Check-Pass-1234')
+
+        self.assertTrue(check_user_password(user, 'Check-Pass-1234'))
+        self.assertFalse(check_user_password(user, 'Wrong-Pass-1234'))
+    #:
+#:
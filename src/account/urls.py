@@ -1,6 +1,6 @@
 from django.urls import path, include
 
-from .views import CreateUserView, CustomTokenObtainPairView
+from .views import CreateUserView, CustomTokenObtainPairView, PasswordHashingMetricsView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 
@@ -8,5 +8,6 @@ urlpatterns = [
     path('register/', CreateUserView.as_view() , name = 'register'),
     path('token/', CustomTokenObtainPairView.as_view() , name = 'get_token'),
     path('refresh/', TokenRefreshView.as_view() , name = 'refresh'),
+    path('hashing-metrics/', PasswordHashingMetricsView.as_view() , name = 'hashing-metrics'),
     path('api-auth/', include("rest_framework.urls")),
 ]
@@ -1,5 +1,8 @@
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework import generics
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from .hashing import get_hashing_executor
 from .models import CustomUser
 from .serializers import CustomTokenObtainPairSerializer, CustomUserSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -14,3 +17,13 @@ class CreateUserView(generics.CreateAPIView):
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 #:
+
+
+# Password hashing pool counters, for monitoring
+class PasswordHashingMetricsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_hashing_executor().metrics())
+    #:
+#:
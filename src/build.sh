@@ -5,3 +5,6 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 
 python manage.py migrate
+
+# Backs the shared cache when REDIS_URL isn't set (settings.CACHES)
+python manage.py createcachetable
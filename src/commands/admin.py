@@ -1,9 +1,207 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import HttpResponseRedirect
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _t
 
 from .models import *
+from .bulk import update_commands, delete_commands
+from .purging import enqueue_purge
+from .values import tag_paths
 
 
-admin.site.register(Commands)
-admin.site.register(Vendor)  # If you want to manage vendors in the admin as well
-admin.site.register(Platform)  # If you want to manage Platform in the admin
-admin.site.register(Tag)  # If you want to manage tags in the admin
+# Changelists count at most this many rows exactly
+ADMIN_COUNT_LIMIT = 10000
+# Rows listed on a delete confirmation page
+ADMIN_DELETE_PREVIEW = 50
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator that never counts a big table in full: unfiltered
+    PostgreSQL lists use the planner's row estimate, everything else is
+    counted up to ADMIN_COUNT_LIMIT.
+
+    Such a count is only a floor or a guess, so it doesn't end the list:
+    near or past it, the rows from `current_page` on are probed (one page
+    and a row) so that page and, when there is more, the next one exist.
+    Pages are walked one "next" at a time past the count.
+    """
+
+    def __init__(self, *args, current_page: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current_page = current_page
+    #:
+
+    @cached_property
+    def count(self):
+        count, exact = self.bounded_count()
+
+        if exact:
+            return count
+        #:
+
+        bottom = (self.current_page - 1) * self.per_page
+
+        if bottom + self.per_page >= count:
+            count = max(count, bottom + self.object_list.order_by()[bottom:bottom + self.per_page + 1].count())
+        #:
+        return count
+    #:
+
+    def bounded_count(self) -> tuple:
+        """(count, whether it is exact)."""
+        queryset = self.object_list
+        connection = connections[queryset.db]
+
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            #:
+
+            if row and row[0] > ADMIN_COUNT_LIMIT:
+                return int(row[0]), False
+            #:
+        #:
+
+        count = queryset.order_by()[:ADMIN_COUNT_LIMIT].count()
+        return count, count < ADMIN_COUNT_LIMIT
+    #:
+#:
+
+
+class CatalogAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered count behind "(N total)"
+    show_full_result_count = False
+    list_per_page = 50
+    readonly_fields = ('date_created', 'date_updated')
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            current_page = max(int(request.GET.get(PAGE_VAR, 1)), 1)
+        #:
+
+        except ValueError:
+            current_page = 1
+        #:
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, current_page=current_page)
+    #:
+
+    def get_deleted_objects(self, objs, request):
+        # The default walks every related row through the collector just to list
+        # them; only the selected rows are listed, what hangs off them is not
+        count = len(objs) if isinstance(objs, list) else objs.count()
+        preview = [str(obj) for obj in objs[:ADMIN_DELETE_PREVIEW]]
+
+        if count > len(preview):
+            preview.append(f"... and {count - len(preview)} more")
+        #:
+
+        perms_needed = set() if self.has_delete_permission(request) else {self.opts.verbose_name}
+        return preview, {self.opts.verbose_name_plural: count}, perms_needed, []
+    #:
+#:
+
+
+class PurgedCatalogAdmin(CatalogAdmin):
+    """Vendors and tags are deleted by a background purge job (purging.py), never by the collector."""
+
+    def delete_model(self, request, obj):
+        enqueue_purge(obj, request.user)
+    #:
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            enqueue_purge(obj, request.user)
+        #:
+
+        self.message_user(request, _t("They and everything under them are deleted in the background."), messages.INFO)
+    #:
+
+    def response_delete(self, request, obj_display, obj_id):
+        self.message_user(
+            request,
+            _t("“%(obj)s” and everything under it will be deleted in the background.") % {'obj': obj_display},
+            messages.SUCCESS
+        )
+        return HttpResponseRedirect(reverse(
+            f'admin:{self.opts.app_label}_{self.opts.model_name}_changelist', current_app=self.admin_site.name
+        ))
+    #:
+#:
+
+
+@admin.register(Vendor)
+class VendorAdmin(PurgedCatalogAdmin):
+    list_display = ('name', 'date_created', 'date_updated')
+    # Exact, case-insensitive match: served by the UPPER(name) unique index
+    search_fields = ('=name',)
+    autocomplete_fields = ('created_by',)
+    ordering = ('name',)
+#:
+
+
+@admin.register(Platform)
+class PlatformAdmin(CatalogAdmin):
+    list_display = ('name', 'vendor', 'date_updated')
+    list_select_related = ('vendor',)
+    list_filter = ('vendor',)
+    search_fields = ('=name',)
+    autocomplete_fields = ('vendor', 'created_by')
+    readonly_fields = ('date_updated',)
+    ordering = ('name',)
+#:
+
+
+@admin.register(Tag)
+class TagAdmin(PurgedCatalogAdmin):
+    list_display = ('name', 'path', 'vendor', 'date_updated')
+    list_select_related = ('vendor',)
+    list_filter = ('vendor',)
+    search_fields = ('=name',)
+    autocomplete_fields = ('vendor', 'parent', 'created_by')
+
+    @admin.display(description=_t("Path"))
+    def path(self, obj):
+        # From the cached path map, Tag.__str__ would query every parent
+        return tag_paths.get([obj.pk]).get(obj.pk)
+    #:
+#:
+
+
+@admin.register(Commands)
+class CommandsAdmin(CatalogAdmin):
+    list_display = ('command', 'vendor', 'platform', 'tag_path', 'method', 'date_updated')
+    list_select_related = ('vendor', 'platform')
+    list_filter = ('method', 'vendor')
+    # Exact, case-insensitive match: served by the UPPER(command) unique index
+    search_fields = ('=command',)
+    autocomplete_fields = ('vendor', 'platform', 'tag', 'created_by')
+    actions = ('mark_bulk', 'mark_singular')
+
+    @admin.display(description=_t("Tag"))
+    def tag_path(self, obj):
+        return tag_paths.get([obj.tag_id]).get(obj.tag_id) if obj.tag_id else None
+    #:
+
+    @admin.action(permissions=['change'], description=_t("Set method to Bulk"))
+    def mark_bulk(self, request, queryset):
+        updated = update_commands(queryset, method='BULK')
+        self.message_user(request, f"{updated} commands updated.", messages.SUCCESS)
+    #:
+
+    @admin.action(permissions=['change'], description=_t("Set method to Singular"))
+    def mark_singular(self, request, queryset):
+        updated = update_commands(queryset, method='SINGULAR')
+        self.message_user(request, f"{updated} commands updated.", messages.SUCCESS)
+    #:
+
+    def delete_queryset(self, request, queryset):
+        delete_commands(queryset)
+    #:
+#:
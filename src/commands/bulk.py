@@ -0,0 +1,93 @@
+"""
+
+Set-based writes to many commands at once (admin actions and the like).
+
+QuerySet.update() and raw_delete() send no signals, so these helpers do
+what the model receivers would have done per row: move date_updated (the
+change feed and the row cache key on it), write tombstones for deleted rows
+and bump the catalog version once the transaction commits.
+
+"""
+
+from django.db import connections, transaction
+from django.db.models.functions import Now
+
+from .cache import bump_catalog_version
+from .changes import record_tombstones
+from .models import Commands, CommandParameter, ImportBatchCommand, Tombstone
+
+
+def raw_delete(queryset) -> int:
+    """
+    DELETE FROM <table> WHERE pk IN (<queryset>) in one statement, without
+    the deletion collector: no rows are loaded, no signals are sent and
+    nothing cascades, so the caller deletes dependents and writes tombstones.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    pk_sql, params = queryset.order_by().values('pk').query.get_compiler(connection=connection).as_sql()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({pk_sql})',
+            params
+        )
+        return cursor.rowcount
+    #:
+#:
+
+
+def update_commands(queryset, **values) -> int:
+    """One UPDATE for every command in `queryset`."""
+    with transaction.atomic():
+        updated = queryset.order_by().update(**values, date_updated=Now())
+        transaction.on_commit(bump_catalog_version)
+    #:
+    return updated
+#:
+
+
+def delete_commands(queryset) -> int:
+    """
+    Deletes every command in `queryset` with one DELETE per table instead of
+    loading them through the deletion collector.
+    """
+    with transaction.atomic():
+        ids = queryset.order_by().values('pk')
+
+        record_tombstones(Commands.objects.filter(pk__in=ids), Tombstone.MODEL_COMMAND)
+        # Neither has receivers or dependents, so these are single DELETEs too
+        CommandParameter.objects.filter(command_id__in=ids).delete()
+        ImportBatchCommand.objects.filter(command_id__in=ids).delete()
+        deleted = raw_delete(Commands.objects.filter(pk__in=ids))
+
+        transaction.on_commit(bump_catalog_version)
+    #:
+    return deleted
+#:
+
+
+def replace_parameters(parameter_sets: dict) -> dict:
+    """
+    Replaces the parameters of every command in `parameter_sets` ({command id:
+    [values]}) with one DELETE, one bulk INSERT and one UPDATE.
+    """
+    with transaction.atomic():
+        command_ids = list(parameter_sets)
+
+        deleted, _ = CommandParameter.objects.filter(command_id__in=command_ids).delete()
+        created = CommandParameter.objects.bulk_create(
+            [
+                CommandParameter(command_id=command_id, value=value)
+                for command_id, values in parameter_sets.items()
+                for value in values
+            ],
+            batch_size=1000
+        )
+
+        # The row cache and the change feed key on date_updated
+        updated = update_commands(Commands.objects.filter(pk__in=command_ids))
+    #:
+    return {'commands_updated': updated, 'parameters_deleted': deleted, 'parameters_created': len(created)}
+#:
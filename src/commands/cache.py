@@ -0,0 +1,83 @@
+"""
+
+Catalog cache versioning.
+
+Everything cached from the command catalog is keyed by the current catalog
+version. Writes to Commands, Vendor, Platform or Tag bump the version (see the
+receivers in models.py), which orphans every older entry at once instead of
+having to find and delete them one by one. (Facet counts only check the
+version, see facets.py.)
+
+The taxonomy version is the same idea for vendor/platform/tag names only, so
+caches that depend on names alone survive plain command edits.
+
+The versions live in the shared cache (CACHES in settings.py), so a write in
+one worker process invalidates every other one. Reads are reused within a
+process for COMMAND_CACHE_VERSION_LOCAL_SECONDS, which is how long another
+process may keep serving what it cached before a write.
+
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+CATALOG_VERSION_KEY = 'commands:catalog-version'
+TAXONOMY_VERSION_KEY = 'commands:taxonomy-version'
+
+
+# key -> (version, monotonic time it was read), this process' copy of the shared versions
+_local_versions = {}
+
+
+def _get_version(key: str) -> int:
+    local = _local_versions.get(key)
+
+    if local is not None and time.monotonic() - local[1] < settings.COMMAND_CACHE_VERSION_LOCAL_SECONDS:
+        return local[0]
+    #:
+
+    version = cache.get(key)
+
+    if version is None:
+        # Seed from the clock so a version lost to eviction or a restart
+        # can never line up with entries cached under an older one
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    #:
+
+    _local_versions[key] = (version, time.monotonic())
+    return version
+#:
+
+
+def _bump_version(key: str) -> None:
+    # A fresh clock value rather than incr(): it can't be lost to two writers
+    # racing on a backend without atomic incr (the database one) and never
+    # repeats a version some other process still has cached entries under
+    version = time.time_ns()
+    cache.set(key, version, timeout=None)
+    _local_versions[key] = (version, time.monotonic())
+#:
+
+
+def get_catalog_version() -> int:
+    return _get_version(CATALOG_VERSION_KEY)
+#:
+
+
+def bump_catalog_version() -> None:
+    _bump_version(CATALOG_VERSION_KEY)
+#:
+
+
+def get_taxonomy_version() -> int:
+    return _get_version(TAXONOMY_VERSION_KEY)
+#:
+
+
+def bump_taxonomy_version() -> None:
+    _bump_version(TAXONOMY_VERSION_KEY)
+#:
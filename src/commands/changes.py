@@ -0,0 +1,230 @@
+"""
+
+Incremental change feed for clients that keep an offline copy of the catalog.
+
+Every section (vendors, platforms, tags, commands, deleted rows) is read in
+(date_updated, id) order from its own keyset position, so a sync only reads
+the rows changed since the client's cursor, straight off the indexes.
+
+Timestamps are taken before commit, so a slow transaction could commit a row
+behind a cursor that has already moved past it. Rows are only handed out up
+to the settle horizon (settle_horizon()), a time no still-open transaction
+can write behind:
+
+- on PostgreSQL, the start of the oldest open transaction (row timestamps
+  are taken after their transaction started), and no later than
+  COMMAND_CHANGES_SETTLE_SECONDS ago, which also absorbs clock skew between
+  the web and database servers. A transaction open for longer than
+  COMMAND_CHANGES_MAX_HOLD_SECONDS stops holding the feed back;
+- elsewhere, COMMAND_CHANGES_SETTLE_SECONDS ago only. That is then the
+  longest a write transaction (an import, say) may take, or its rows can be
+  skipped, so keep it above the request timeout.
+
+Deleted rows come back as tombstones (see Tombstone in models.py). A client
+drops a deleted vendor's platforms, tags and commands, a deleted tag's
+subtags and commands, and clears the platform of commands whose platform
+was deleted.
+
+"""
+
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Vendor, Platform, Tag, Commands, Tombstone
+
+
+class InvalidCursor(ValueError):
+    pass
+#:
+
+
+# section -> (queryset, timestamp field, fields returned, vendor field)
+SECTIONS = {
+    'vendors': (
+        Vendor.objects.all(), 'date_updated',
+        ('id', 'name', 'date_created', 'date_updated'),
+        'id'
+    ),
+    'platforms': (
+        Platform.objects.all(), 'date_updated',
+        ('id', 'name', 'vendor_id', 'date_updated'),
+        'vendor_id'
+    ),
+    'tags': (
+        Tag.objects.all(), 'date_updated',
+        ('id', 'name', 'vendor_id', 'parent_id', 'date_created', 'date_updated'),
+        'vendor_id'
+    ),
+    'commands': (
+        Commands.objects.all(), 'date_updated',
+        ('id', 'command', 'description', 'example', 'version', 'sub_command', 'method',
+         'vendor_id', 'platform_id', 'tag_id', 'created_by_id', 'date_created', 'date_updated'),
+        'vendor_id'
+    ),
+    'deleted': (
+        Tombstone.objects.all(), 'date_deleted',
+        ('id', 'model_name', 'object_id', 'vendor_id', 'date_deleted'),
+        'vendor_id'
+    ),
+}
+
+
+def record_tombstones(queryset, model_name: str) -> int:
+    """
+    Tombstones for rows about to be deleted without the collector (bulk.raw_delete
+    sends no pre_delete), written by one INSERT ... SELECT over `queryset` so no
+    row passes through Python. Call it inside the deleting transaction.
+    """
+    db_connection = connections[queryset.db]
+    quote = db_connection.ops.quote_name
+    vendor_field = 'pk' if model_name == Tombstone.MODEL_VENDOR else 'vendor_id'
+
+    # Aliased annotations only, so the subquery's columns have names to select by
+    rows = queryset.order_by().annotate(
+        tombstone_object_id=F('pk'), tombstone_vendor_id=F(vendor_field)
+    ).values('tombstone_object_id', 'tombstone_vendor_id')
+    rows_sql, rows_params = rows.query.get_compiler(connection=db_connection).as_sql()
+
+    fields = [Tombstone._meta.get_field(name).column for name in ('model_name', 'object_id', 'vendor_id', 'date_deleted')]
+    now = db_connection.ops.adapt_datetimefield_value(timezone.now())
+
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(Tombstone._meta.db_table)} ({", ".join(map(quote, fields))}) '
+            f'SELECT %s, deleting.tombstone_object_id, deleting.tombstone_vendor_id, %s FROM ({rows_sql}) deleting',
+            [model_name, now, *rows_params]
+        )
+        return cursor.rowcount
+    #:
+#:
+
+
+def encode_cursor(positions: dict) -> str:
+    payload = {
+        section: [timestamp.isoformat(), pk]
+        for section, (timestamp, pk) in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+#:
+
+
+def decode_cursor(cursor: str) -> dict:
+    """{section: (timestamp, id)}; an empty cursor starts from the beginning."""
+    if not cursor:
+        return {}
+    #:
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        positions = {}
+
+        for section, (timestamp, pk) in payload.items():
+            if section not in SECTIONS:
+                raise InvalidCursor('Invalid cursor.')
+            #:
+
+            parsed = parse_datetime(timestamp)
+            if parsed is None:
+                raise InvalidCursor('Invalid cursor.')
+            #:
+            positions[section] = (parsed, int(pk))
+        #:
+        return positions
+    #:
+
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, TypeError, ValueError, AttributeError):
+        raise InvalidCursor('Invalid cursor.')
+    #:
+#:
+
+
+def oldest_open_transaction():
+    """When the oldest transaction still open on the database started (PostgreSQL only, None elsewhere)."""
+    if connection.vendor != 'postgresql':
+        return None
+    #:
+
+    with connection.cursor() as cursor:
+        # Other client sessions of this database; ours can't be writing behind its own read
+        cursor.execute(
+            "SELECT min(xact_start) FROM pg_stat_activity"
+            " WHERE datname = current_database() AND backend_type = 'client backend'"
+            " AND xact_start IS NOT NULL AND pid <> pg_backend_pid()"
+        )
+        return cursor.fetchone()[0]
+    #:
+#:
+
+
+def settle_horizon():
+    """The time up to which changes are handed out, see the module docstring."""
+    now = timezone.now()
+    horizon = now - timedelta(seconds=settings.COMMAND_CHANGES_SETTLE_SECONDS)
+    oldest = oldest_open_transaction()
+
+    if oldest is not None:
+        horizon = min(horizon, max(oldest, now - timedelta(seconds=settings.COMMAND_CHANGES_MAX_HOLD_SECONDS)))
+    #:
+    return horizon
+#:
+
+
+def current_cursor() -> str:
+    """A cursor positioned at the settle horizon: only later changes come after it."""
+    horizon = settle_horizon()
+    return encode_cursor({section: (horizon, 0) for section in SECTIONS})
+#:
+
+
+def collect_changes(cursor: str = '', vendor_id=None, limit: int = None) -> dict:
+    """
+    Up to `limit` rows per section changed after `cursor`, plus the cursor to
+    pass next time. `has_more` is set while any section has rows left.
+    """
+    limit = limit or settings.COMMAND_CHANGES_PAGE_SIZE
+    positions = decode_cursor(cursor)
+    horizon = settle_horizon()
+
+    changes = {}
+    has_more = False
+
+    for section, (queryset, timestamp_field, fields, vendor_field) in SECTIONS.items():
+        queryset = queryset.filter(**{f'{timestamp_field}__lte': horizon})
+
+        if vendor_id is not None:
+            queryset = queryset.filter(**{vendor_field: vendor_id})
+        #:
+
+        if section in positions:
+            timestamp, pk = positions[section]
+            queryset = queryset.filter(
+                Q(**{f'{timestamp_field}__gt': timestamp}) | Q(**{timestamp_field: timestamp, 'id__gt': pk})
+            )
+        #:
+
+        # One extra row tells whether this section has more
+        rows = list(queryset.order_by(timestamp_field, 'id').values(*fields)[:limit + 1])
+
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        #:
+
+        if rows:
+            positions[section] = (rows[-1][timestamp_field], rows[-1]['id'])
+        #:
+        changes[section] = rows
+    #:
+
+    changes['cursor'] = encode_cursor(positions)
+    changes['has_more'] = has_more
+    return changes
+#:
@@ -0,0 +1,275 @@
+"""
+
+Server-sent events for catalog changes (served under ASGI, see pxosys/asgi.py).
+
+One poller per worker process reads the change feed (changes.py) every
+COMMAND_EVENTS_POLL_INTERVAL seconds while anyone is subscribed, and fans
+the events out to the subscribers' queues. The database is the relay between
+workers: every worker polls the same feed, so a write made through any
+worker reaches subscribers on all of them, at one poll per worker however
+many clients are connected.
+
+Each frame is encoded once per poll and shared by every subscriber of the
+same vendor. A subscriber that falls COMMAND_EVENTS_QUEUE_SIZE polls behind
+is sent a `resync` event and dropped, and should reload through the change
+feed. The last frame of each poll carries the feed cursor as its id, so a
+reconnecting EventSource (Last-Event-ID) resumes where it stopped.
+
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+
+from .changes import SECTIONS, collect_changes, current_cursor, decode_cursor
+
+
+logger = logging.getLogger(__name__)
+
+
+# change feed section -> model name in events
+SECTION_MODELS = {
+    'vendors': 'vendor',
+    'platforms': 'platform',
+    'tags': 'tag',
+    'commands': 'command',
+}
+
+HEARTBEAT = b': keep-alive\n\n'
+RESYNC = b'event: resync\ndata: {}\n\n'
+
+
+def poll_changes(cursor: str, vendor_id=None) -> dict:
+    # Runs on the sync thread between requests, so drop a broken or expired
+    # connection here the way the request signals would
+    close_old_connections()
+    return collect_changes(cursor=cursor, vendor_id=vendor_id, limit=settings.COMMAND_CHANGES_MAX_PAGE_SIZE)
+#:
+
+
+def encode_event(event_type: str, payload: dict, event_id: str = None) -> bytes:
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    #:
+    lines.append(f'event: {event_type}')
+    lines.append('data: ' + json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')))
+    return ('\n'.join(lines) + '\n\n').encode()
+#:
+
+
+def changes_to_events(changes: dict, since_cursor: str) -> list:
+    """[(vendor_id, event type, payload)] for one page of the change feed."""
+    since = decode_cursor(since_cursor)
+    events = []
+
+    for section, model_name in SECTION_MODELS.items():
+        vendor_field = SECTIONS[section][3]
+        previous = since.get(section)
+
+        for row in changes[section]:
+            # Rows without date_created (platforms) can't tell, they're upserts either way
+            created = previous is not None and row.get('date_created') is not None and row['date_created'] > previous[0]
+            action = 'created' if created else 'updated'
+            events.append((row[vendor_field], f'{model_name}.{action}', {
+                'model': model_name,
+                'action': action,
+                'vendor_id': row[vendor_field],
+                'data': row,
+            }))
+        #:
+    #:
+
+    for row in changes['deleted']:
+        events.append((row['vendor_id'], f"{row['model_name']}.deleted", {
+            'model': row['model_name'],
+            'action': 'deleted',
+            'vendor_id': row['vendor_id'],
+            'data': {'id': row['object_id']},
+        }))
+    #:
+    return events
+#:
+
+
+def encode_frames(events: list, cursor: str) -> bytes:
+    # The cursor goes on the last frame only, a connection lost mid-poll replays the whole poll
+    frames = [
+        encode_event(event_type, payload, event_id=cursor if index == len(events) - 1 else None)
+        for index, (_, event_type, payload) in enumerate(events)
+    ]
+    return b''.join(frames)
+#:
+
+
+class Subscription:
+
+    def __init__(self, vendor_id=None):
+        self.vendor_id = vendor_id
+        self.queue = asyncio.Queue(maxsize=settings.COMMAND_EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+    #:
+#:
+
+
+class ChangeBroadcaster:
+    """Per-process fan-out of the change feed to subscriber queues."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.cursor = None
+        self.task = None
+    #:
+
+    def subscribe(self, vendor_id=None) -> Subscription:
+        subscription = Subscription(vendor_id)
+        self.subscribers.add(subscription)
+
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.task = loop.create_task(self.run())
+        #:
+        return subscription
+    #:
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+    #:
+
+    def publish(self, events: list, cursor: str) -> None:
+        all_frames = encode_frames(events, cursor)
+        by_vendor = defaultdict(list)
+
+        for event in events:
+            by_vendor[event[0]].append(event)
+        #:
+
+        # Encoded once per vendor, shared by every subscriber of that vendor
+        vendor_frames = {}
+
+        for subscription in list(self.subscribers):
+            if subscription.vendor_id is None:
+                frames = all_frames
+            #:
+
+            else:
+                if subscription.vendor_id not in vendor_frames:
+                    vendor_events = by_vendor.get(subscription.vendor_id, [])
+                    vendor_frames[subscription.vendor_id] = encode_frames(vendor_events, cursor) if vendor_events else b''
+                #:
+                frames = vendor_frames[subscription.vendor_id]
+            #:
+
+            if not frames:
+                continue
+            #:
+
+            try:
+                subscription.queue.put_nowait(frames)
+            #:
+
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+                # Whatever is queued is stale now, the reader sends the resync and closes
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                #:
+                subscription.queue.put_nowait(RESYNC)
+            #:
+        #:
+    #:
+
+    async def run(self) -> None:
+        if self.cursor is None:
+            self.cursor = await sync_to_async(current_cursor)()
+        #:
+
+        while self.subscribers:
+            try:
+                changes = await sync_to_async(poll_changes)(self.cursor)
+            #:
+
+            except Exception:
+                logger.exception("Catalog event poll failed")
+                await asyncio.sleep(settings.COMMAND_EVENTS_POLL_INTERVAL)
+                continue
+            #:
+
+            events = changes_to_events(changes, self.cursor)
+            self.cursor = changes['cursor']
+
+            if events:
+                self.publish(events, self.cursor)
+            #:
+
+            # A full page means there is more waiting, go again straight away
+            if not changes['has_more']:
+                await asyncio.sleep(settings.COMMAND_EVENTS_POLL_INTERVAL)
+            #:
+        #:
+
+        # Nobody listening: the next subscriber starts from "now", not from here
+        self.cursor = None
+    #:
+#:
+
+
+broadcaster = ChangeBroadcaster()
+
+
+async def stream_events(vendor_id=None, last_event_id: str = ''):
+    """Async iterator of SSE bytes for one client, until it disconnects."""
+    subscription = broadcaster.subscribe(vendor_id)
+
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield b'retry: 3000\n\n'
+
+        # Catch up from where a reconnecting client stopped. It is subscribed
+        # already, so anything newer arrives through the queue (possibly twice,
+        # events are upserts/deletes and safe to apply again)
+        if last_event_id:
+            changes = await sync_to_async(poll_changes)(last_event_id, vendor_id)
+
+            if changes['has_more']:
+                yield RESYNC
+                return
+            #:
+
+            events = changes_to_events(changes, last_event_id)
+            if events:
+                yield encode_frames(events, changes['cursor'])
+            #:
+        #:
+
+        while True:
+            try:
+                frames = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.COMMAND_EVENTS_HEARTBEAT_SECONDS
+                )
+            #:
+
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            #:
+
+            yield frames
+
+            if subscription.overflowed and frames is RESYNC:
+                return
+            #:
+        #:
+    #:
+
+    finally:
+        broadcaster.unsubscribe(subscription)
+    #:
+#:
@@ -0,0 +1,115 @@
+"""
+
+Facet counts for the command browser sidebars.
+
+All four facets are computed by one statement: the filtered commands go into a
+CTE that is scanned once and grouped four ways, UNION ALL'd together.
+
+That statement costs as much as the filter lets through: unfiltered (the
+sidebar's first load) it groups the whole commands table. Results are cached
+per filter, and an entry outlives catalog writes for up to
+COMMAND_FACETS_STALE_SECONDS: keyed on the catalog version alone, every command
+edit would send the next request back to the full GROUP BY, so under a steady
+trickle of writes the cache would almost never be hit. Counts may therefore
+lag a write by that long; entries computed under the current version are
+served for the whole COMMAND_FACETS_CACHE_TIMEOUT.
+
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+
+from .cache import get_catalog_version
+from .models import Commands, Vendor, Platform, Tag
+
+
+def empty_facets() -> dict:
+    return {'total': 0, 'vendors': [], 'platforms': [], 'tags': [], 'versions': []}
+#:
+
+
+def command_facets(queryset) -> dict:
+    """Counts per vendor, platform, tag and version for a (filtered) Commands queryset."""
+    filtered = queryset.order_by().values('vendor_id', 'platform_id', 'tag_id', 'version')
+
+    try:
+        filtered_sql, params = filtered.query.sql_with_params()
+    #:
+
+    except EmptyResultSet: # e.g. queryset.none(), nothing to count
+        return empty_facets()
+    #:
+
+    qn = connection.ops.quote_name
+    vendor_table = qn(Vendor._meta.db_table)
+    platform_table = qn(Platform._meta.db_table)
+    tag_table = qn(Tag._meta.db_table)
+
+    sql = f"""
+        WITH filtered (vendor_id, platform_id, tag_id, version) AS ({filtered_sql})
+        SELECT 'vendor', f.vendor_id, v.name, COUNT(*)
+            FROM filtered f INNER JOIN {vendor_table} v ON v.id = f.vendor_id
+            GROUP BY f.vendor_id, v.name
+        UNION ALL
+        SELECT 'platform', f.platform_id, p.name, COUNT(*)
+            FROM filtered f LEFT JOIN {platform_table} p ON p.id = f.platform_id
+            GROUP BY f.platform_id, p.name
+        UNION ALL
+        SELECT 'tag', f.tag_id, t.name, COUNT(*)
+            FROM filtered f LEFT JOIN {tag_table} t ON t.id = f.tag_id
+            GROUP BY f.tag_id, t.name
+        UNION ALL
+        SELECT 'version', NULL, f.version, COUNT(*)
+            FROM filtered f
+            GROUP BY f.version
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    #:
+
+    facets = empty_facets()
+
+    for facet, obj_id, name, count in rows:
+        if facet == 'vendor':
+            facets['vendors'].append({'id': obj_id, 'name': name, 'count': count})
+            facets['total'] += count
+        elif facet == 'platform':
+            facets['platforms'].append({'id': obj_id, 'name': name, 'count': count})
+        elif facet == 'tag':
+            facets['tags'].append({'id': obj_id, 'name': name, 'count': count})
+        else:
+            facets['versions'].append({'version': name, 'count': count})
+    #:
+
+    for facet, label in (('vendors', 'name'), ('platforms', 'name'), ('tags', 'name'), ('versions', 'version')):
+        facets[facet].sort(key=lambda item: (-item['count'], item[label] or ''))
+    #:
+    return facets
+#:
+
+
+def cached_command_facets(params: list, queryset) -> dict:
+    """command_facets(queryset), cached under the filter params that produced the queryset."""
+    cache_key = 'commands:facets:' + hashlib.md5(repr(params).encode()).hexdigest()
+    version = get_catalog_version()
+    cached = cache.get(cache_key)
+
+    if cached is not None:
+        cached_version, computed_at, facets = cached
+
+        if cached_version == version or time.time() - computed_at < settings.COMMAND_FACETS_STALE_SECONDS:
+            return facets
+        #:
+    #:
+
+    facets = command_facets(queryset)
+    cache.set(cache_key, (version, time.time(), facets), settings.COMMAND_FACETS_CACHE_TIMEOUT)
+    return facets
+#:
@@ -1,5 +1,11 @@
 import django_filters
-from .models import Commands, Vendor, Platform, Tag
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Upper
+
+from .models import Commands, Vendor, Platform, Tag, version_validator
+from .resolvers import vendor_resolver, platform_resolver, tag_resolver
+from .tagtree import tag_subtree_ids
+from .versions import version_key, version_upper_bound, version_key_validator
 
 class CommandFilter(django_filters.FilterSet):
     # For text-based search on command and description
@@ -7,15 +13,107 @@ class CommandFilter(django_filters.FilterSet):
     search = django_filters.CharFilter(field_name='command', lookup_expr='icontains', label='Search Command')
     
     
-    vendor__name = django_filters.CharFilter(lookup_expr='iexact', label='Vendor Name') # iexact for exact match
-    platform__name = django_filters.CharFilter(lookup_expr='iexact', label='Platform Name')
-    tag__name = django_filters.CharFilter(lookup_expr='iexact', label='Tag Name')
+    # Case-insensitive exact match on the name, resolved to ids up front (see resolvers.py)
+    vendor__name = django_filters.CharFilter(method='filter_vendor_name', label='Vendor Name')
+    platform__name = django_filters.CharFilter(method='filter_platform_name', label='Platform Name')
+    tag__name = django_filters.CharFilter(method='filter_tag_name', label='Tag Name')
+
+    # The tag and everything under it ("Routing" also matches "Routing/OSPF/Area"),
+    # walked in SQL by one recursive CTE and then filtered by the ids it found, so
+    # commands_tag_created_idx serves the list (see tagtree.py)
+    tag_tree = django_filters.CharFilter(method='filter_tag_tree', label='Tag Name (with subtags)')
+    tag_tree_id = django_filters.NumberFilter(method='filter_tag_tree_id', label='Tag ID (with subtags)')
 
     # Filtering by version
     version = django_filters.CharFilter(lookup_expr='icontains', label='Version')
 
+    # Version ranges on the indexed sort key (see versions.py): version_min=15.2 is
+    # "15.2 and later", version_max=15.2 is "15.2 or earlier" including 15.2(3)T.
+    # A range lists the newest versions first (see filter_queryset())
+    version_min = django_filters.CharFilter(method='filter_version_min', validators=[version_validator, version_key_validator], label='Version (from)')
+    version_max = django_filters.CharFilter(method='filter_version_max', validators=[version_validator, version_key_validator], label='Version (up to)')
+    # Only the newest version of each command name among the rows the other filters
+    # select. Names are unique per vendor, so this compares across vendors unless a
+    # vendor filter narrows it down. Commands without a version are left out.
+    latest = django_filters.BooleanFilter(method='filter_latest', label='Latest Version Only')
+
     class Meta:
         model = Commands
         fields = ['command', 'description', 'vendor__name', 'platform__name', 'tag__name', 'version']
     #:
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        # A range on the key can't be searched in -date_created order, so the planner would walk
+        # commands_created_idx and test every row. In key order commands_version_created_idx
+        # serves both the range and the page.
+        if self.form.cleaned_data.get('version_min') or self.form.cleaned_data.get('version_max'):
+            queryset = queryset.order_by('-version_key', '-date_created')
+        #:
+
+        # Compares against what the other filters selected, so it goes last
+        if self.form.cleaned_data.get('latest'):
+            queryset = self.latest_only(queryset)
+        #:
+        return queryset
+    #:
+
+    def filter_by_resolved_ids(self, queryset, field_name, ids):
+        if not ids:
+            # Unknown name: an empty queryset never reaches the database
+            return queryset.none()
+        return queryset.filter(**{f'{field_name}__in': ids})
+    #:
+
+    def filter_vendor_name(self, queryset, name, value):
+        return self.filter_by_resolved_ids(queryset, 'vendor_id', vendor_resolver.resolve(value))
+    #:
+
+    def filter_platform_name(self, queryset, name, value):
+        return self.filter_by_resolved_ids(queryset, 'platform_id', platform_resolver.resolve(value))
+    #:
+
+    def filter_tag_name(self, queryset, name, value):
+        return self.filter_by_resolved_ids(queryset, 'tag_id', tag_resolver.resolve(value))
+    #:
+
+    def filter_tag_tree(self, queryset, name, value):
+        tag_ids = tag_resolver.resolve(value)
+
+        if not tag_ids:
+            return queryset.none()
+        return self.filter_by_resolved_ids(queryset, 'tag_id', tag_subtree_ids(tag_ids))
+    #:
+
+    def filter_tag_tree_id(self, queryset, name, value):
+        return self.filter_by_resolved_ids(queryset, 'tag_id', tag_subtree_ids([int(value)]))
+    #:
+
+    def filter_version_min(self, queryset, name, value):
+        return queryset.filter(version_key__gte=version_key(value))
+    #:
+
+    def filter_version_max(self, queryset, name, value):
+        upper_bound = version_upper_bound(value)
+
+        if upper_bound is None:
+            return queryset.filter(version_key__lte=version_key(value))
+        return queryset.filter(version_key__lt=upper_bound)
+    #:
+
+    def filter_latest(self, queryset, name, value):
+        return queryset # Applied by filter_queryset(), after every other filter
+    #:
+
+    def latest_only(self, queryset):
+        candidates = queryset.filter(version_key__isnull=False)
+
+        # No other selected row of the same name with a higher version; served by commands_command_version_idx
+        newer = candidates.order_by().annotate(command_key=Upper('command')).filter(
+            command_key=Upper(OuterRef('command')),
+            version_key__gt=OuterRef('version_key')
+        )
+        return candidates.exclude(Exists(newer))
+    #:
 #:
@@ -0,0 +1,389 @@
+"""
+
+Command import engine.
+
+Takes the tag/command rows produced by the parsers (see parsing/) and writes
+them for one vendor with a fixed number of set-based statements: existing
+tags and commands are looked up in bulk, new ones go through bulk_create and
+overridden ones through bulk_update. Every import is recorded as an
+ImportBatch, with the prior values of the commands it changed, so it can be
+rolled back as a whole.
+
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery, Exists
+from django.db.models.functions import Upper, Coalesce, Now
+from django.utils import timezone
+
+from .bulk import raw_delete
+from .cache import bump_catalog_version, bump_taxonomy_version
+from .changes import record_tombstones
+from .models import (
+    Tag, Platform, Commands, CommandParameter, CommandUpload, ImportBatch, ImportBatchCommand, Tombstone,
+    COMMAND_MAX_LENGTH
+)
+
+
+# Rows per INSERT/UPDATE statement and keys per IN (...) lookup
+IMPORT_BATCH_SIZE = 1000
+
+# Fields an overriding import rewrites on an existing command (and rollback restores)
+OVERRIDE_FIELDS = ['command', 'description', 'example', 'tag', 'platform', 'created_by', 'method']
+OVERRIDE_ATTNAMES = [Commands._meta.get_field(field).attname for field in OVERRIDE_FIELDS]
+
+
+class RollbackError(Exception):
+    pass
+#:
+
+
+def chunked(items: list, size: int = IMPORT_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+    #:
+#:
+
+
+def record_upload(content_hash: str, vendor, main_tag, override: bool, force: bool, user):
+    """
+    The CommandUpload record for an import about to run, or None when an identical
+    upload (same file, vendor, main tag and override) is recorded already, possibly
+    by a request racing this one: its insert waits for the other's commit and then
+    hits upload_unforced_unique. Forced re-imports are always recorded.
+    Call it inside the import's transaction, first thing.
+    """
+    values = dict(
+        content_hash=content_hash, vendor=vendor, main_tag=main_tag, override=override,
+        forced=force, result={}, created_by=user
+    )
+
+    if force:
+        return CommandUpload.objects.create(**values)
+    #:
+
+    try:
+        with transaction.atomic():
+            return CommandUpload.objects.create(**values)
+        #:
+    #:
+
+    except IntegrityError:
+        return None
+    #:
+#:
+
+
+class CommandImporter:
+
+    def __init__(self, vendor, main_tag, override: bool, user, upload=None):
+        self.vendor = vendor
+        self.main_tag = main_tag
+        self.override = override
+        self.user = user
+        self.upload = upload
+
+        # Lists to store detailed results
+        self.created_commands_details = []
+        self.updated_commands_details = []
+        self.skipped_commands_details = []
+        self.created_tags_details = []
+    #:
+
+    def run(self, parsed_data: dict) -> dict:
+        """Write the parsed rows and return the upload report (also stored on the upload record)."""
+        tag_rows = parsed_data.get('tags', [])
+        command_rows = parsed_data.get('commands', [])
+
+        with transaction.atomic():
+            self.batch = ImportBatch.objects.create(
+                vendor=self.vendor,
+                upload=self.upload,
+                created_by=self.user
+            )
+
+            tags_by_key = self.import_tags(tag_rows, command_rows)
+            self.import_commands(command_rows, tags_by_key)
+
+            # bulk_create/bulk_update send no signals, invalidate the caches once here
+            transaction.on_commit(bump_catalog_version)
+            if self.batch.created_tag_ids:
+                transaction.on_commit(bump_taxonomy_version)
+            #:
+        #:
+
+        return {
+            'vendor_name': self.vendor.name,
+            'main_tag_name': self.main_tag.name if self.main_tag else 'N/A',
+            'import_batch_id': self.batch.pk,
+            'summary': {
+                'total_commands_in_csv': len(command_rows),
+                'commands_created': len(self.created_commands_details),
+                'commands_updated': len(self.updated_commands_details),
+                'commands_skipped': len(self.skipped_commands_details),
+                'total_tags_in_csv': len(tag_rows),
+                'tags_created': len(self.created_tags_details),
+            },
+            'details': {
+                'created_commands': self.created_commands_details,
+                'updated_commands': self.updated_commands_details,
+                'skipped_commands': self.skipped_commands_details,
+                'created_tags': self.created_tags_details,
+            }
+        }
+    #:
+
+    def import_tags(self, tag_rows: list, command_rows: list) -> dict:
+        """Make sure every tag named in the file exists under the main tag. Returns UPPER(name) -> Tag."""
+        # Tag rows first, then tags only referenced by commands, in file order
+        wanted = {}
+        for name, status_label in [(row['name'], 'Created') for row in tag_rows] + \
+                [(row['tag'], 'Created (from Command Tag)') for row in command_rows if row.get('tag')]:
+            wanted.setdefault(name.upper(), (name, status_label))
+        #:
+
+        tags_by_key = {}
+
+        if self.main_tag:
+            # A tag row repeating the main tag's name is the main tag itself, not a new child
+            tags_by_key[self.main_tag.name.upper()] = self.main_tag
+        #:
+
+        missing_keys = [key for key in wanted if key not in tags_by_key]
+
+        for keys in chunked(missing_keys):
+            existing = (
+                Tag.objects
+                .annotate(name_key=Upper('name'))
+                .filter(vendor=self.vendor, parent=self.main_tag, name_key__in=keys)
+            )
+            tags_by_key.update({tag.name_key: tag for tag in existing})
+        #:
+
+        new_tags = [
+            Tag(name=wanted[key][0], vendor=self.vendor, parent=self.main_tag, created_by=self.user)
+            for key in missing_keys if key not in tags_by_key
+        ]
+        Tag.objects.bulk_create(new_tags, batch_size=IMPORT_BATCH_SIZE)
+
+        for tag in new_tags:
+            tags_by_key[tag.name.upper()] = tag
+            self.created_tags_details.append({
+                'name': tag.name,
+                'parent': self.main_tag.name if self.main_tag else None,
+                'status': wanted[tag.name.upper()][1]
+            })
+        #:
+
+        if new_tags:
+            self.batch.created_tag_ids = [tag.pk for tag in new_tags]
+            self.batch.save(update_fields=['created_tag_ids'])
+        #:
+        return tags_by_key
+    #:
+
+    def import_commands(self, command_rows: list, tags_by_key: dict) -> None:
+        platform_obj, _ = Platform.objects.get_or_create(
+            name='N/A',
+            vendor=self.vendor,
+            defaults={'created_by': self.user}
+        )
+
+        # Later rows win over earlier rows for the same command
+        rows_by_key = {}
+        for row in command_rows:
+            command_name = row['command']
+
+            if len(command_name) > COMMAND_MAX_LENGTH:
+                self.skipped_commands_details.append(self.with_source({
+                    'command': command_name,
+                    'reason': f'Error during creation/updating: command is longer than {COMMAND_MAX_LENGTH} characters',
+                    'status': 'Failed'
+                }, row))
+                continue
+            #:
+
+            previous = rows_by_key.pop(command_name.upper(), None)
+            if previous:
+                self.skipped_commands_details.append(self.with_source({
+                    'command': previous['command'],
+                    'reason': 'Command appears again later in the upload',
+                    'status': 'Skipped'
+                }, previous))
+            #:
+            rows_by_key[command_name.upper()] = row
+        #:
+
+        existing_by_key = {}
+        for keys in chunked(list(rows_by_key)):
+            existing = (
+                Commands.objects
+                .annotate(command_key=Upper('command'))
+                .filter(vendor=self.vendor, command_key__in=keys)
+            )
+            existing_by_key.update({command.command_key: command for command in existing})
+        #:
+
+        now = timezone.now()
+        to_create, to_update, items = [], [], []
+
+        for key, row in rows_by_key.items():
+            tag = tags_by_key.get(row['tag'].upper()) if row.get('tag') else self.main_tag
+            values = {
+                'command': row['command'],
+                'description': row['description'],
+                'example': row['example'],
+                'tag': tag,
+                'platform': platform_obj,
+                'created_by': self.user,
+                'method': 'BULK',
+            }
+
+            command_obj = existing_by_key.get(key)
+
+            if command_obj is None:
+                to_create.append((Commands(vendor=self.vendor, date_created=now, **values), row))
+            #:
+
+            elif self.override:
+                items.append(ImportBatchCommand(
+                    batch=self.batch,
+                    command=command_obj,
+                    action=ImportBatchCommand.ACTION_UPDATED,
+                    # attnames (tag_id, ...) so no related rows get loaded
+                    **{f'prior_{attname}': getattr(command_obj, attname) for attname in OVERRIDE_ATTNAMES}
+                ))
+
+                for field, value in values.items():
+                    setattr(command_obj, field, value)
+                #:
+                command_obj.date_updated = now # bulk_update skips auto_now
+                to_update.append((command_obj, row))
+            #:
+
+            else: # Exists and override is off, leave the row alone
+                self.skipped_commands_details.append(self.with_source({
+                    'command': row['command'],
+                    'reason': 'Command already exists and update_existing flag is false',
+                    'status': 'Skipped'
+                }, row))
+            #:
+        #:
+
+        Commands.objects.bulk_create([command_obj for command_obj, _ in to_create], batch_size=IMPORT_BATCH_SIZE)
+        Commands.objects.bulk_update(
+            [command_obj for command_obj, _ in to_update],
+            OVERRIDE_FIELDS + ['date_updated'],
+            batch_size=IMPORT_BATCH_SIZE
+        )
+
+        items += [
+            ImportBatchCommand(batch=self.batch, command=command_obj, action=ImportBatchCommand.ACTION_CREATED)
+            for command_obj, _ in to_create
+        ]
+        ImportBatchCommand.objects.bulk_create(items, batch_size=IMPORT_BATCH_SIZE)
+
+        for command_obj, row in to_create:
+            self.created_commands_details.append(self.command_details(command_obj, row, 'Created Successfully'))
+        #:
+        for command_obj, row in to_update:
+            self.updated_commands_details.append(self.command_details(command_obj, row, 'Updated Successfully'))
+        #:
+    #:
+
+    def command_details(self, command_obj, row: dict, status_label: str) -> dict:
+        return self.with_source({
+            'command': command_obj.command,
+            'description': command_obj.description,
+            'tag': command_obj.tag.name if command_obj.tag else 'N/A',
+            'status': status_label
+        }, row)
+    #:
+
+    def with_source(self, details: dict, row: dict) -> dict:
+        # Rows merged from several files remember which file they came from
+        if row.get('source_file'):
+            details['file'] = row['source_file']
+        #:
+        return details
+    #:
+#:
+
+
+def rollback_import_batch(batch: ImportBatch) -> dict:
+    """
+    Undo an import with a fixed number of statements however large it was:
+    one UPDATE restores the overridden commands, a few DELETEs remove the
+    created commands (and anything hanging off them) and the created tags.
+    """
+    with transaction.atomic():
+        # Lock the batch so two rollbacks can't interleave
+        batch = ImportBatch.objects.select_for_update().get(pk=batch.pk)
+
+        if batch.status != ImportBatch.STATUS_APPLIED:
+            raise RollbackError('This import has already been rolled back.')
+        #:
+
+        touched_ids = batch.items.values('command_id')
+        later_batch_touched = ImportBatchCommand.objects.filter(
+            command_id__in=touched_ids,
+            batch__status=ImportBatch.STATUS_APPLIED,
+            batch__date_created__gt=batch.date_created
+        ).exists()
+
+        if later_batch_touched:
+            raise RollbackError('A later import changed some of these commands, roll that import back first.')
+        #:
+
+        # 1. Restore overridden commands from their stored prior values
+        prior = ImportBatchCommand.objects.filter(
+            batch=batch,
+            action=ImportBatchCommand.ACTION_UPDATED,
+            command_id=OuterRef('pk')
+        )
+        restored = Commands.objects.filter(
+            import_items__batch=batch,
+            import_items__action=ImportBatchCommand.ACTION_UPDATED
+        ).update(
+            command=Subquery(prior.values('prior_command')[:1]),
+            description=Subquery(prior.values('prior_description')[:1]),
+            example=Subquery(prior.values('prior_example')[:1]),
+            tag_id=Subquery(prior.values('prior_tag_id')[:1]),
+            platform_id=Subquery(prior.values('prior_platform_id')[:1]),
+            # The previous owner may have been deleted since, keep the current one then
+            created_by_id=Coalesce(Subquery(prior.values('prior_created_by_id')[:1]), 'created_by_id'),
+            method=Subquery(prior.values('prior_method')[:1]),
+            date_updated=Now()
+        )
+
+        # 2. Delete created commands; dependents first, this batch's own items last
+        created_ids = batch.items.filter(action=ImportBatchCommand.ACTION_CREATED).values('command_id')
+        CommandParameter.objects.filter(command_id__in=created_ids).delete()
+        ImportBatchCommand.objects.filter(command_id__in=created_ids).exclude(batch=batch).delete()
+        # raw_delete issues one DELETE without loading rows through the collector
+        # (so no pre_delete tombstones either, they are written here);
+        # FK constraints are deferred, so the items referencing them go next
+        record_tombstones(Commands.objects.filter(pk__in=created_ids), Tombstone.MODEL_COMMAND)
+        deleted = raw_delete(Commands.objects.filter(pk__in=created_ids))
+        batch.items.all().delete()
+
+        # 3. Delete created tags nothing else has started using since
+        Tag.objects.filter(pk__in=batch.created_tag_ids).exclude(
+            Exists(Commands.objects.filter(tag_id=OuterRef('pk')))
+        ).exclude(
+            Exists(Tag.objects.filter(parent_id=OuterRef('pk')))
+        ).delete()
+
+        # The upload record goes too, so the same file can be imported again
+        upload_id = batch.upload_id
+        batch.status = ImportBatch.STATUS_ROLLED_BACK
+        batch.date_rolled_back = timezone.now()
+        batch.upload = None
+        batch.save(update_fields=['status', 'date_rolled_back', 'upload'])
+
+        CommandUpload.objects.filter(pk=upload_id).delete()
+
+        transaction.on_commit(bump_catalog_version)
+    #:
+    return {'commands_restored': restored, 'commands_deleted': deleted}
+#:
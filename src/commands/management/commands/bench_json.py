@@ -0,0 +1,126 @@
+"""
+
+JSON renderer/parser benchmark.
+
+Times commands/get-all/?page_size=100 end to end (view + render) with DRF's
+JSONRenderer and with common.renderers.ORJSONRenderer, then the render and
+parse steps alone on the same page. Missing rows are created inside a
+transaction that is rolled back.
+
+    python manage.py bench_json --requests 200
+
+"""
+
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from account.models import CustomUser
+from commands.models import Commands, Vendor, Tag
+from commands.views import CommandListSet
+from common.parsers import ORJSONParser
+from common.renderers import ORJSONRenderer, orjson
+
+
+PAGE_SIZE = 100
+BENCH_EMAIL = 'bench-json@example.invalid'
+
+
+class Rollback(Exception):
+    pass
+#:
+
+
+class Command(BaseCommand):
+    help = "Benchmark the JSON renderer/parser on commands/get-all/?page_size=100"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+    #:
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write("orjson is not installed, ORJSONRenderer falls back to JSONRenderer.")
+        #:
+
+        try:
+            with transaction.atomic():
+                self.ensure_rows()
+                self.bench(options['requests'])
+                raise Rollback()
+            #:
+        #:
+
+        except Rollback:
+            pass
+        #:
+    #:
+
+    def ensure_rows(self):
+        missing = PAGE_SIZE - Commands.objects.count()
+        if missing <= 0:
+            return
+        #:
+
+        user = CustomUser.objects.create_user(email=BENCH_EMAIL, password=None)
+        vendor = Vendor.objects.create(name='Bench JSON Vendor', created_by=user)
+        tag = Tag.objects.create(name='Bench JSON Tag', vendor=vendor, created_by=user)
+
+        Commands.objects.bulk_create([
+            Commands(
+                command=f'show bench json {i}',
+                description=f'Benchmark row {i} with a description of a typical length.',
+                example=f'show bench json {i} detail',
+                vendor=vendor,
+                tag=tag,
+                created_by=user
+            )
+            for i in range(missing)
+        ])
+    #:
+
+    def bench(self, requests):
+        factory = APIRequestFactory()
+
+        for label, renderer_class in (('json', JSONRenderer), ('orjson', ORJSONRenderer)):
+            view = CommandListSet.as_view(renderer_classes=[renderer_class])
+
+            def get_page():
+                response = view(factory.get('/commands/get-all/', {'page_size': PAGE_SIZE}))
+                return response.render().content
+            #:
+
+            body = get_page() # Warm up (and fill the row cache)
+            elapsed = self.time(get_page, requests)
+            self.stdout.write(f"{label:>8} request: {elapsed / requests * 1000:8.3f} ms/request ({len(body)} bytes)")
+        #:
+
+        data = CommandListSet.as_view()(factory.get('/commands/get-all/', {'page_size': PAGE_SIZE})).data
+
+        for label, renderer in (('json', JSONRenderer()), ('orjson', ORJSONRenderer())):
+            elapsed = self.time(lambda: renderer.render(data), requests)
+            self.stdout.write(f"{label:>8}  render: {elapsed / requests * 1000:8.3f} ms/page")
+        #:
+
+        body = JSONRenderer().render(data)
+
+        for label, parser in (('json', JSONParser()), ('orjson', ORJSONParser())):
+            elapsed = self.time(lambda: parser.parse(io.BytesIO(body), parser_context={}), requests)
+            self.stdout.write(f"{label:>8}   parse: {elapsed / requests * 1000:8.3f} ms/page")
+        #:
+    #:
+
+    def time(self, func, repeat):
+        started = time.perf_counter()
+
+        for _ in range(repeat):
+            func()
+        #:
+        return time.perf_counter() - started
+    #:
+#:
@@ -0,0 +1,196 @@
+"""
+
+Runs EXPLAIN on the queries behind every command list endpoint and fails when
+one of them has to fall back to a full scan of the commands table. A filtered
+list also fails when it walks a whole index (in sort order, say) instead of
+searching it by the filter.
+
+The filter values come from real rows (a vendor, platform, tag, version and
+owner that commands actually have), so the plans are for queries that return
+something. Each is the value the fewest commands have: the case an index is
+there for. A case with no row to take its values from, or whose plan comes out
+empty, is reported as unverified and fails too.
+
+    python manage.py check_list_indexes
+
+"""
+
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from account.models import CustomUser
+from commands import views
+from commands.models import Commands
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the command list endpoint queries and check they are served by an index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=views.CommandPagination.page_size)
+    #:
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        failures, unverified = [], []
+
+        for label, queryset, filtered in self.endpoint_querysets():
+            if queryset is None:
+                self.stdout.write(f"???? {label}\n     No command rows to take the filter value from")
+                unverified.append(label)
+                continue
+            #:
+
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    # Tiny development tables make a seq scan the cheapest plan; with seq scans
+                    # priced out the plan shows whether an index *can* serve the query
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                    #:
+                #:
+                plan = queryset[:page_size].explain()
+            #:
+
+            if not plan.strip():
+                # queryset.none() (e.g. an unknown name) never reaches the database
+                self.stdout.write(f"???? {label}\n     Empty plan, the query never ran")
+                unverified.append(label)
+                continue
+            #:
+
+            uses_index = not self.full_table_scan(plan) and not (filtered and self.full_index_scan(plan))
+            self.stdout.write(f"{'OK  ' if uses_index else 'FAIL'} {label}")
+            self.stdout.write('\n'.join(f"     {line}" for line in plan.splitlines()))
+
+            if not uses_index:
+                failures.append(label)
+            #:
+        #:
+
+        if failures or unverified:
+            raise CommandError(
+                '; '.join(filter(None, [
+                    failures and f"Full scan of {Commands._meta.db_table} in: {', '.join(failures)}",
+                    unverified and f"Not verified: {', '.join(unverified)}",
+                ]))
+            )
+        #:
+        self.stdout.write(self.style.SUCCESS("All command list queries use an index."))
+    #:
+
+    def full_table_scan(self, plan: str) -> bool:
+        table = Commands._meta.db_table
+
+        for line in plan.splitlines():
+            # PostgreSQL: "Seq Scan on commands_commands"
+            if f'Seq Scan on {table}' in line:
+                return True
+            # SQLite: "SCAN commands_commands" (without "USING ... INDEX")
+            if f'SCAN {table}' in line and 'INDEX' not in line:
+                return True
+        #:
+        return False
+    #:
+
+    def full_index_scan(self, plan: str) -> bool:
+        """An index of the commands table read from end to end, the filter applied row by row."""
+        table = Commands._meta.db_table
+        lines = plan.splitlines()
+
+        for index, line in enumerate(lines):
+            # SQLite: "SCAN commands_commands USING INDEX x"; a search reads "SEARCH ... (vendor_id=?)"
+            if f'SCAN {table} USING' in line and not re.search(r'\(.*\?.*\)', line):
+                return True
+            #:
+
+            # PostgreSQL: an (Only) Index Scan node on the table without an Index Cond among its details
+            if re.search(rf'Index (Only )?Scan (Backward )?using \S+ on {table}\b', line):
+                depth = len(line) - len(line.lstrip(' ->'))
+                details = []
+
+                for detail in lines[index + 1:]:
+                    if detail.lstrip().startswith('->') or len(detail) - len(detail.lstrip()) <= depth:
+                        break
+                    #:
+                    details.append(detail)
+                #:
+
+                if not any('Index Cond' in detail for detail in details):
+                    return True
+                #:
+            #:
+        #:
+        return False
+    #:
+
+    def sample_values(self) -> dict:
+        """Filter values taken from real commands; None where no command has one."""
+        commands = Commands.objects.order_by()
+        owner_id = self.narrowest(commands, 'created_by')
+
+        return {
+            'vendor': self.narrowest(commands, 'vendor__name'),
+            'platform': self.narrowest(commands, 'platform__name'),
+            'tag': self.narrowest(commands, 'tag__name'),
+            # The newest, the narrowest version_min range there is
+            'version': commands.filter(version_key__isnull=False).order_by('-version_key').values_list('version', flat=True).first(),
+            'owner': owner_id and CustomUser.objects.get(pk=owner_id),
+        }
+    #:
+
+    def narrowest(self, commands, field: str):
+        """
+        The value of `field` the fewest commands have. A filter that keeps most of the
+        table is rightly answered by walking it in page order; one that keeps a few rows
+        is where the walk costs the most, so that's the plan to check.
+        """
+        return (
+            commands.filter(**{f'{field}__isnull': False})
+            .values(field)
+            .annotate(rows=Count('pk'))
+            .order_by('rows', field)
+            .values_list(field, flat=True)
+            .first()
+        )
+    #:
+
+    def endpoint_querysets(self):
+        """Yield (label, queryset, filtered) built by the list views themselves; queryset is None without sample data."""
+        factory = APIRequestFactory()
+        values = self.sample_values()
+
+        # (label, view, params, the sample value the case needs)
+        cases = [
+            ('commands/get-all/', views.CommandListSet, {}, None),
+            ('commands/my-list/', views.UserCommandListSet, {}, 'owner'),
+            ('commands/get-filtered/?vendor__name', views.CommandFilteredListView, {'vendor__name': values['vendor']}, 'vendor'),
+            ('commands/get-filtered/?platform__name', views.CommandFilteredListView, {'platform__name': values['platform']}, 'platform'),
+            ('commands/get-filtered/?tag__name', views.CommandFilteredListView, {'tag__name': values['tag']}, 'tag'),
+            ('commands/get-filtered/?tag_tree', views.CommandFilteredListView, {'tag_tree': values['tag']}, 'tag'),
+            ('commands/get-filtered/?version_min', views.CommandFilteredListView, {'version_min': values['version']}, 'version'),
+        ]
+
+        for label, view_class, params, needs in cases:
+            if needs is not None and values[needs] is None:
+                yield label, None, True
+                continue
+            #:
+
+            request = factory.get('/', params)
+            force_authenticate(request, user=values['owner'] or CustomUser(pk=0))
+
+            view = view_class()
+            view.setup(request)
+            view.request = view.initialize_request(request)
+            view.format_kwarg = None
+
+            # my-list is filtered too, by its owner
+            yield label, view.filter_queryset(view.get_queryset()), bool(params) or needs == 'owner'
+        #:
+    #:
+#:
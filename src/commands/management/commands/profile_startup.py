@@ -0,0 +1,193 @@
+"""
+
+Worker cold-start profile.
+
+Starts fresh interpreters the way a new worker starts: builds the WSGI
+application (settings, app registry) and serves one request through it. Two
+reports come out of it:
+
+- import time per module (python -X importtime), the heaviest top-level
+  packages and the project's own modules;
+- time to first request over --runs cold starts: process wall time, time to
+  a ready WSGI application and time to the first response.
+
+--json prints the numbers for a CI job to track, --max-ms fails the command
+when the median cold start gets slower than that.
+
+    python manage.py profile_startup --runs 5
+    python manage.py profile_startup --json --max-ms 1500
+
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+PROJECT_PACKAGES = ('account', 'commands', 'common', 'pxosys')
+
+# Run in the child interpreter; timings are printed as one JSON line on stdout
+CHILD_SCRIPT = '''
+import json, os, sys, time
+started = time.perf_counter()
+
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+ready = time.perf_counter()
+
+import io
+from django.conf import settings
+hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')]
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+    'SERVER_NAME': hosts[0] if hosts else 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+statuses = []
+b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+served = time.perf_counter()
+
+print(json.dumps({
+    'ready_ms': (ready - started) * 1000,
+    'first_request_ms': (served - started) * 1000,
+    'status': statuses[0] if statuses else None,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = "Profile worker cold start: import time per module and time to first request"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Cold starts to time")
+        parser.add_argument('--top', type=int, default=20, help="Modules listed per import report")
+        parser.add_argument('--path', default='/commands/get-all/', help="URL of the first request")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+        parser.add_argument('--max-ms', type=float, default=None, help="Fail when the median cold start is slower")
+    #:
+
+    def handle(self, *args, **options):
+        imports = self.profile_imports(options['path'])
+        starts = [self.cold_start(options['path']) for _ in range(max(options['runs'], 1))]
+
+        summary = {
+            key: {
+                'median': statistics.median(start[key] for start in starts),
+                'min': min(start[key] for start in starts),
+                'max': max(start[key] for start in starts),
+            }
+            for key in ('wall_ms', 'ready_ms', 'first_request_ms')
+        }
+        packages = self.top_level(imports)[:options['top']]
+        project = self.project_modules(imports)[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'runs': len(starts),
+                'path': options['path'],
+                'status': starts[-1]['status'],
+                'cold_start': summary,
+                'import_total_ms': self.import_total_ms(imports),
+                'packages': [{'module': name, 'cumulative_ms': cumulative / 1000} for name, _, cumulative in packages],
+                'project_modules': [{'module': name, 'self_ms': own / 1000} for name, own, _ in project],
+            }, indent=2))
+        #:
+
+        else:
+            self.write_report(imports, packages, project, summary, starts, options['path'])
+        #:
+
+        if options['max_ms'] is not None and summary['wall_ms']['median'] > options['max_ms']:
+            raise CommandError(
+                f"Median cold start {summary['wall_ms']['median']:.0f} ms is over the {options['max_ms']:.0f} ms budget"
+            )
+        #:
+    #:
+
+    def run_child(self, path: str, *flags) -> subprocess.CompletedProcess:
+        result = subprocess.run(
+            [sys.executable, *flags, '-c', CHILD_SCRIPT, path],
+            # Same environment, so the same DJANGO_SETTINGS_MODULE manage.py picked
+            cwd=settings.BASE_DIR, env=os.environ, capture_output=True, text=True
+        )
+
+        if result.returncode != 0:
+            raise CommandError(f"Startup run failed:\n{result.stderr[-2000:]}")
+        #:
+        return result
+    #:
+
+    def profile_imports(self, path: str) -> list:
+        """[(depth, name, self_us, cumulative_us)] from python -X importtime, in import order."""
+        result = self.run_child(path, '-X', 'importtime')
+        imports = []
+
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            #:
+
+            own, cumulative, name = line[len('import time:'):].split('|')
+            # One space, then two more per nesting level
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            imports.append((depth, name.strip(), int(own), int(cumulative)))
+        #:
+        return imports
+    #:
+
+    def cold_start(self, path: str) -> dict:
+        started = time.perf_counter()
+        result = self.run_child(path)
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        return {'wall_ms': wall_ms, **timings}
+    #:
+
+    def top_level(self, imports: list) -> list:
+        """(name, self_us, cumulative_us) of the modules imported at the top level, heaviest first."""
+        rows = [(name, own, cumulative) for depth, name, own, cumulative in imports if depth == 0]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+    #:
+
+    def import_total_ms(self, imports: list) -> float:
+        return sum(cumulative for depth, _, _, cumulative in imports if depth == 0) / 1000
+    #:
+
+    def project_modules(self, imports: list) -> list:
+        rows = [
+            (name, own, cumulative) for _, name, own, cumulative in imports
+            if name.split('.')[0] in PROJECT_PACKAGES
+        ]
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+    #:
+
+    def write_report(self, imports, packages, project, summary, starts, path):
+        self.stdout.write(f"Imports: {len(imports)} modules, {self.import_total_ms(imports):.1f} ms\n")
+
+        self.stdout.write("Heaviest top-level imports (cumulative):")
+        for name, _, cumulative in packages:
+            self.stdout.write(f"  {cumulative / 1000:8.2f} ms  {name}")
+        #:
+
+        self.stdout.write("\nProject modules (own time, without what they import):")
+        for name, own, _ in project:
+            self.stdout.write(f"  {own / 1000:8.2f} ms  {name}")
+        #:
+
+        self.stdout.write(f"\nCold start over {len(starts)} runs, first request GET {path} ({starts[-1]['status']}):")
+        for key, label in (('wall_ms', 'process wall time'), ('ready_ms', 'WSGI app ready'), ('first_request_ms', 'first response')):
+            numbers = summary[key]
+            self.stdout.write(
+                f"  {label:>18}: median {numbers['median']:8.1f} ms  (min {numbers['min']:.1f}, max {numbers['max']:.1f})"
+            )
+        #:
+    #:
+#:
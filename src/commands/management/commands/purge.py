@@ -0,0 +1,38 @@
+"""
+
+Runs the vendor/tag purge jobs no web process has picked up (or all of them
+when COMMAND_PURGE_IN_PROCESS is off, e.g. from cron or a worker container).
+
+    python manage.py purge
+    python manage.py purge --resume    # also take over jobs left RUNNING by a dead worker
+
+"""
+
+from django.core.management.base import BaseCommand
+
+from commands.purging import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Run pending vendor/tag purge jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resume', action='store_true',
+            help="Also restart RUNNING jobs. Only when no other purge worker is running."
+        )
+    #:
+
+    def handle(self, *args, **options):
+        jobs = run_pending_jobs(resume=options['resume'])
+
+        for job in jobs:
+            self.stdout.write(
+                f"{job.status:6} {job.target} #{job.target_id} ({job.target_name}): "
+                f"{job.commands_deleted} commands, {job.tags_deleted} tags deleted"
+                + (f" - {job.error}" if job.error else "")
+            )
+        #:
+        self.stdout.write(f"{len(jobs)} purge jobs run.")
+    #:
+#:
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:12
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+
+# (model, name field, what the name is unique within)
+CASE_INSENSITIVE_NAMES = [
+    ('Vendor', 'name', []),
+    ('Platform', 'name', ['vendor']),
+    ('Tag', 'name', ['vendor', 'parent']),
+    ('Commands', 'command', ['vendor']),
+]
+
+
+def check_case_duplicates(apps, schema_editor):
+    # Rows that differ only by case (or root tags that don't differ at all) would make the
+    # constraints below fail with a bare IntegrityError. Merging them here would have to pick
+    # whose description, platform or subtree wins, so they are listed for someone to merge
+    # or rename first, and the migration stops before changing anything.
+    duplicates = []
+
+    for model_name, field, scope in CASE_INSENSITIVE_NAMES:
+        model = apps.get_model('commands', model_name)
+        groups = (
+            model.objects.annotate(name_key=Upper(field))
+            .values('name_key', *scope)
+            .annotate(rows=Count('pk'))
+            .filter(rows__gt=1)
+            .order_by('name_key', *scope)
+        )
+
+        for group in groups:
+            # filter(parent=None) is IS NULL, so root tags group together
+            rows = model.objects.annotate(name_key=Upper(field)).filter(
+                name_key=group['name_key'], **{key: group[key] for key in scope}
+            ).order_by('pk')
+            duplicates.append(
+                f"{model_name} " + ', '.join(f"#{row.pk} {getattr(row, field)!r}" for row in rows)
+            )
+        #:
+    #:
+
+    if duplicates:
+        raise RuntimeError(
+            "Rows that differ only by case have to be merged or renamed before the "
+            "case-insensitive unique constraints can be added:\n  " + '\n  '.join(duplicates)
+        )
+    #:
+#:
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0005_alter_tag_name_alter_tag_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='commands',
+            name='commands_co_command_24c079_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='tag',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='commands',
+            name='command',
+            field=models.CharField(max_length=255, verbose_name='Command'),
+        ),
+        migrations.AlterField(
+            model_name='platform',
+            name='name',
+            field=models.CharField(max_length=122, verbose_name='Platform'),
+        ),
+        migrations.AlterField(
+            model_name='vendor',
+            name='name',
+            field=models.CharField(max_length=122, verbose_name='Vendor Name'),
+        ),
+        migrations.AddConstraint(
+            model_name='commands',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('command'), models.F('vendor'), name='commands_command_vendor_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='platform',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('name'), models.F('vendor'), name='platform_name_vendor_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('name'), models.F('vendor'), models.F('parent'), name='tag_name_vendor_parent_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('name'), models.F('vendor'), condition=models.Q(('parent__isnull', True)), name='tag_root_name_vendor_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='vendor',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('name'), name='vendor_name_ci_unique'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0006_case_insensitive_unique_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='commands',
+            name='created_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='commands_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By'),
+        ),
+        migrations.AlterField(
+            model_name='commands',
+            name='platform',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='commands', to='commands.platform', verbose_name='Platform'),
+        ),
+        migrations.AlterField(
+            model_name='commands',
+            name='tag',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='commands', to='commands.tag', verbose_name='Tag'),
+        ),
+        migrations.AlterField(
+            model_name='commands',
+            name='vendor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='commands', to='commands.vendor', verbose_name='Vendor'),
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['-date_created', 'id'], name='commands_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['vendor', '-date_created', 'id'], name='commands_vendor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['created_by', '-date_created'], name='commands_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['platform', '-date_created'], name='commands_platform_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['tag', '-date_created'], name='commands_tag_created_idx'),
+        ),
+    ]
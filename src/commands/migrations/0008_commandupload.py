@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0007_list_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Content SHA-256')),
+                ('override', models.BooleanField(default=False, verbose_name='Override Existing')),
+                ('result', models.JSONField(verbose_name='Result')),
+                ('date_created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created At')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('main_tag', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='commands.tag', verbose_name='Main Tag')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='commands.vendor', verbose_name='Vendor')),
+            ],
+            options={
+                'ordering': ['-date_created'],
+                'indexes': [models.Index(fields=['vendor', 'content_hash'], name='upload_vendor_hash_idx')],
+            },
+        ),
+    ]
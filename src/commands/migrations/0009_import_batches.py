@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0008_commandupload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_tag_ids', models.JSONField(default=list, verbose_name='Created Tags')),
+                ('status', models.CharField(choices=[('APPLIED', 'Applied'), ('ROLLED_BACK', 'Rolled Back')], default='APPLIED', max_length=12, verbose_name='Status')),
+                ('date_created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created At')),
+                ('date_rolled_back', models.DateTimeField(blank=True, null=True, verbose_name='Rolled Back At')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_batches_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('upload', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='batch', to='commands.commandupload', verbose_name='Upload')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_batches', to='commands.vendor', verbose_name='Vendor')),
+            ],
+            options={
+                'ordering': ['-date_created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportBatchCommand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('CREATED', 'Created'), ('UPDATED', 'Updated')], max_length=8)),
+                ('prior_command', models.CharField(blank=True, max_length=255, null=True)),
+                ('prior_description', models.TextField(blank=True, max_length=500, null=True)),
+                ('prior_example', models.TextField(blank=True, max_length=255, null=True)),
+                ('prior_method', models.CharField(blank=True, max_length=12, null=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='commands.importbatch')),
+                ('command', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_items', to='commands.commands')),
+                ('prior_created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('prior_platform', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='commands.platform')),
+                ('prior_tag', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='commands.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['batch', 'action'], name='import_item_batch_action_idx')],
+            },
+        ),
+    ]
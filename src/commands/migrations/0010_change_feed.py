@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:25
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0009_import_batches'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(choices=[('vendor', 'Vendor'), ('platform', 'Platform'), ('tag', 'Tag'), ('command', 'Command')], max_length=12, verbose_name='Model')),
+                ('object_id', models.BigIntegerField(verbose_name='Object ID')),
+                ('vendor_id', models.BigIntegerField(verbose_name='Vendor ID')),
+                ('date_deleted', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Deleted At')),
+            ],
+            options={
+                'ordering': ['date_deleted', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='platform',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Updated At'),
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['date_updated', 'id'], name='commands_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['vendor', 'date_updated', 'id'], name='commands_vendor_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='platform',
+            index=models.Index(fields=['date_updated', 'id'], name='platform_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['date_updated', 'id'], name='tag_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['date_updated', 'id'], name='vendor_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['date_deleted', 'id'], name='tombstone_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['vendor_id', 'date_deleted', 'id'], name='tombstone_vendor_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0010_change_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('vendor', 'Vendor'), ('tag', 'Tag')], max_length=8, verbose_name='Target')),
+                ('target_id', models.BigIntegerField(verbose_name='Target ID')),
+                ('vendor_id', models.BigIntegerField(verbose_name='Vendor ID')),
+                ('target_name', models.CharField(max_length=122, verbose_name='Target Name')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=8, verbose_name='Status')),
+                ('commands_total', models.PositiveIntegerField(default=0, verbose_name='Commands To Delete')),
+                ('commands_deleted', models.PositiveIntegerField(default=0, verbose_name='Commands Deleted')),
+                ('tags_deleted', models.PositiveIntegerField(default=0, verbose_name='Tags Deleted')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('date_created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created At')),
+                ('date_started', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('date_finished', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purge_jobs_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+            ],
+            options={
+                'ordering': ['-date_created'],
+                'constraints': [models.UniqueConstraint(models.F('target'), models.F('target_id'), condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), name='purge_job_active_target_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:44
+
+import re
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+# commands.versions.version_key as it was before 0014 changed the format, so
+# the backfill doesn't change along with the live function
+VERSION_PATTERN = re.compile(r'^(\d+(?:\.\d+)+)(?:\((\d+)\))?([A-Za-z])?$')
+
+
+def version_key(version):
+    match = VERSION_PATTERN.match((version or '').strip())
+
+    if match is None:
+        return None
+    #:
+
+    numbers, inner, letter = match.groups()
+    segments = numbers.split('.') + ([inner] if inner else [])
+
+    if any(len(segment.lstrip('0')) > 6 for segment in segments):
+        return None
+    #:
+
+    key = ''.join(str(int(segment)).zfill(6) for segment in segments) + (letter or '').upper()
+    return key if len(key) <= 80 else None
+#:
+
+
+def backfill_version_keys(apps, schema_editor):
+    # Keyset over the ids so no batch holds more than BACKFILL_BATCH_SIZE rows;
+    # date_updated is left alone, the commands themselves didn't change
+    Commands = apps.get_model('commands', 'Commands')
+    last_id = 0
+
+    while True:
+        batch = list(
+            Commands.objects.filter(pk__gt=last_id, version__isnull=False)
+            .order_by('pk')
+            .only('pk', 'version')[:BACKFILL_BATCH_SIZE]
+        )
+
+        if not batch:
+            break
+        #:
+
+        for command in batch:
+            command.version_key = version_key(command.version)
+        #:
+        Commands.objects.bulk_update(batch, ['version_key'])
+        last_id = batch[-1].pk
+    #:
+#:
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0011_purge_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commands',
+            name='version_key',
+            field=models.CharField(blank=True, editable=False, max_length=80, null=True, verbose_name='Version Sort Key'),
+        ),
+        # Before the indexes, so they are built once over the filled column
+        migrations.RunPython(backfill_version_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['version_key'], name='commands_version_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(django.db.models.functions.text.Upper('command'), models.F('version_key'), name='commands_command_version_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0012_version_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='commands',
+            name='commands_version_key_idx',
+        ),
+        migrations.AddIndex(
+            model_name='commands',
+            index=models.Index(fields=['-version_key', '-date_created'], name='commands_version_created_idx'),
+        ),
+    ]
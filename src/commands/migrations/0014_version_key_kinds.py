@@ -0,0 +1,67 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:40
+
+import re
+
+from django.db import migrations
+
+
+REKEY_BATCH_SIZE = 1000
+
+# commands.versions.version_key as of this migration: every numeric part gets a
+# kind digit (1 dotted, 2 in parentheses), so 15.2.3 and 15.2(3) no longer share a key
+VERSION_PATTERN = re.compile(r'^(\d+(?:\.\d+)+)(?:\((\d+)\))?([A-Za-z])?$')
+
+
+def version_key(version):
+    match = VERSION_PATTERN.match((version or '').strip())
+
+    if match is None:
+        return None
+    #:
+
+    numbers, inner, letter = match.groups()
+    segments = [('1', number) for number in numbers.split('.')] + ([('2', inner)] if inner else [])
+
+    if any(len(number.lstrip('0')) > 6 for kind, number in segments):
+        return None
+    #:
+
+    key = ''.join(kind + str(int(number)).zfill(6) for kind, number in segments) + (letter or '').upper()
+    return key if len(key) <= 80 else None
+#:
+
+
+def rekey_versions(apps, schema_editor):
+    # Same keyset walk as the 0012 backfill, date_updated is left alone
+    Commands = apps.get_model('commands', 'Commands')
+    last_id = 0
+
+    while True:
+        batch = list(
+            Commands.objects.filter(pk__gt=last_id, version__isnull=False)
+            .order_by('pk')
+            .only('pk', 'version')[:REKEY_BATCH_SIZE]
+        )
+
+        if not batch:
+            break
+        #:
+
+        for command in batch:
+            command.version_key = version_key(command.version)
+        #:
+        Commands.objects.bulk_update(batch, ['version_key'])
+        last_id = batch[-1].pk
+    #:
+#:
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0013_version_range_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_versions, migrations.RunPython.noop),
+    ]
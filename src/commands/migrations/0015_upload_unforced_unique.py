@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:31
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_forced_uploads(apps, schema_editor):
+    # Before the constraint, uploads recorded again by `force` (or by a race) were
+    # plain records; the oldest of each file and options stays the unforced one
+    CommandUpload = apps.get_model('commands', 'CommandUpload')
+    seen = set()
+
+    for upload in CommandUpload.objects.order_by('date_created', 'pk').only(
+        'pk', 'content_hash', 'vendor_id', 'main_tag_id', 'override'
+    ).iterator():
+        key = (upload.content_hash, upload.vendor_id, upload.main_tag_id, upload.override)
+
+        if key in seen:
+            CommandUpload.objects.filter(pk=upload.pk).update(forced=True)
+        #:
+        seen.add(key)
+    #:
+#:
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0014_version_key_kinds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commandupload',
+            name='forced',
+            field=models.BooleanField(default=False, verbose_name='Forced Re-import'),
+        ),
+        migrations.RunPython(mark_forced_uploads, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='commandupload',
+            constraint=models.UniqueConstraint(models.F('content_hash'), models.F('vendor'), django.db.models.functions.comparison.Coalesce('main_tag', 0), models.F('override'), condition=models.Q(('forced', False)), name='upload_unforced_unique'),
+        ),
+    ]
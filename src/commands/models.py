@@ -1,12 +1,17 @@
 from django.db import models
+from django.db.models.functions import Coalesce, Upper
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
-from django.db.models.signals import pre_delete
+from django.db import transaction
+from django.db.models.signals import pre_delete, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _t
 
+from .cache import bump_catalog_version, bump_taxonomy_version
+from .versions import version_key as make_version_key, VERSION_KEY_MAX_LENGTH
+
 NAME_MAX_LENGTH = 122
 COMMAND_MAX_LENGTH = 255
 DESCRIPTION_MAX_LENGTH = 500
@@ -26,7 +31,6 @@ version_validator = RegexValidator(
 class Vendor(models.Model):
     name = models.CharField(
         max_length=NAME_MAX_LENGTH,
-        unique=True,
         verbose_name=_t("Vendor Name")
     )
     date_created = models.DateTimeField(default=timezone.now, verbose_name=_t("Created At"))
@@ -40,6 +44,18 @@ class Vendor(models.Model):
 
     def __str__(self) -> str:
         return self.name
+    #:
+
+    class Meta:
+        # UPPER() is what Django emits for `iexact` on PostgreSQL, so the
+        # `name__iexact` validation lookups can be answered from this index
+        constraints = [
+            models.UniqueConstraint(Upper('name'), name='vendor_name_ci_unique'),
+        ]
+        # Keyset order of the change feed (commands/changes.py)
+        indexes = [
+            models.Index(fields=['date_updated', 'id'], name='vendor_updated_idx'),
+        ]
 #:
 
 
@@ -47,7 +63,6 @@ class Vendor(models.Model):
 class Platform(models.Model):
     name = models.CharField(
         max_length=NAME_MAX_LENGTH,
-        unique=True,
         verbose_name=_t("Platform"),
         null=False,
         blank=False
@@ -64,9 +79,19 @@ class Platform(models.Model):
         related_name='platforms',
         verbose_name=_t("Vendor")
     )
+    date_updated = models.DateTimeField(auto_now=True, verbose_name=_t("Updated At"))
 
     def __str__(self):
         return f"{self.name}"
+    #:
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Upper('name'), 'vendor', name='platform_name_vendor_ci_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date_updated', 'id'], name='platform_updated_idx'),
+        ]
 #:
 
 
@@ -111,7 +136,18 @@ class Tag(models.Model):
     class Meta:
         verbose_name_plural = "Tags"
         ordering = ['name']
-        unique_together = ('name', 'vendor', 'parent')
+        constraints = [
+            models.UniqueConstraint(Upper('name'), 'vendor', 'parent', name='tag_name_vendor_parent_ci_unique'),
+            # NULLs are distinct in unique indexes, so root tags need their own constraint
+            models.UniqueConstraint(
+                Upper('name'), 'vendor',
+                condition=models.Q(parent__isnull=True),
+                name='tag_root_name_vendor_ci_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date_updated', 'id'], name='tag_updated_idx'),
+        ]
 #:
 
 
@@ -128,7 +164,6 @@ class Commands(models.Model):
     
     command = models.CharField(
         max_length=COMMAND_MAX_LENGTH,
-        unique=True,
         verbose_name=_t("Command"),
         null=False,
         blank=False
@@ -155,6 +190,14 @@ class Commands(models.Model):
         null=True,
         blank=True
     )
+    # `version` in sortable form (see versions.py), kept in sync by save()
+    version_key = models.CharField(
+        max_length=VERSION_KEY_MAX_LENGTH,
+        verbose_name=_t("Version Sort Key"),
+        null=True,
+        blank=True,
+        editable=False
+    )
     
     date_created = models.DateTimeField(default=timezone.now, verbose_name=_t("Created At"))
     date_updated = models.DateTimeField(auto_now=True, verbose_name=_t("Updated At"))
@@ -163,6 +206,7 @@ class Commands(models.Model):
         Vendor,
         on_delete=models.CASCADE,
         related_name='commands',
+        db_index=False, # Covered by the composite indexes in Meta
         verbose_name=_t("Vendor"),
         null=False,
         blank=False
@@ -171,6 +215,7 @@ class Commands(models.Model):
         Platform,
         on_delete=models.SET_NULL,
         related_name="commands",
+        db_index=False, # Covered by the composite indexes in Meta
         verbose_name=_t("Platform"),
         null=True,
         blank=True
@@ -179,6 +224,7 @@ class Commands(models.Model):
         Tag,
         on_delete=models.CASCADE,
         related_name="commands",
+        db_index=False, # Covered by the composite indexes in Meta
         verbose_name=_t("Tag"),
         null=True,
         blank=True
@@ -195,6 +241,7 @@ class Commands(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="commands_created",
+        db_index=False, # Covered by the composite indexes in Meta
         verbose_name="Created By"
     )
     
@@ -210,6 +257,16 @@ class Commands(models.Model):
     def __str__(self) -> str:
         return self.command[:50]
 
+    def save(self, *args, **kwargs):
+        self.version_key = make_version_key(self.version)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'version_key'}
+        #:
+        super().save(*args, **kwargs)
+    #:
+
     def clean(self):
         # Ensure vendor consistency across tag and platform
         if self.tag and self.tag.vendor != self.vendor:
@@ -219,8 +276,28 @@ class Commands(models.Model):
 
     class Meta:
         ordering = ['-date_created']
+        constraints = [
+            # A command is unique per vendor, ignoring case. Backs every
+            # `command__iexact` + `vendor` lookup (serializers, CSV import, existence check)
+            models.UniqueConstraint(Upper('command'), 'vendor', name='commands_command_vendor_ci_unique'),
+        ]
+        # Shaped after the list endpoints: each filters on one FK and pages by
+        # -date_created, so the index hands rows back already in page order.
+        # The iexact joins on vendor/platform/tag names are served by the
+        # UPPER(name) unique constraints on those models.
         indexes = [
-            models.Index(fields=['command']),
+            models.Index(fields=['-date_created', 'id'], name='commands_created_idx'),
+            models.Index(fields=['vendor', '-date_created', 'id'], name='commands_vendor_created_idx'),
+            models.Index(fields=['created_by', '-date_created'], name='commands_owner_created_idx'),
+            models.Index(fields=['platform', '-date_created'], name='commands_platform_created_idx'),
+            models.Index(fields=['tag', '-date_created'], name='commands_tag_created_idx'),
+            # Keyset order of the change feed, overall and per vendor
+            models.Index(fields=['date_updated', 'id'], name='commands_updated_idx'),
+            models.Index(fields=['vendor', 'date_updated', 'id'], name='commands_vendor_updated_idx'),
+            # Version ranges (version_min/version_max), which list the newest versions first,
+            # and the newest version of a command name (latest)
+            models.Index(fields=['-version_key', '-date_created'], name='commands_version_created_idx'),
+            models.Index(Upper('command'), 'version_key', name='commands_command_version_idx'),
         ]
 #:
 
@@ -230,3 +307,313 @@ class CommandParameter(models.Model):
     command = models.ForeignKey(Commands, on_delete=models.CASCADE, related_name="parameters")
     value = models.CharField(max_length=COMMAND_MAX_LENGTH)
 #:
+
+
+# CSV Upload Model
+class CommandUpload(models.Model):
+    """One processed CSV upload, so an identical re-upload can be answered from its stored result."""
+    content_hash = models.CharField(max_length=64, verbose_name=_t("Content SHA-256"))
+    vendor = models.ForeignKey(
+        Vendor,
+        on_delete=models.CASCADE,
+        related_name='uploads',
+        verbose_name=_t("Vendor")
+    )
+    main_tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='uploads',
+        verbose_name=_t("Main Tag"),
+        null=True,
+        blank=True
+    )
+    override = models.BooleanField(default=False, verbose_name=_t("Override Existing"))
+    # Imported again on purpose (`force`) although an identical upload was recorded
+    forced = models.BooleanField(default=False, verbose_name=_t("Forced Re-import"))
+    result = models.JSONField(verbose_name=_t("Result"))
+    date_created = models.DateTimeField(default=timezone.now, verbose_name=_t("Created At"))
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="uploads_created",
+        verbose_name="Created By",
+        null=True,
+        blank=True
+    )
+
+    def __str__(self) -> str:
+        return f"{self.vendor_id}:{self.content_hash[:12]}"
+    #:
+
+    class Meta:
+        ordering = ['-date_created']
+        constraints = [
+            # One unforced record per file and options, so of two identical uploads racing
+            # each other only one gets to import (see importing.record_upload). COALESCE
+            # because NULLs are distinct in unique indexes and most uploads have no main tag.
+            models.UniqueConstraint(
+                'content_hash', 'vendor', Coalesce('main_tag', 0), 'override',
+                condition=models.Q(forced=False),
+                name='upload_unforced_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['vendor', 'content_hash'], name='upload_vendor_hash_idx'),
+        ]
+#:
+
+
+# Import Batch Models
+class ImportBatch(models.Model):
+    """Everything one import wrote, so the whole import can be rolled back at once."""
+
+    STATUS_APPLIED = 'APPLIED'
+    STATUS_ROLLED_BACK = 'ROLLED_BACK'
+    STATUS_CHOICES = [
+        (STATUS_APPLIED, 'Applied'),
+        (STATUS_ROLLED_BACK, 'Rolled Back'),
+    ]
+
+    vendor = models.ForeignKey(
+        Vendor,
+        on_delete=models.CASCADE,
+        related_name='import_batches',
+        verbose_name=_t("Vendor")
+    )
+    upload = models.OneToOneField(
+        CommandUpload,
+        on_delete=models.SET_NULL,
+        related_name='batch',
+        verbose_name=_t("Upload"),
+        null=True,
+        blank=True
+    )
+    # Tags are few per import, their ids are kept inline
+    created_tag_ids = models.JSONField(default=list, verbose_name=_t("Created Tags"))
+    status = models.CharField(
+        max_length=12,
+        choices=STATUS_CHOICES,
+        default=STATUS_APPLIED,
+        verbose_name=_t("Status")
+    )
+    date_created = models.DateTimeField(default=timezone.now, verbose_name=_t("Created At"))
+    date_rolled_back = models.DateTimeField(null=True, blank=True, verbose_name=_t("Rolled Back At"))
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="import_batches_created",
+        verbose_name="Created By",
+        null=True,
+        blank=True
+    )
+
+    def __str__(self) -> str:
+        return f"Import #{self.pk} ({self.status})"
+    #:
+
+    class Meta:
+        ordering = ['-date_created']
+#:
+
+
+class ImportBatchCommand(models.Model):
+    """A command row an import created or changed, with its values from before the change."""
+
+    ACTION_CREATED = 'CREATED'
+    ACTION_UPDATED = 'UPDATED'
+    ACTION_CHOICES = [
+        (ACTION_CREATED, 'Created'),
+        (ACTION_UPDATED, 'Updated'),
+    ]
+
+    batch = models.ForeignKey(ImportBatch, on_delete=models.CASCADE, related_name='items')
+    command = models.ForeignKey(Commands, on_delete=models.CASCADE, related_name='import_items')
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES)
+
+    # Prior values, only filled in for updates
+    prior_command = models.CharField(max_length=COMMAND_MAX_LENGTH, null=True, blank=True)
+    prior_description = models.TextField(max_length=DESCRIPTION_MAX_LENGTH, null=True, blank=True)
+    prior_example = models.TextField(max_length=EXAMPLE_MAX_LENGTH, null=True, blank=True)
+    prior_tag = models.ForeignKey(Tag, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    prior_platform = models.ForeignKey(Platform, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    prior_created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    prior_method = models.CharField(max_length=12, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['batch', 'action'], name='import_item_batch_action_idx'),
+        ]
+#:
+
+
+# Deleted Row Model
+class Tombstone(models.Model):
+    """
+    A deleted catalog row, so the change feed can tell clients to drop it.
+
+    Rows removed as part of a deleted vendor (its platforms, tags, commands)
+    or a deleted tag (its subtags and commands) get no tombstone of their
+    own; the parent's tombstone stands for them.
+    """
+
+    MODEL_VENDOR = 'vendor'
+    MODEL_PLATFORM = 'platform'
+    MODEL_TAG = 'tag'
+    MODEL_COMMAND = 'command'
+    MODEL_CHOICES = [
+        (MODEL_VENDOR, 'Vendor'),
+        (MODEL_PLATFORM, 'Platform'),
+        (MODEL_TAG, 'Tag'),
+        (MODEL_COMMAND, 'Command'),
+    ]
+
+    model_name = models.CharField(max_length=12, choices=MODEL_CHOICES, verbose_name=_t("Model"))
+    object_id = models.BigIntegerField(verbose_name=_t("Object ID"))
+    # Plain ids, the rows they pointed at are gone
+    vendor_id = models.BigIntegerField(verbose_name=_t("Vendor ID"))
+    date_deleted = models.DateTimeField(default=timezone.now, verbose_name=_t("Deleted At"))
+
+    def __str__(self) -> str:
+        return f"{self.model_name}:{self.object_id}"
+    #:
+
+    class Meta:
+        ordering = ['date_deleted', 'id']
+        indexes = [
+            models.Index(fields=['date_deleted', 'id'], name='tombstone_deleted_idx'),
+            models.Index(fields=['vendor_id', 'date_deleted', 'id'], name='tombstone_vendor_deleted_idx'),
+        ]
+#:
+
+
+TOMBSTONE_MODEL_NAMES = {
+    Vendor: Tombstone.MODEL_VENDOR,
+    Platform: Tombstone.MODEL_PLATFORM,
+    Tag: Tombstone.MODEL_TAG,
+    Commands: Tombstone.MODEL_COMMAND,
+}
+
+
+@receiver(pre_delete, sender=Vendor)
+@receiver(pre_delete, sender=Platform)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Commands)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # `origin` is the instance or queryset .delete() was called on
+    origin_model = getattr(origin, 'model', type(origin))
+
+    # Covered by the tombstone of the vendor being deleted
+    if origin_model is Vendor and sender is not Vendor:
+        return
+    #:
+
+    # Covered by the tombstone of the tag being deleted
+    if origin_model is Tag and (sender is Commands or (isinstance(origin, Tag) and origin.pk != instance.pk)):
+        return
+    #:
+
+    Tombstone.objects.create(
+        model_name=TOMBSTONE_MODEL_NAMES[sender],
+        object_id=instance.pk,
+        vendor_id=instance.pk if sender is Vendor else instance.vendor_id
+    )
+#:
+
+
+# Catalog cache invalidation
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Platform)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Commands)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Platform)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Commands)
+def invalidate_catalog_cache(sender, **kwargs):
+    # After commit, so a concurrent reader can't re-cache pre-write rows under the new version
+    transaction.on_commit(bump_catalog_version)
+#:
+
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Platform)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Platform)
+@receiver(post_delete, sender=Tag)
+def invalidate_taxonomy_cache(sender, **kwargs):
+    transaction.on_commit(bump_taxonomy_version)
+#:
+
+
+# Purge Job Model
+class PurgeJob(models.Model):
+    """
+    A vendor or tag (with everything under it) being deleted in the background,
+    chunk by chunk (see commands/purging.py), with its progress so far.
+    """
+
+    TARGET_VENDOR = 'vendor'
+    TARGET_TAG = 'tag'
+    TARGET_CHOICES = [
+        (TARGET_VENDOR, 'Vendor'),
+        (TARGET_TAG, 'Tag'),
+    ]
+
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_DONE = 'DONE'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+
+    target = models.CharField(max_length=8, choices=TARGET_CHOICES, verbose_name=_t("Target"))
+    # Plain ids, the rows are gone once the job is done
+    target_id = models.BigIntegerField(verbose_name=_t("Target ID"))
+    vendor_id = models.BigIntegerField(verbose_name=_t("Vendor ID"))
+    target_name = models.CharField(max_length=NAME_MAX_LENGTH, verbose_name=_t("Target Name"))
+    status = models.CharField(
+        max_length=8,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name=_t("Status")
+    )
+
+    # Progress, counted when the job starts and as chunks are deleted
+    commands_total = models.PositiveIntegerField(default=0, verbose_name=_t("Commands To Delete"))
+    commands_deleted = models.PositiveIntegerField(default=0, verbose_name=_t("Commands Deleted"))
+    tags_deleted = models.PositiveIntegerField(default=0, verbose_name=_t("Tags Deleted"))
+    error = models.TextField(blank=True, default='', verbose_name=_t("Error"))
+
+    date_created = models.DateTimeField(default=timezone.now, verbose_name=_t("Created At"))
+    date_started = models.DateTimeField(null=True, blank=True, verbose_name=_t("Started At"))
+    date_finished = models.DateTimeField(null=True, blank=True, verbose_name=_t("Finished At"))
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="purge_jobs_created",
+        verbose_name="Created By",
+        null=True,
+        blank=True
+    )
+
+    def __str__(self) -> str:
+        return f"Purge {self.target} #{self.target_id} ({self.status})"
+    #:
+
+    class Meta:
+        ordering = ['-date_created']
+        constraints = [
+            # One running purge per target, a second delete request gets the same job
+            models.UniqueConstraint(
+                'target', 'target_id',
+                condition=models.Q(status__in=['PENDING', 'RUNNING']),
+                name='purge_job_active_target_unique'
+            ),
+        ]
+#:
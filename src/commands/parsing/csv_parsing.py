@@ -1,6 +1,6 @@
 import csv
 import re
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Union, Iterable
 import chardet
 import io
 
@@ -88,35 +88,71 @@ class CommandParser:
         return {'name': clean_name, 'parent': None} # Parent will be set during parsing
     #:
     
+    def add_tag(self, tag_name: str, parent_name: Optional[str]) -> None:
+        """Record a tag (once per name and parent)."""
+        # All tags found in the file will have `parent_name` (the main tag) as their parent
+        tag_info = {
+            'name': tag_name,
+            'parent_name_from_input': parent_name, # Renamed for clarity
+            'vendor': self.vendor_name
+        }
+
+        # Add to tags if not already present (checking name and parent_name_from_input)
+        if not any(c['name'] == tag_info['name'] and c['parent_name_from_input'] == tag_info['parent_name_from_input'] for c in self.tags_data):
+            self.tags_data.append(tag_info)
+    #:
+
+    def add_command(self, command: str, description: str, example: str, tag: Optional[str]) -> None:
+        """Record a command row in the shape the import engine expects."""
+        command_info = {
+            'command': command,
+            'description': description if description else None,
+            'example': example if example else None,
+            'tag': tag,
+            'vendor': self.vendor_name,
+            'version': None  
+        }
+
+        self.commands_data.append(command_info)
+    #:
+
     def parse_csv(self, csv_content: str, main_tag_name_from_input: Optional[str] = None) -> Dict: 
         """
         Parse the CSV content (string) and extract structured data.
         All Tags found in the CSV will have 'main_tag_name_from_input' as their conceptual parent.
         """
-        # current_tag will hold the *most recently found* tag name from the CSV
+        # Use io.StringIO to treat the string content as a file
+        csv_file = io.StringIO(csv_content)
+        csv_reader = csv.reader(csv_file)
+
+        return self.parse_rows(csv_reader, main_tag_name_from_input=main_tag_name_from_input)
+    #:
+
+    def parse_rows(self, rows: Iterable[List[str]], main_tag_name_from_input: Optional[str] = None) -> Dict:
+        """
+        Extract structured data from rows laid out like the CSV template
+        (Command, Command, Description, Example). Works for any row source:
+        csv.reader, spreadsheet rows, ...
+        """
+        # current_tag will hold the *most recently found* tag name from the file
         current_tag = None 
         # fixed_main_parent_name will be the main_tag name provided by the user (from the form)
         fixed_main_parent_name = main_tag_name_from_input 
         
         try:
-            # Use io.StringIO to treat the string content as a file
-            csv_file = io.StringIO(csv_content)
-            csv_reader = csv.reader(csv_file)
-            
-            for row_num, row in enumerate(csv_reader, 1):
+            for row_num, row in enumerate(rows, 1):
+                row = list(row)
+
                 # Skip empty rows
                 if not row or all(not cell.strip() for cell in row):
                     continue
                     
-                # Skip the warning row and header row if they appear at the beginning
+                # Skip the warning row if it appears at the beginning
                 if row_num == 1 and 'WARNING!!' in str(row):
                     continue
-                # More robust header check
+                # Skip header rows, wherever they appear
                 if any(header.strip().lower() in ['command', 'description', 'example', 'tag', 'platform', 'version'] for header in row[:4]):
-                    # If the first row is a header, skip it. If second row is header after warning, skip it.
-                    if row_num == 1 or (row_num == 2 and 'WARNING!!' in csv_content):
-                        continue 
-                    continue # Skip if it looks like a header row later in file
+                    continue
                 
                 # Pad row to ensure it has enough elements for indexing
                 while len(row) < 4:
@@ -128,19 +164,9 @@ class CommandParser:
                     tag_name = self.clean_text(tag_name_raw)
                     
                     if tag_name:
-                        # The 'current_tag' is always the one just found in the CSV
+                        # The 'current_tag' is always the one just found in the file
                         current_tag = tag_name 
-                        
-                        # All tags found in the CSV will have `fixed_main_parent_name` as their parent
-                        tag_info = {
-                            'name': current_tag,
-                            'parent_name_from_input': fixed_main_parent_name, # Renamed for clarity
-                            'vendor': self.vendor_name
-                        }
-                        
-                        # Add to tags if not already present (checking name and parent_name_from_input)
-                        if not any(c['name'] == tag_info['name'] and c['parent_name_from_input'] == tag_info['parent_name_from_input'] for c in self.tags_data):
-                            self.tags_data.append(tag_info)
+                        self.add_tag(current_tag, fixed_main_parent_name)
                 
                 # Check if this is a command row
                 elif self.is_command_row(row):
@@ -149,16 +175,8 @@ class CommandParser:
                     example = self.clean_text(row[3])
                     
                     if command:
-                        command_info = {
-                            'command': command,
-                            'description': description if description else None,
-                            'example': example if example else None,
-                            'tag': current_tag, # Assign the current active tag from CSV
-                            'vendor': self.vendor_name,
-                            'version': None  
-                        }
-                        
-                        self.commands_data.append(command_info)
+                        # Assign the current active tag from the file
+                        self.add_command(command, description, example, current_tag)
                         
         except Exception as e:
             print(f"Error parsing CSV: {e}")
@@ -170,6 +188,43 @@ class CommandParser:
         }
     #:
 
+    def parse_records(self, records: Iterable[Dict], main_tag_name_from_input: Optional[str] = None) -> Dict:
+        """
+        Extract structured data from records with 'command', 'description',
+        'example' and 'tag' keys (JSON Lines, YAML, ...). Like a CSV tag row,
+        a record with only a tag applies that tag to the records after it.
+        """
+        current_tag = None
+
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            #:
+
+            tag_name = self.clean_text(str(record.get('tag') or ''))
+            if tag_name:
+                current_tag = tag_name
+                self.add_tag(current_tag, main_tag_name_from_input)
+            #:
+
+            command = self.clean_text(str(record.get('command') or ''))
+            if command:
+                self.add_command(
+                    command,
+                    self.clean_text(str(record.get('description') or '')),
+                    self.clean_text(str(record.get('example') or '')),
+                    current_tag
+                )
+            #:
+        #:
+
+        return {
+            'vendor': self.vendor_name,
+            'tags': self.tags_data,
+            'commands': self.commands_data
+        }
+    #:
+
     def print_summary(self):
         """Print a summary of parsed data"""
         print(f"\n=== PARSING SUMMARY ===")
@@ -210,4 +265,66 @@ def ParseCsv(vendor_name: str, main_tag_name_for_csv_context: Optional[str], csv
     parsed_data = parser.parse_csv(csv_file_content, main_tag_name_from_input=main_tag_name_for_csv_context)
     
     return parsed_data
-#:
\ No newline at end of file
+#:
+
+
+def decode_csv_bytes(raw_file_content: bytes) -> str:
+    """Decode an uploaded CSV using the detected encoding, falling back to UTF-8."""
+    detection_result = chardet.detect(raw_file_content)
+    detected_encoding = detection_result['encoding']
+
+    try:
+        return raw_file_content.decode(detected_encoding)
+    #:
+
+    except (UnicodeDecodeError, TypeError):
+        print(f"Failed to decode with {detected_encoding}. Attempting UTF-8 fallback.")
+        return raw_file_content.decode('utf-8', errors='replace')
+    #:
+#:
+
+
+def ParseCsvUpload(vendor_name: str, main_tag_name_for_csv_context: Optional[str], raw_file_content: bytes) -> Dict:
+    """
+    Decodes and parses one uploaded CSV file.
+
+    Only takes and returns plain data, so it can run in a worker process
+    (the multi-file upload parses its files in a process pool).
+    """
+    return ParseCsv(
+        vendor_name=vendor_name,
+        main_tag_name_for_csv_context=main_tag_name_for_csv_context,
+        csv_file_content=decode_csv_bytes(raw_file_content)
+    )
+#:
+
+
+def MergeParsedFiles(vendor_name: str, parsed_files: List[tuple]) -> Dict:
+    """
+    Merges the results of several parsed files into one, in file name order.
+
+    Tags are de-duplicated case-insensitively (first spelling wins); commands
+    keep their order and remember the file they came from in 'source_file',
+    so a command repeated across files resolves the same way on every upload.
+    """
+    tags, seen_tags, commands = [], set(), []
+
+    for file_name, parsed_data in sorted(parsed_files, key=lambda item: item[0]):
+        for tag_info in parsed_data.get('tags', []):
+            if tag_info['name'].upper() not in seen_tags:
+                seen_tags.add(tag_info['name'].upper())
+                tags.append(tag_info)
+            #:
+        #:
+
+        for command_info in parsed_data.get('commands', []):
+            commands.append({**command_info, 'source_file': file_name})
+        #:
+    #:
+
+    return {
+        'vendor': vendor_name,
+        'tags': tags,
+        'commands': commands
+    }
+#:
@@ -0,0 +1,214 @@
+"""
+
+Import formats for command uploads.
+
+Every format turns an uploaded file into the same parsed data the CSV parser
+produces ({'vendor', 'tags', 'commands'}), so the import engine doesn't care
+where the rows came from. Parsers are registered by name with the file
+extensions they handle; `parse_upload` picks one from the file name, or from
+the content when the name has no extension. An extension no parser handles
+is refused rather than read as CSV.
+
+"""
+
+import io
+import json
+import os
+import zipfile
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from .csv_parsing import CommandParser, ParseCsvUpload
+
+
+class UnsupportedFormatError(ValueError):
+    pass
+#:
+
+
+# format name -> function(vendor_name, main_tag_name, raw bytes) -> parsed data
+PARSERS: Dict[str, Callable] = {}
+# lower-cased extension ('.csv') -> format name
+EXTENSIONS: Dict[str, str] = {}
+
+
+def register_parser(name: str, extensions: Iterable[str] = ()):
+    """Registers the decorated function as the parser for `name`."""
+    def decorator(parse):
+        PARSERS[name] = parse
+        for extension in extensions:
+            EXTENSIONS[extension.lower()] = name
+        #:
+        return parse
+    #:
+    return decorator
+#:
+
+
+def detect_format(file_name: Optional[str], raw: bytes) -> str:
+    """The format of an upload: by extension first, then by sniffing the content."""
+    file_name = (file_name or '').lower()
+
+    for extension, name in EXTENSIONS.items():
+        if file_name.endswith(extension):
+            return name
+        #:
+    #:
+
+    extension = os.path.splitext(file_name)[1]
+    if extension:
+        raise UnsupportedFormatError(
+            f'{extension} files can\'t be imported, use one of {", ".join(sorted(EXTENSIONS))}.'
+        )
+    #:
+
+    # An .xlsx is a zip archive with a workbook part
+    if zipfile.is_zipfile(io.BytesIO(raw)):
+        with zipfile.ZipFile(io.BytesIO(raw)) as archive:
+            if 'xl/workbook.xml' in archive.namelist():
+                return 'xlsx'
+            #:
+        #:
+        raise UnsupportedFormatError(f'{file_name or "The file"} is an archive, not a command file.')
+    #:
+
+    head = raw[:64].lstrip(b'\xef\xbb\xbf \t\r\n')
+    if head.startswith((b'{', b'[')):
+        return 'jsonl'
+    #:
+    if head.startswith(b'---'):
+        return 'yaml'
+    #:
+    return 'csv'
+#:
+
+
+def is_spreadsheet(file_name: Optional[str], raw: bytes) -> bool:
+    """True for .xlsx uploads, which are zip archives that must not be expanded."""
+    try:
+        return detect_format(file_name, raw) == 'xlsx'
+    #:
+
+    except UnsupportedFormatError:
+        return False
+    #:
+#:
+
+
+def parse_upload(vendor_name: str, main_tag_name: Optional[str], file_name: Optional[str], raw: bytes) -> Dict:
+    """
+    Parses one uploaded file in whatever format it is in.
+
+    Only takes and returns plain data, so it can run in a worker process.
+    """
+    format_name = detect_format(file_name, raw)
+    return PARSERS[format_name](vendor_name, main_tag_name, raw)
+#:
+
+
+@register_parser('csv', extensions=('.csv', '.txt'))
+def parse_csv_upload(vendor_name: str, main_tag_name: Optional[str], raw: bytes) -> Dict:
+    return ParseCsvUpload(vendor_name, main_tag_name, raw)
+#:
+
+
+@register_parser('xlsx', extensions=('.xlsx', '.xlsm'))
+def parse_xlsx_upload(vendor_name: str, main_tag_name: Optional[str], raw: bytes) -> Dict:
+    """
+    Same layout as the CSV template, one or more sheets. The workbook is
+    opened read-only, so rows are streamed instead of loading every cell.
+    """
+    try:
+        from openpyxl import load_workbook
+    #:
+
+    except ImportError:
+        raise UnsupportedFormatError('XLSX uploads need openpyxl installed on the server.')
+    #:
+
+    workbook = load_workbook(io.BytesIO(raw), read_only=True, data_only=True)
+
+    try:
+        rows = chain.from_iterable(
+            (['' if cell is None else str(cell) for cell in row] for row in worksheet.iter_rows(values_only=True))
+            for worksheet in workbook.worksheets
+        )
+        return CommandParser(vendor_name=vendor_name).parse_rows(rows, main_tag_name_from_input=main_tag_name)
+    #:
+
+    finally:
+        workbook.close()
+    #:
+#:
+
+
+def iter_json_records(text: str) -> Iterator[Dict]:
+    """One record per line; a single JSON array of records is accepted too."""
+    if text.lstrip().startswith('['):
+        try:
+            records = json.loads(text)
+        #:
+
+        except json.JSONDecodeError as e:
+            raise UnsupportedFormatError(f'Invalid JSON: {e.msg}')
+        #:
+        yield from records
+        return
+    #:
+
+    for line_num, line in enumerate(io.StringIO(text), 1):
+        if not line.strip():
+            continue
+        #:
+
+        try:
+            yield json.loads(line)
+        #:
+
+        except json.JSONDecodeError as e:
+            raise UnsupportedFormatError(f'Invalid JSON on line {line_num}: {e.msg}')
+        #:
+    #:
+#:
+
+
+@register_parser('jsonl', extensions=('.jsonl', '.ndjson', '.json'))
+def parse_jsonl_upload(vendor_name: str, main_tag_name: Optional[str], raw: bytes) -> Dict:
+    text = raw.decode('utf-8-sig', errors='replace')
+    return CommandParser(vendor_name=vendor_name).parse_records(
+        iter_json_records(text), main_tag_name_from_input=main_tag_name
+    )
+#:
+
+
+def iter_yaml_records(text: str) -> Iterator[Dict]:
+    """Documents are loaded one at a time; each is a record or a list of records."""
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+    try:
+        for document in yaml.load_all(text, Loader=loader):
+            if isinstance(document, list):
+                yield from document
+            #:
+
+            elif document is not None:
+                yield document
+            #:
+        #:
+    #:
+
+    except yaml.YAMLError as e:
+        raise UnsupportedFormatError(f'Invalid YAML: {e}')
+    #:
+#:
+
+
+@register_parser('yaml', extensions=('.yaml', '.yml'))
+def parse_yaml_upload(vendor_name: str, main_tag_name: Optional[str], raw: bytes) -> Dict:
+    text = raw.decode('utf-8-sig', errors='replace')
+    return CommandParser(vendor_name=vendor_name).parse_records(
+        iter_yaml_records(text), main_tag_name_from_input=main_tag_name
+    )
+#:
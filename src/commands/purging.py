@@ -0,0 +1,249 @@
+"""
+
+Background purges of whole vendors and tag subtrees.
+
+Model.delete() hands the row to the deletion collector, which loads every
+cascaded command, tag and platform into memory (sending their signals)
+before the first DELETE runs, all inside one transaction that keeps those
+rows locked until it ends. For a vendor with hundreds of thousands of
+commands that is both slow and unbounded.
+
+A purge deletes the commands first, by chunks of ids, each chunk in its own
+short transaction. Only then is the vendor or tag itself deleted through the
+ORM: with the commands gone the collector has little left to load.
+
+The tombstone that stands for the whole subtree (see Tombstone) is written
+before the first chunk, so sync clients drop the commands as soon as they
+start disappearing rather than once the whole purge is over. The final
+delete keeps it the only one: the copy the tombstone receiver writes is
+dropped, and the early one is moved up to that time so it also covers
+anything added to the vendor or tag while the purge ran.
+
+Purges are PurgeJob rows. A background thread in the web process picks them
+up as soon as they are committed (COMMAND_PURGE_IN_PROCESS), and
+`manage.py purge` runs whatever is left over, e.g. after a restart.
+
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .bulk import raw_delete
+from .cache import bump_catalog_version
+from .models import Vendor, Tag, Commands, CommandParameter, ImportBatchCommand, PurgeJob, Tombstone
+from .tagtree import tag_subtree
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_purge(instance, user=None) -> tuple[PurgeJob, bool]:
+    """Queue a purge of a Vendor or Tag; returns (job, created), the running job if there is one already."""
+    if isinstance(instance, Vendor):
+        target, vendor_id = PurgeJob.TARGET_VENDOR, instance.pk
+    else:
+        target, vendor_id = PurgeJob.TARGET_TAG, instance.vendor_id
+    #:
+
+    active = PurgeJob.objects.filter(target=target, target_id=instance.pk, status__in=PurgeJob.ACTIVE_STATUSES)
+
+    try:
+        with transaction.atomic():
+            job = PurgeJob.objects.create(
+                target=target,
+                target_id=instance.pk,
+                vendor_id=vendor_id,
+                target_name=str(instance)[:PurgeJob._meta.get_field('target_name').max_length],
+                created_by=user
+            )
+
+            if settings.COMMAND_PURGE_IN_PROCESS:
+                transaction.on_commit(purge_worker.wake)
+            #:
+        #:
+    #:
+
+    except IntegrityError: # purge_job_active_target_unique
+        return active.get(), False
+    #:
+    return job, True
+#:
+
+
+def target_commands(job: PurgeJob):
+    """Every command the job has to delete."""
+    if job.target == PurgeJob.TARGET_VENDOR:
+        return Commands.objects.filter(vendor_id=job.target_id)
+    #:
+    return Commands.objects.filter(tag_id__in=tag_subtree([job.target_id]))
+#:
+
+
+def record_target_tombstone(job: PurgeJob) -> Tombstone:
+    """The tombstone of the vendor or tag, written once (a resumed job finds the one it wrote before)."""
+    model_name = Tombstone.MODEL_VENDOR if job.target == PurgeJob.TARGET_VENDOR else Tombstone.MODEL_TAG
+    tombstone = Tombstone.objects.filter(model_name=model_name, object_id=job.target_id).order_by('pk').first()
+
+    if tombstone is None:
+        tombstone = Tombstone.objects.create(model_name=model_name, object_id=job.target_id, vendor_id=job.vendor_id)
+    #:
+    return tombstone
+#:
+
+
+def purge_commands(job: PurgeJob, chunk_size: int) -> int:
+    """Deletes the job's commands `chunk_size` at a time, one short transaction per chunk."""
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(target_commands(job).order_by().values_list('pk', flat=True)[:chunk_size])
+
+            if not ids:
+                return total
+            #:
+
+            # No tombstones: the vendor's or tag's own tombstone covers them
+            CommandParameter.objects.filter(command_id__in=ids).delete()
+            ImportBatchCommand.objects.filter(command_id__in=ids).delete()
+            deleted = raw_delete(Commands.objects.filter(pk__in=ids))
+
+            PurgeJob.objects.filter(pk=job.pk).update(commands_deleted=F('commands_deleted') + deleted)
+            transaction.on_commit(bump_catalog_version)
+        #:
+        total += deleted
+    #:
+#:
+
+
+def purge_target(job: PurgeJob, tombstone: Tombstone) -> int:
+    """Deletes the vendor or tag itself (and what little now hangs off it); returns the tags deleted."""
+    model = Vendor if job.target == PurgeJob.TARGET_VENDOR else Tag
+
+    with transaction.atomic():
+        instance = model.objects.filter(pk=job.target_id).first()
+
+        if instance is None: # Deleted some other way in the meantime
+            return 0
+        #:
+
+        _, counts = instance.delete()
+
+        # The receiver wrote a second tombstone, `tombstone` stays the only one
+        Tombstone.objects.filter(model_name=tombstone.model_name, object_id=tombstone.object_id).exclude(pk=tombstone.pk).delete()
+        Tombstone.objects.filter(pk=tombstone.pk).update(date_deleted=timezone.now())
+    #:
+    return counts.get(Tag._meta.label, 0)
+#:
+
+
+def run_purge(job: PurgeJob) -> PurgeJob:
+    """Runs a claimed (RUNNING) job to the end. Safe to run again on a job that was cut short."""
+    try:
+        # A resumed job already has some of its commands deleted
+        job.commands_total = job.commands_deleted + target_commands(job).count()
+        job.save(update_fields=['commands_total'])
+
+        tombstone = record_target_tombstone(job)
+        purge_commands(job, settings.COMMAND_PURGE_CHUNK_SIZE)
+        job.tags_deleted = purge_target(job, tombstone)
+        job.status = PurgeJob.STATUS_DONE
+    #:
+
+    except Exception as e:
+        logger.exception("Purge job %s failed", job.pk)
+        job.status = PurgeJob.STATUS_FAILED
+        job.error = str(e)
+    #:
+
+    job.date_finished = timezone.now()
+    # commands_deleted is only ever moved with F() by purge_commands
+    job.save(update_fields=['status', 'tags_deleted', 'error', 'date_finished'])
+    job.refresh_from_db(fields=['commands_deleted'])
+    return job
+#:
+
+
+def claim_job(job_id: int, statuses) -> bool:
+    """Marks the job RUNNING if it is still in one of `statuses`; False when another worker got it first."""
+    claimed = PurgeJob.objects.filter(pk=job_id, status__in=statuses).update(
+        status=PurgeJob.STATUS_RUNNING,
+        date_started=timezone.now()
+    )
+    return claimed == 1
+#:
+
+
+def run_pending_jobs(resume: bool = False) -> list:
+    """
+    Runs every PENDING job, oldest first. With `resume`, RUNNING jobs are taken
+    over too (their worker died); only use it when no other worker is running.
+    """
+    statuses = PurgeJob.ACTIVE_STATUSES if resume else [PurgeJob.STATUS_PENDING]
+    finished = []
+
+    for job_id in PurgeJob.objects.filter(status__in=statuses).order_by('date_created').values_list('pk', flat=True):
+        if claim_job(job_id, statuses):
+            finished.append(run_purge(PurgeJob.objects.get(pk=job_id)))
+        #:
+    #:
+    return finished
+#:
+
+
+class PurgeWorker:
+    """One background thread per process, started on demand, that runs pending jobs until there are none."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wanted = False
+    #:
+
+    def wake(self) -> None:
+        with self._lock:
+            # Picked up by the running thread's next pass, if there is one
+            self._wanted = True
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='purge-worker', daemon=True)
+                self._thread.start()
+            #:
+        #:
+    #:
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    if not self._wanted:
+                        self._thread = None
+                        return
+                    #:
+                    self._wanted = False
+                #:
+
+                try:
+                    run_pending_jobs()
+                #:
+
+                except Exception:
+                    logger.exception("Purge worker error")
+                #:
+            #:
+        #:
+
+        finally:
+            # This thread's own connections
+            connections.close_all()
+        #:
+    #:
+#:
+
+
+purge_worker = PurgeWorker()
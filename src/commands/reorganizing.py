@@ -0,0 +1,175 @@
+"""
+
+Moving and merging whole tag branches.
+
+Re-parenting a branch or folding one tag into another used to mean editing
+tags and commands one by one. Here the vendor's tags are read once (and
+locked, so two reorganizations can't interleave), the whole plan is worked
+out in Python, and it is written with a fixed number of set-based UPDATEs
+(CASE ... WHEN for the per-row values) in one transaction, however big the
+branch is.
+
+Tag names are unique per (vendor, parent), ignoring case. A merge keeps them
+that way by merging a child of the source into the target's child of the
+same name, all the way down, rather than putting both side by side.
+
+"""
+
+from django.db import transaction
+from django.db.models import Case, When, Value, F, BigIntegerField
+from django.db.models.functions import Now
+
+from .bulk import raw_delete
+from .cache import bump_catalog_version, bump_taxonomy_version
+from .changes import record_tombstones
+from .models import Tag, Commands, CommandUpload, ImportBatchCommand, Tombstone
+
+
+class TagTreeError(Exception):
+    pass
+#:
+
+
+class TagNameConflict(TagTreeError):
+    pass
+#:
+
+
+def lock_vendor_tags(vendor_id) -> dict:
+    """{id: (UPPER(name), parent_id)} for every tag of the vendor, locked until the transaction ends."""
+    rows = Tag.objects.select_for_update().filter(vendor_id=vendor_id).order_by().values_list('id', 'name', 'parent_id')
+    return {pk: (name.upper(), parent_id) for pk, name, parent_id in rows}
+#:
+
+
+def is_descendant(tags: dict, tag_id, ancestor_id) -> bool:
+    """True when `tag_id` is `ancestor_id` or somewhere below it."""
+    seen = set()
+
+    while tag_id is not None and tag_id not in seen:
+        if tag_id == ancestor_id:
+            return True
+        #:
+        seen.add(tag_id)
+        tag_id = tags[tag_id][1] if tag_id in tags else None
+    #:
+    return False
+#:
+
+
+def remap(field: str, mapping: dict) -> Case:
+    """CASE field WHEN old THEN new ... END, leaving unmapped rows as they are."""
+    return Case(
+        *[When(**{field: old}, then=Value(new)) for old, new in mapping.items()],
+        default=F(field),
+        output_field=BigIntegerField()
+    )
+#:
+
+
+def move_tag(tag: Tag, parent: Tag = None, merge: bool = False) -> dict:
+    """
+    Re-parents `tag` (with everything under it) under `parent`, or makes it a
+    root tag. When `parent` already has a tag of the same name, `merge` folds
+    `tag` into it instead of failing. `tag_id` in the result is where the
+    branch ended up.
+    """
+    with transaction.atomic():
+        tags = lock_vendor_tags(tag.vendor_id)
+        parent_id = parent.pk if parent else None
+
+        if parent is not None:
+            if parent.vendor_id != tag.vendor_id:
+                raise TagTreeError('The new parent belongs to another vendor.')
+            #:
+
+            if is_descendant(tags, parent_id, tag.pk):
+                raise TagTreeError('A tag cannot be moved under itself or one of its subtags.')
+            #:
+        #:
+
+        name_key = tags[tag.pk][0]
+        sibling = next(
+            (pk for pk, (key, parent_of) in tags.items() if parent_of == parent_id and key == name_key and pk != tag.pk),
+            None
+        )
+
+        if sibling is not None:
+            if not merge:
+                raise TagNameConflict('The new parent already has a tag with this name, merge them instead.')
+            #:
+            return merge_tags(tag, Tag.objects.get(pk=sibling))
+        #:
+
+        moved = Tag.objects.filter(pk=tag.pk).update(parent_id=parent_id, date_updated=Now())
+
+        # Paths under the branch changed, so did the tag shown on its commands
+        transaction.on_commit(bump_taxonomy_version)
+        transaction.on_commit(bump_catalog_version)
+    #:
+    return {'tag_id': tag.pk, 'tags_moved': moved, 'tags_merged': 0, 'commands_repointed': 0}
+#:
+
+
+def merge_tags(source: Tag, target: Tag) -> dict:
+    """
+    Folds `source` into `target`: its commands move to `target`, its subtags
+    become subtags of `target` (same-name ones are merged in turn) and the
+    merged tags are deleted.
+    """
+    with transaction.atomic():
+        if source.vendor_id != target.vendor_id:
+            raise TagTreeError('Tags of different vendors cannot be merged.')
+        #:
+
+        tags = lock_vendor_tags(source.vendor_id)
+
+        if is_descendant(tags, target.pk, source.pk):
+            raise TagTreeError('A tag cannot be merged into itself or one of its subtags.')
+        #:
+
+        children = {}
+        for pk, (_, parent_id) in tags.items():
+            children.setdefault(parent_id, []).append(pk)
+        #:
+
+        # merged: source tag -> the tag that takes its place; reparented: the
+        # subtags that move over as they are, each to where its parent merged
+        merged, reparented = {}, set()
+        pending = [(source.pk, target.pk)]
+
+        while pending:
+            source_id, target_id = pending.pop()
+            merged[source_id] = target_id
+            target_children = {tags[child][0]: child for child in children.get(target_id, [])}
+
+            for child in children.get(source_id, []):
+                match = target_children.get(tags[child][0])
+
+                if match is None:
+                    reparented.add(child)
+                else:
+                    pending.append((child, match))
+                #:
+            #:
+        #:
+
+        commands = Commands.objects.filter(tag_id__in=merged).update(tag_id=remap('tag_id', merged), date_updated=Now())
+
+        if reparented:
+            Tag.objects.filter(pk__in=reparented).update(parent_id=remap('parent_id', merged), date_updated=Now())
+        #:
+
+        # Would otherwise cascade or be nulled by the delete below
+        CommandUpload.objects.filter(main_tag_id__in=merged).update(main_tag_id=remap('main_tag_id', merged))
+        ImportBatchCommand.objects.filter(prior_tag_id__in=merged).update(prior_tag_id=remap('prior_tag_id', merged))
+
+        # Nothing references the merged tags any more; one DELETE, no collector
+        record_tombstones(Tag.objects.filter(pk__in=merged), Tombstone.MODEL_TAG)
+        raw_delete(Tag.objects.filter(pk__in=merged))
+
+        transaction.on_commit(bump_taxonomy_version)
+        transaction.on_commit(bump_catalog_version)
+    #:
+    return {'tag_id': target.pk, 'tags_moved': len(reparented), 'tags_merged': len(merged), 'commands_repointed': commands}
+#:
@@ -0,0 +1,75 @@
+"""
+
+Name -> id resolution for the command filters.
+
+Filtering commands by `vendor__name`, `platform__name` or `tag__name` used to
+join the name tables and compare case-insensitively on every query. The
+resolvers below turn a name into the matching ids once, keep the answer in
+process memory, and drop everything when the (shared) taxonomy version changes
+(any Vendor/Platform/Tag write, see models.py). The commands query then only
+needs a plain FK filter.
+
+Only names that matched something are remembered, and for no longer than
+COMMAND_RESOLVER_TTL seconds, as a bound on staleness should a version bump
+ever be missed. A name with no match is looked up again every time, so a
+name created in the meantime is never hidden behind a cached miss.
+
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from .cache import get_taxonomy_version
+from .models import Vendor, Platform, Tag
+
+
+# Cap on how many names one resolver remembers
+RESOLVER_MAX_NAMES = 10000
+
+
+class NameResolver:
+
+    def __init__(self, model):
+        self.model = model
+        self._ids = {}
+        self._version = None
+        self._lock = threading.Lock()
+    #:
+
+    def resolve(self, name: str) -> tuple:
+        """Ids of every row whose name matches `name` case-insensitively (may be empty)."""
+        version = get_taxonomy_version()
+        key = name.upper()
+
+        with self._lock:
+            if version != self._version or len(self._ids) >= RESOLVER_MAX_NAMES:
+                self._ids = {}
+                self._version = version
+            #:
+
+            cached = self._ids.get(key)
+        #:
+
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        #:
+
+        ids = tuple(self.model.objects.filter(name__iexact=name).values_list('id', flat=True))
+
+        if ids:
+            with self._lock:
+                if self._version == version:
+                    self._ids[key] = (ids, time.monotonic() + settings.COMMAND_RESOLVER_TTL)
+                #:
+            #:
+        #:
+        return ids
+    #:
+#:
+
+
+vendor_resolver = NameResolver(Vendor)
+platform_resolver = NameResolver(Platform)
+tag_resolver = NameResolver(Tag)
@@ -0,0 +1,201 @@
+"""
+
+Per-row cache of serialized commands for the list endpoints.
+
+A command's serialized dict only changes when the row does (its
+date_updated moves) or when a vendor/platform/tag name it shows changes
+(the taxonomy version moves, see cache.py). So the list views page through
+(id, date_updated) pairs only, take the rows they already have from this
+cache and serialize just the missing ones.
+
+The cache lives in process memory, is LRU-evicted down to
+COMMAND_ROW_CACHE_MAX_BYTES and is cleared whenever the taxonomy version
+(shared by every process) changes. Writes that change a command without
+moving its date_updated (queryset.update, FK SET_NULL) must bump the
+taxonomy version instead. Rows are also served for no longer than
+COMMAND_ROW_CACHE_TTL seconds, which bounds how stale a row can get should
+a write slip past both.
+
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.response import Response
+
+from .cache import get_taxonomy_version
+
+
+def row_size(row: dict) -> int:
+    """Rough bytes held by a serialized row (the dict plus its keys and values)."""
+    return sys.getsizeof(row) + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in row.items())
+#:
+
+
+class SerializedRowCache:
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._rows = OrderedDict() # (serializer name, id, date_updated) -> (row, size, time stored)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    #:
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._bytes = 0
+        #:
+    #:
+
+    def _store(self, key: tuple, row: dict) -> None:
+        # Caller holds the lock
+        size = row_size(row)
+        if size > self.max_bytes:
+            return
+        #:
+
+        previous = self._rows.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        #:
+
+        self._rows[key] = (row, size, time.monotonic())
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._rows.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+        #:
+    #:
+
+    def get_many(self, serializer_class, keys: list, hydrate) -> list:
+        """
+        Serialized rows for `keys` ([(id, date_updated)], in output order).
+        `hydrate(ids)` serializes the missing ones, returning [((id, date_updated), row)].
+        Rows deleted since the keys were read are left out.
+        """
+        version = get_taxonomy_version()
+        name = serializer_class.__name__
+        found = {}
+
+        with self._lock:
+            if version != self._version:
+                self._rows.clear()
+                self._bytes = 0
+                self._version = version
+            #:
+
+            oldest = time.monotonic() - settings.COMMAND_ROW_CACHE_TTL
+
+            for pk, date_updated in keys:
+                key = (name, pk, date_updated)
+                cached = self._rows.get(key)
+
+                if cached is None:
+                    continue
+                #:
+
+                if cached[2] <= oldest: # Expired, serialized again below
+                    del self._rows[key]
+                    self._bytes -= cached[1]
+                    continue
+                #:
+
+                self._rows.move_to_end(key)
+                found[pk] = cached[0]
+            #:
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        #:
+
+        missing = [pk for pk, _ in keys if pk not in found]
+
+        if missing:
+            hydrated = hydrate(missing)
+
+            with self._lock:
+                for (pk, date_updated), row in hydrated:
+                    found[pk] = row
+
+                    # Stored under the row's own timestamp, it may have moved since the keys were read
+                    if self._version == version:
+                        self._store((name, pk, date_updated), row)
+                    #:
+                #:
+            #:
+        #:
+        return [found[pk] for pk, _ in keys if pk in found]
+    #:
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._rows),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+        #:
+    #:
+#:
+
+
+row_cache = SerializedRowCache(settings.COMMAND_ROW_CACHE_MAX_BYTES)
+
+
+class CachedRowListMixin:
+    """
+    list() for command ListAPIViews: the filtered, paginated query selects
+    only (id, date_updated); full rows are loaded and serialized only for
+    the ids missing from row_cache.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        keys = queryset.values_list('pk', 'date_updated')
+
+        page = self.paginate_queryset(keys)
+        rows = row_cache.get_many(
+            self.get_serializer_class(),
+            list(page) if page is not None else list(keys),
+            self.hydrate_rows
+        )
+
+        if page is not None:
+            return self.get_paginated_response(rows)
+        #:
+        return Response(rows)
+    #:
+
+    def hydrate_rows(self, ids: list) -> list:
+        queryset = self.get_queryset().filter(pk__in=ids).order_by()
+
+        # Views with a values serializer (values.py) skip building instances altogether
+        values_serializer_class = self.get_values_serializer_class()
+        if values_serializer_class is not None:
+            return values_serializer_class().keyed_rows(queryset)
+        #:
+
+        instances = list(queryset)
+        rows = self.get_serializer(instances, many=True).data
+        return [((instance.pk, instance.date_updated), row) for instance, row in zip(instances, rows)]
+    #:
+
+    def get_values_serializer_class(self):
+        return getattr(self, 'values_serializer_class', None)
+    #:
+#:
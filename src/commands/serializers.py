@@ -3,7 +3,12 @@ from rest_framework.serializers import ModelSerializer, StringRelatedField, Seri
 
 from rest_framework import serializers
 
-from .models import Vendor, Platform, Tag, Commands
+from .models import Vendor, Platform, Tag, Commands, CommandParameter, ImportBatch, PurgeJob, COMMAND_MAX_LENGTH
+
+# Upper bound on how many names one batch existence check may carry
+COMMAND_EXISTS_BATCH_MAX = 10000
+# Upper bound on how many commands one bulk parameter replace may carry
+COMMAND_PARAMETERS_BATCH_MAX = 1000
 
 
 # Vendor Model Serializers
@@ -109,7 +114,7 @@ class TagTreeSerializer(ModelSerializer):
 class CommandFullSerializer(ModelSerializer):
     class Meta:
         model = Commands
-        fields = '__all__'
+        exclude = ['version_key'] # Internal, derived from version (see versions.py)
         read_only_fields = ['created_by']
 
     def validate(self, data):
@@ -137,6 +142,74 @@ class CommandBasicSerializer(ModelSerializer):
         fields = ['id', 'command', 'description', 'example', 'version', 'vendor', 'platform', 'tag', 'method']
 #:
 
+# Parameter Model Serializers
+class CommandParameterSerializer(ModelSerializer):
+    class Meta:
+        model = CommandParameter
+        fields = ['id', 'value']
+#:
+
+# ?include=parameters variants; the views prefetch `parameters` for them
+class CommandFullParametersSerializer(CommandFullSerializer):
+    parameters = CommandParameterSerializer(many=True, read_only=True)
+#:
+
+class CommandBasicParametersSerializer(CommandBasicSerializer):
+    parameters = CommandParameterSerializer(many=True, read_only=True)
+
+    class Meta(CommandBasicSerializer.Meta):
+        fields = CommandBasicSerializer.Meta.fields + ['parameters']
+#:
+
+class CommandParameterSetSerializer(Serializer):
+    command_id = serializers.IntegerField()
+    # The command's new parameters, in order; empty clears them
+    parameters = serializers.ListField(
+        child=serializers.CharField(max_length=COMMAND_MAX_LENGTH, trim_whitespace=False),
+        allow_empty=True
+    )
+#:
+
+class CommandParametersBulkSerializer(Serializer):
+    commands = CommandParameterSetSerializer(many=True, allow_empty=False, max_length=COMMAND_PARAMETERS_BATCH_MAX)
+
+    def validate_commands(self, value):
+        command_ids = [item['command_id'] for item in value]
+
+        if len(set(command_ids)) != len(command_ids):
+            raise serializers.ValidationError("Each command may only appear once.")
+        #:
+
+        existing = set(Commands.objects.filter(pk__in=command_ids).values_list('pk', flat=True))
+        missing = [command_id for command_id in command_ids if command_id not in existing]
+
+        if missing:
+            raise serializers.ValidationError(f"Unknown command ids: {missing}")
+        #:
+        return value
+    #:
+#:
+
+class CommandExistsBatchSerializer(Serializer):
+    vendor_id = serializers.IntegerField()
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=COMMAND_MAX_LENGTH, trim_whitespace=False),
+        allow_empty=False,
+        max_length=COMMAND_EXISTS_BATCH_MAX
+    )
+#:
+
+class TagMoveSerializer(Serializer):
+    # Null makes the tag a root tag
+    parent = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(), allow_null=True)
+    # Merge into a same-name tag under the new parent instead of failing
+    merge = serializers.BooleanField(default=False, required=False)
+#:
+
+class TagMergeSerializer(Serializer):
+    target = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all())
+#:
+
 class CSVUploadSerializer(serializers.Serializer):
     csv_file = serializers.FileField()
     vendor = serializers.PrimaryKeyRelatedField(queryset=Vendor.objects.all())
@@ -146,6 +219,8 @@ class CSVUploadSerializer(serializers.Serializer):
         allow_null=True # Allow null for optional tag
     )
     override = serializers.BooleanField(default=False, required=False)
+    # Re-import even when the exact same file was already imported with the same options
+    force = serializers.BooleanField(default=False, required=False)
 
     def validate(self, data):
         print(data)
@@ -161,3 +236,30 @@ class CSVUploadSerializer(serializers.Serializer):
         return data
     #:
 #:
+
+
+class MultiFileUploadSerializer(CSVUploadSerializer):
+    csv_file = None
+    # Several command files (CSV, XLSX, JSON Lines, YAML) and/or zip archives of them
+    files = serializers.ListField(child=serializers.FileField(), allow_empty=False)
+#:
+
+# Import Batch Serializers
+class ImportBatchSerializer(ModelSerializer):
+    class Meta:
+        model = ImportBatch
+        fields = ['id', 'vendor', 'upload', 'status', 'date_created', 'date_rolled_back', 'created_by']
+        read_only_fields = fields
+#:
+
+
+class PurgeJobSerializer(ModelSerializer):
+    class Meta:
+        model = PurgeJob
+        fields = [
+            'id', 'target', 'target_id', 'vendor_id', 'target_name', 'status',
+            'commands_total', 'commands_deleted', 'tags_deleted', 'error',
+            'date_created', 'date_started', 'date_finished', 'created_by'
+        ]
+        read_only_fields = fields
+#:
@@ -0,0 +1,59 @@
+"""
+
+Tag subtree lookups in SQL.
+
+Tags nest through `parent`, so "this tag and everything under it" is a
+recursive walk. Instead of following the parents in Python, one query at a
+time, the walk runs in the database as a recursive CTE. The result is a
+RawSQL that goes straight into an `__in` lookup:
+
+    Commands.objects.filter(tag_id__in=tag_subtree([tag.pk]))
+
+As a subquery the planner has to guess how many tags the walk returns, and
+on a list page it tends to guess high and read the whole commands table in
+date order instead. tag_subtree_ids() runs the walk first, so the filter is
+a plain list of ids the planner can count.
+
+Works on PostgreSQL and SQLite alike.
+
+"""
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Tag
+
+
+def tag_subtree(root_ids) -> RawSQL:
+    """The ids of the tags in `root_ids` and of all their descendants, as a subquery."""
+    root_ids = list(root_ids)
+
+    if not root_ids:
+        # IN () is not valid SQL, an empty root set selects nothing
+        return RawSQL('SELECT NULL WHERE 1 = 0', [])
+    #:
+
+    table = Tag._meta.db_table
+    placeholders = ', '.join(['%s'] * len(root_ids))
+
+    # UNION (not UNION ALL) drops repeated rows, so a cycle can't recurse forever
+    return RawSQL(
+        f'WITH RECURSIVE subtree(id) AS ('
+        f'SELECT id FROM {table} WHERE id IN ({placeholders}) '
+        f'UNION '
+        f'SELECT child.id FROM {table} child JOIN subtree ON child.parent_id = subtree.id'
+        f') SELECT id FROM subtree',
+        root_ids
+    )
+#:
+
+
+def tag_subtree_ids(root_ids) -> list:
+    """The ids of the tags in `root_ids` and of all their descendants, as a list."""
+    subtree = tag_subtree(root_ids)
+
+    with connection.cursor() as cursor:
+        cursor.execute(subtree.sql, subtree.params)
+        return [row[0] for row in cursor.fetchall() if row[0] is not None]
+    #:
+#:
@@ -1,3 +1,1388 @@
-from django.test import TestCase
+import io
+import uuid
+import zipfile
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.encoders import JSONEncoder
+
+from common.renderers import ORJSONRenderer, to_columnar
+
+from account.models import CustomUser
+from .admin import EstimatedCountPaginator
+from .management.commands.check_list_indexes import Command as CheckListIndexes
+from .changes import collect_changes, encode_cursor, SECTIONS
+from .events import ChangeBroadcaster, Subscription, changes_to_events, stream_events, broadcaster, RESYNC
+from .cache import CATALOG_VERSION_KEY, get_catalog_version, bump_catalog_version
+from .facets import command_facets
+from .importing import CommandImporter, rollback_import_batch, RollbackError
+from .models import Vendor, Platform, Tag, Commands, CommandParameter, CommandUpload, ImportBatch, PurgeJob, Tombstone
+from .purging import enqueue_purge, run_pending_jobs
+from .resolvers import vendor_resolver
+from .parsing.registry import detect_format, UnsupportedFormatError
+from .uploads import parse_upload_files
+from .reorganizing import move_tag, merge_tags, TagTreeError, TagNameConflict
+from .versions import version_key
+from .serializers import (
+    VendorBasicSerializer, PlatformBasicSerializer, TagBasicSerializer, CommandBasicSerializer,
+    CommandBasicParametersSerializer, CommandFullSerializer, VendorFullSerializer, PlatformFullSerializer,
+    TagFullSerializer
+)
+from .values import (
+    TagPathMap,
+    VendorBasicValuesSerializer, PlatformBasicValuesSerializer, TagBasicValuesSerializer,
+    CommandBasicValuesSerializer, CommandBasicParametersValuesSerializer
+)
+
+
+class ValuesSerializerParityTests(TestCase):
+    """The values-based list serializers must emit exactly what the ModelSerializers do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(email='parity@example.com', password='Parity-Pass-1234')
+
+        cisco = Vendor.objects.create(name='Cisco', created_by=user)
+        juniper = Vendor.objects.create(name='Juniper', created_by=user)
+        platform = Platform.objects.create(name='Catalyst 9300', vendor=cisco, created_by=user)
+        Platform.objects.create(name='MX', vendor=juniper, created_by=user)
+
+        routing = Tag.objects.create(name='Routing', vendor=cisco, created_by=user)
+        ospf = Tag.objects.create(name='OSPF', vendor=cisco, parent=routing, created_by=user)
+        area = Tag.objects.create(name='Areas', vendor=cisco, parent=ospf, created_by=user)
+
+        Commands.objects.create(
+            command='show ip route', description='Routing table', example='show ip route 10.0.0.0',
+            version='15.2.3', vendor=cisco, platform=platform, tag=routing, created_by=user
+        )
+        Commands.objects.create(command='show ip ospf', vendor=cisco, tag=area, created_by=user, method='BULK')
+        Commands.objects.create(command='show version', description='', vendor=cisco, created_by=user)
+        Commands.objects.create(command='show route', vendor=juniper, created_by=user)
+    #:
+
+    def assertParity(self, serializer_class, values_serializer_class, queryset):
+        expected = [dict(row) for row in serializer_class(queryset, many=True).data]
+        serializer = values_serializer_class()
+        self.assertEqual(serializer.to_rows(serializer.values(queryset)), expected)
+    #:
+
+    def test_vendor_parity(self):
+        self.assertParity(VendorBasicSerializer, VendorBasicValuesSerializer, Vendor.objects.all())
+    #:
+
+    def test_platform_parity(self):
+        self.assertParity(PlatformBasicSerializer, PlatformBasicValuesSerializer, Platform.objects.all())
+    #:
+
+    def test_tag_parity(self):
+        self.assertParity(TagBasicSerializer, TagBasicValuesSerializer, Tag.objects.all())
+    #:
+
+    def test_command_parity(self):
+        queryset = Commands.objects.select_related('vendor', 'platform', 'tag')
+        self.assertParity(CommandBasicSerializer, CommandBasicValuesSerializer, queryset)
+    #:
+
+    def test_command_parity_after_tag_rename(self):
+        # The tag path map must not serve the old path
+        queryset = Commands.objects.select_related('vendor', 'platform', 'tag')
+        CommandBasicValuesSerializer().to_rows(CommandBasicValuesSerializer().values(queryset))
+
+        # The taxonomy version is bumped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            routing = Tag.objects.get(name='Routing')
+            routing.name = 'L3 Routing'
+            routing.save()
+        #:
+
+        self.assertParity(CommandBasicSerializer, CommandBasicValuesSerializer, queryset)
+    #:
+
+    @override_settings(COMMAND_ROW_CACHE_TTL=0)
+    def test_command_list_expired_rows(self):
+        client = APIClient()
+        client.get('/commands/get-all/', {'page_size': 100})
+
+        # update() moves neither date_updated nor any cache version
+        Commands.objects.filter(command='show version').update(description='Updated')
+        rows = client.get('/commands/get-all/', {'page_size': 100}).json()['results']
+
+        self.assertEqual(next(row['description'] for row in rows if row['command'] == 'show version'), 'Updated')
+    #:
+
+    def test_command_parameters_parity(self):
+        command = Commands.objects.get(command='show ip route')
+        CommandParameter.objects.bulk_create([CommandParameter(command=command, value=value) for value in ('vrf', 'detail')])
+
+        queryset = Commands.objects.select_related('vendor', 'platform', 'tag').prefetch_related('parameters')
+        self.assertParity(CommandBasicParametersSerializer, CommandBasicParametersValuesSerializer, queryset)
+    #:
+
+    def test_command_list_endpoint_parity(self):
+        queryset = Commands.objects.select_related('vendor', 'platform', 'tag')
+        response = APIClient().get('/commands/get-all/', {'page_size': 100})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [dict(row) for row in CommandBasicSerializer(queryset, many=True).data])
+    #:
+#:
+
+
+@override_settings(COMMAND_PURGE_IN_PROCESS=False, COMMAND_PURGE_CHUNK_SIZE=2)
+class PurgeTests(TestCase):
+    """Vendor and tag purges delete the whole subtree in chunks and leave one tombstone."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='purge@example.com', password='Purge-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Arista', created_by=cls.user)
+        Platform.objects.create(name='EOS', vendor=cls.vendor, created_by=cls.user)
+
+        cls.routing = Tag.objects.create(name='Routing', vendor=cls.vendor, created_by=cls.user)
+        cls.bgp = Tag.objects.create(name='BGP', vendor=cls.vendor, parent=cls.routing, created_by=cls.user)
+        cls.system = Tag.objects.create(name='System', vendor=cls.vendor, created_by=cls.user)
+
+        for index, tag in enumerate([cls.routing, cls.bgp, cls.bgp, cls.system]):
+            command = Commands.objects.create(command=f'show {index}', vendor=cls.vendor, tag=tag, created_by=cls.user)
+            CommandParameter.objects.create(command=command, value='detail')
+        #:
+    #:
+
+    def test_tag_purge(self):
+        job, created = enqueue_purge(self.routing, self.user)
+        self.assertTrue(created)
+        self.assertEqual(enqueue_purge(self.routing, self.user), (job, False))
+
+        [job] = run_pending_jobs()
+
+        self.assertEqual((job.status, job.commands_total, job.commands_deleted, job.tags_deleted), ('DONE', 3, 3, 2))
+        self.assertEqual(list(Commands.objects.values_list('tag', flat=True)), [self.system.pk])
+        self.assertEqual(list(Tombstone.objects.values_list('model_name', 'object_id')), [('tag', self.routing.pk)])
+    #:
+
+    def test_tombstone_before_first_chunk(self):
+        enqueue_purge(self.vendor, self.user)
+
+        with mock.patch('commands.purging.purge_target', side_effect=RuntimeError('Interrupted')):
+            with self.assertLogs('commands.purging', 'ERROR'):
+                [job] = run_pending_jobs()
+            #:
+        #:
+
+        # The commands are gone, the vendor is still there, and clients already know it's going
+        self.assertEqual((job.status, job.commands_deleted), ('FAILED', 4))
+        self.assertTrue(Vendor.objects.filter(pk=self.vendor.pk).exists())
+        self.assertEqual(list(Tombstone.objects.values_list('model_name', 'object_id')), [('vendor', self.vendor.pk)])
+
+        # Resumed, it finishes with still the one tombstone
+        PurgeJob.objects.filter(pk=job.pk).update(status=PurgeJob.STATUS_PENDING)
+        [job] = run_pending_jobs()
+
+        self.assertEqual(job.status, 'DONE')
+        self.assertEqual(list(Tombstone.objects.values_list('model_name', 'object_id')), [('vendor', self.vendor.pk)])
+    #:
+
+    def test_vendor_delete_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_superuser(email='root@example.com', password='Root-Pass-1234'))
+
+        response = client.delete(f'/vendors/my-delete/{self.vendor.pk}/')
+        self.assertEqual(response.status_code, 404) # Not created by this user
+
+        self.vendor.created_by = CustomUser.objects.get(email='root@example.com')
+        self.vendor.save()
+
+        response = client.delete(f'/vendors/my-delete/{self.vendor.pk}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'PENDING')
+
+        run_pending_jobs()
+
+        self.assertEqual(client.get(f'/commands/purge-jobs/{response.json()["id"]}/').json()['status'], 'DONE')
+        self.assertFalse(Vendor.objects.filter(pk=self.vendor.pk).exists())
+        self.assertFalse(Commands.objects.exists() or CommandParameter.objects.exists() or Tag.objects.exists())
+        self.assertEqual(list(Tombstone.objects.values_list('model_name', 'object_id')), [('vendor', self.vendor.pk)])
+    #:
+#:
+
+
+class TagReorganizeTests(TestCase):
+    """Moving and merging branches keeps names unique per parent and repoints commands."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(email='tree@example.com', password='Tree-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Nokia', created_by=user)
+
+        def tag(name, parent=None):
+            return Tag.objects.create(name=name, vendor=cls.vendor, parent=parent, created_by=user)
+        #:
+
+        # Routing/{OSPF/Areas, BGP} and L3/ospf/Timers
+        cls.routing = tag('Routing')
+        cls.ospf = tag('OSPF', cls.routing)
+        cls.areas = tag('Areas', cls.ospf)
+        cls.bgp = tag('BGP', cls.routing)
+        cls.l3 = tag('L3')
+        cls.l3_ospf = tag('ospf', cls.l3)
+        cls.timers = tag('Timers', cls.l3_ospf)
+
+        for index, target in enumerate([cls.routing, cls.ospf, cls.areas, cls.bgp, cls.timers]):
+            Commands.objects.create(command=f'show {index}', vendor=cls.vendor, tag=target, created_by=user)
+        #:
+    #:
+
+    def test_move_under_own_subtag(self):
+        with self.assertRaises(TagTreeError):
+            move_tag(self.routing, self.areas)
+        #:
+    #:
+
+    def test_move(self):
+        counts = move_tag(self.bgp, self.l3)
+
+        self.assertEqual(counts['tags_moved'], 1)
+        self.assertEqual(Tag.objects.get(pk=self.bgp.pk).parent_id, self.l3.pk)
+    #:
+
+    def test_move_name_conflict(self):
+        with self.assertRaises(TagNameConflict):
+            move_tag(self.ospf, self.l3)
+        #:
+
+        counts = move_tag(self.ospf, self.l3, merge=True)
+        self.assertEqual((counts['tags_merged'], counts['tags_moved']), (1, 1))
+        self.assertEqual(Tag.objects.get(pk=self.areas.pk).parent_id, self.l3_ospf.pk)
+    #:
+
+    def test_merge(self):
+        counts = merge_tags(self.routing, self.l3)
+
+        # Routing and OSPF are merged away, Areas and BGP move over
+        self.assertEqual(counts, {'tag_id': self.l3.pk, 'tags_moved': 2, 'tags_merged': 2, 'commands_repointed': 2})
+        self.assertFalse(Tag.objects.filter(pk__in=[self.routing.pk, self.ospf.pk]).exists())
+        self.assertEqual(
+            sorted(str(tag) for tag in Tag.objects.filter(vendor=self.vendor)),
+            ['L3', 'L3/BGP', 'L3/ospf', 'L3/ospf/Areas', 'L3/ospf/Timers']
+        )
+        self.assertEqual(
+            sorted(Commands.objects.values_list('tag_id', flat=True)),
+            sorted([self.l3.pk, self.l3_ospf.pk, self.areas.pk, self.bgp.pk, self.timers.pk])
+        )
+        self.assertEqual(
+            set(Tombstone.objects.values_list('model_name', 'object_id')),
+            {('tag', self.routing.pk), ('tag', self.ospf.pk)}
+        )
+    #:
+
+    def test_tag_tree_filter(self):
+        response = APIClient().get('/commands/get-filtered/', {'tag_tree': 'routing', 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row['command'] for row in response.json()['results']), ['show 0', 'show 1', 'show 2', 'show 3'])
+
+        response = APIClient().get('/commands/get-filtered/', {'tag_tree_id': self.l3.pk})
+        self.assertEqual([row['command'] for row in response.json()['results']], ['show 4'])
+    #:
+
+    def test_merge_into_own_subtag(self):
+        with self.assertRaises(TagTreeError):
+            merge_tags(self.routing, self.ospf)
+        #:
+    #:
+#:
+
+
+class CommandParameterTests(TestCase):
+    """Parameters are embedded on request and replaced in bulk."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser(email='params@example.com', password='Params-Pass-1234')
+        vendor = Vendor.objects.create(name='HPE', created_by=cls.user)
+
+        cls.commands = [
+            Commands.objects.create(command=f'display {index}', vendor=vendor, created_by=cls.user)
+            for index in range(3)
+        ]
+        CommandParameter.objects.create(command=cls.commands[0], value='old')
+    #:
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    #:
+
+    def test_bulk_replace(self):
+        first, second, third = self.commands
+        before = Commands.objects.get(pk=first.pk).date_updated
+
+        response = self.client.post('/commands/parameters/bulk-replace/', {'commands': [
+            {'command_id': first.pk, 'parameters': ['brief', 'verbose']},
+            {'command_id': second.pk, 'parameters': ['all']},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.json()['commands_updated'], response.json()['parameters_deleted'], response.json()['parameters_created']),
+            (2, 1, 3)
+        )
+        self.assertEqual(list(first.parameters.order_by('id').values_list('value', flat=True)), ['brief', 'verbose'])
+        self.assertGreater(Commands.objects.get(pk=first.pk).date_updated, before)
+
+        # Values-based (get-all) and ModelSerializer (my-list) paths
+        for url in ('/commands/get-all/', '/commands/my-list/'):
+            response = self.client.get(url, {'include': 'parameters'})
+            rows = {row['id']: row['parameters'] for row in response.json()['results']}
+            self.assertEqual([parameter['value'] for parameter in rows[first.pk]], ['brief', 'verbose'])
+            self.assertEqual(rows[third.pk], [])
+        #:
+    #:
+
+    def test_bulk_replace_unknown_command(self):
+        response = self.client.post('/commands/parameters/bulk-replace/', {'commands': [
+            {'command_id': self.commands[0].pk, 'parameters': []},
+            {'command_id': 999999, 'parameters': ['x']},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(CommandParameter.objects.filter(command=self.commands[0]).exists())
+    #:
+#:
+
+
+class VersionKeyTests(TestCase):
+    """Version keys sort like versions and back the version range filters."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(email='versions@example.com', password='Versions-Pass-1234')
+        cisco = Vendor.objects.create(name='Cisco', created_by=user)
+        juniper = Vendor.objects.create(name='Juniper', created_by=user)
+
+        for command, version, vendor in [
+            ('show a', '12.4', cisco), ('show b', '15.1.2', cisco), ('show c', '15.2', cisco),
+            ('show d', '15.2(3)T', cisco), ('show e', '15.10.1', cisco), ('show f', None, cisco),
+            ('show c', '16.1', juniper),
+        ]:
+            Commands.objects.create(command=command, version=version, vendor=vendor, created_by=user)
+        #:
+    #:
+
+    def test_key_order(self):
+        versions = ['15.10', '15.2(3)T', '15.2', '12.4', '15.2.9', '15.2.1', '15.2(3)', '15.9.9']
+        self.assertEqual(
+            sorted(versions, key=version_key),
+            ['12.4', '15.2', '15.2.1', '15.2.9', '15.2(3)', '15.2(3)T', '15.9.9', '15.10']
+        )
+        self.assertNotEqual(version_key('15.2(3)'), version_key('15.2.3'))
+        self.assertIsNone(version_key('latest'))
+    #:
+
+    def test_key_not_serialized(self):
+        command = Commands.objects.get(command='show a')
+        self.assertNotIn('version_key', CommandFullSerializer(command).data)
+    #:
+
+    def test_save_keeps_key(self):
+        command = Commands.objects.get(command='show a')
+        command.version = '12.4(24)T'
+        command.save(update_fields=['version'])
+
+        self.assertEqual(Commands.objects.get(pk=command.pk).version_key, version_key('12.4(24)T'))
+    #:
+
+    def filtered(self, **params):
+        response = APIClient().get('/commands/get-filtered/', {**params, 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return sorted((row['command'], row['version']) for row in response.json()['results'])
+    #:
+
+    def test_version_range(self):
+        self.assertEqual(
+            self.filtered(version_min='15.2', vendor__name='cisco'),
+            [('show c', '15.2'), ('show d', '15.2(3)T'), ('show e', '15.10.1')]
+        )
+        self.assertEqual(
+            self.filtered(version_max='15.2', vendor__name='cisco'),
+            [('show a', '12.4'), ('show b', '15.1.2'), ('show c', '15.2'), ('show d', '15.2(3)T')]
+        )
+
+        # A range lists the newest versions first
+        response = APIClient().get('/commands/get-filtered/', {'version_min': '15.2', 'vendor__name': 'cisco'})
+        self.assertEqual([row['version'] for row in response.json()['results']], ['15.10.1', '15.2(3)T', '15.2'])
+
+        self.assertEqual(APIClient().get('/commands/get-filtered/', {'version_min': '15.x'}).status_code, 400)
+
+        # Valid versions without a key (a part over 6 digits, too many parts) can't be compared
+        for value in ('1234567.1', '.'.join(['1'] * 14)):
+            self.assertIsNone(version_key(value))
+            self.assertEqual(APIClient().get('/commands/get-filtered/', {'version_max': value}).status_code, 400)
+        #:
+    #:
+
+    def test_latest(self):
+        self.assertEqual(
+            self.filtered(latest='true'),
+            [('show a', '12.4'), ('show b', '15.1.2'), ('show c', '16.1'), ('show d', '15.2(3)T'), ('show e', '15.10.1')]
+        )
+
+        # Within the rows the other filters select
+        self.assertEqual(
+            self.filtered(latest='true', vendor__name='cisco'),
+            [('show a', '12.4'), ('show b', '15.1.2'), ('show c', '15.2'), ('show d', '15.2(3)T'), ('show e', '15.10.1')]
+        )
+        self.assertEqual(self.filtered(latest='true', version_max='15.2'), [
+            ('show a', '12.4'), ('show b', '15.1.2'), ('show c', '15.2'), ('show d', '15.2(3)T')
+        ])
+    #:
+#:
+
+
+class CatalogVersionTests(TestCase):
+    """Catalog versions live in the shared cache, so every process sees a bump."""
+
+    @override_settings(COMMAND_CACHE_VERSION_LOCAL_SECONDS=0)
+    def test_bump_from_another_process(self):
+        version = get_catalog_version()
+
+        # What a bump in another worker process leaves behind
+        cache.set(CATALOG_VERSION_KEY, version + 1, timeout=None)
+        self.assertEqual(get_catalog_version(), version + 1)
+    #:
+
+    def test_bump(self):
+        version = get_catalog_version()
+        bump_catalog_version()
+
+        self.assertNotEqual(get_catalog_version(), version)
+        self.assertEqual(cache.get(CATALOG_VERSION_KEY), get_catalog_version())
+    #:
+#:
+
+
+class CommandFacetsTests(TestCase):
+    """Facet counts follow the filters, and are served from the cache for a while after writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='facets@example.com', password='Facets-Pass-1234')
+        cls.cisco = Vendor.objects.create(name='Cisco', created_by=cls.user)
+        cls.juniper = Vendor.objects.create(name='Juniper', created_by=cls.user)
+        cls.catalyst = Platform.objects.create(name='Catalyst', vendor=cls.cisco, created_by=cls.user)
+        cls.routing = Tag.objects.create(name='Routing', vendor=cls.cisco, created_by=cls.user)
+
+        for command, version in [('show ip route', '15.2'), ('show ip ospf', '15.3')]:
+            Commands.objects.create(
+                command=command, version=version, vendor=cls.cisco, platform=cls.catalyst, tag=cls.routing, created_by=cls.user
+            )
+        #:
+        Commands.objects.create(command='show route', version='15.2', vendor=cls.juniper, created_by=cls.user)
+    #:
+
+    def setUp(self):
+        cache.clear()
+    #:
+
+    def get_facets(self, **params):
+        response = APIClient().get('/commands/facets/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+    #:
+
+    def test_counts(self):
+        self.assertEqual(self.get_facets(), {
+            'total': 3,
+            'vendors': [{'id': self.cisco.pk, 'name': 'Cisco', 'count': 2}, {'id': self.juniper.pk, 'name': 'Juniper', 'count': 1}],
+            'platforms': [{'id': self.catalyst.pk, 'name': 'Catalyst', 'count': 2}, {'id': None, 'name': None, 'count': 1}],
+            'tags': [{'id': self.routing.pk, 'name': 'Routing', 'count': 2}, {'id': None, 'name': None, 'count': 1}],
+            'versions': [{'version': '15.2', 'count': 2}, {'version': '15.3', 'count': 1}],
+        })
+    #:
+
+    def test_filtered_counts(self):
+        self.assertEqual(self.get_facets(vendor__name='juniper'), {
+            'total': 1,
+            'vendors': [{'id': self.juniper.pk, 'name': 'Juniper', 'count': 1}],
+            'platforms': [{'id': None, 'name': None, 'count': 1}],
+            'tags': [{'id': None, 'name': None, 'count': 1}],
+            'versions': [{'version': '15.2', 'count': 1}],
+        })
+        self.assertEqual(self.get_facets(version_min='15.3')['total'], 1)
+        self.assertEqual(self.get_facets(vendor__name='Arista'), command_facets(Commands.objects.none()))
+    #:
+
+    def test_served_across_writes(self):
+        self.get_facets()
+        Commands.objects.create(command='show vlan', vendor=self.juniper, created_by=self.user)
+        bump_catalog_version()
+
+        with mock.patch('commands.facets.command_facets') as counted:
+            self.assertEqual(self.get_facets()['total'], 3)
+        #:
+        counted.assert_not_called()
+
+        with override_settings(COMMAND_FACETS_STALE_SECONDS=0):
+            self.assertEqual(self.get_facets()['total'], 4)
+        #:
+    #:
+#:
+
+
+class NameResolverTests(TestCase):
+    """Resolved names are reused, unknown ones are looked up again."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='resolver@example.com', password='Resolver-Pass-1234')
+    #:
+
+    def test_miss_is_not_cached(self):
+        self.assertEqual(vendor_resolver.resolve('Extreme'), ())
+
+        # bulk_create sends no signals, so nothing bumps the taxonomy version
+        [vendor] = Vendor.objects.bulk_create([Vendor(name='Extreme', created_by=self.user)])
+        self.assertEqual(vendor_resolver.resolve('extreme'), (vendor.pk,))
+    #:
+
+    @override_settings(COMMAND_RESOLVER_TTL=0)
+    def test_ttl(self):
+        vendor = Vendor.objects.create(name='Ruckus', created_by=self.user)
+        self.assertEqual(vendor_resolver.resolve('Ruckus'), (vendor.pk,))
+
+        Vendor.objects.filter(pk=vendor.pk).update(name='Ruckus Networks')
+        self.assertEqual(vendor_resolver.resolve('Ruckus'), ())
+    #:
+#:
+
+
+class ORJSONRendererTests(TestCase):
+    """The orjson renderer writes the same bytes as DRF's JSONRenderer."""
+
+    DATA = {
+        'aware': datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc),
+        'offset': datetime(2026, 1, 2, 3, 4, 5, 120000, tzinfo=dt_timezone(timedelta(hours=2))),
+        'naive': datetime(2026, 1, 2, 3, 4, 5, 123456),
+        'whole': datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+        'date': date(2026, 1, 2),
+        'time': time(3, 4, 5, 123456),
+        'duration': timedelta(minutes=1, microseconds=500),
+        'decimal': Decimal('1.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'text': 'show vlan\u2028brief ß',
+        'nested': [{'id': 1, 'float': 0.1, 'none': None, 'flag': True}],
+        7: 'non-string key',
+    }
+
+    def test_parity(self):
+        self.assertEqual(ORJSONRenderer().render(self.DATA), JSONRenderer().render(self.DATA))
+    #:
+
+    def test_parity_with_encoder_rules(self):
+        # Whatever DRF does to datetimes (older releases cut them to milliseconds) is done to both
+        drf_default = JSONEncoder.default
+
+        def milliseconds(encoder, obj):
+            representation = drf_default(encoder, obj)
+
+            if isinstance(obj, (datetime, time)) and obj.microsecond:
+                representation = representation[:representation.index('.') + 4] + representation[representation.index('.') + 7:]
+            #:
+            return representation
+        #:
+
+        with mock.patch.object(JSONEncoder, 'default', milliseconds):
+            rendered = ORJSONRenderer().render(self.DATA)
+            self.assertEqual(rendered, JSONRenderer().render(self.DATA))
+        #:
+        self.assertIn(b'"aware":"2026-01-02T03:04:05.123Z"', rendered)
+    #:
+#:
+
+
+class MessagePackTests(TestCase):
+    """MessagePack is served on request, optionally columnar, and accepted as a request body."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser(email='msgpack@example.com', password='Msgpack-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Arista', created_by=cls.user)
+        platform = Platform.objects.create(name='7050X', vendor=cls.vendor, created_by=cls.user)
+
+        for index in range(3):
+            Commands.objects.create(
+                command=f'show interfaces {index}', version='4.28', vendor=cls.vendor, platform=platform, created_by=cls.user
+            )
+        #:
+    #:
+
+    def get_commands(self, **headers):
+        return APIClient().get('/commands/get-all/', {'page_size': 100}, **headers)
+    #:
+
+    def test_accept_negotiation(self):
+        expected = self.get_commands().json()
+
+        response = self.get_commands(HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), expected)
+
+        self.assertEqual(self.get_commands(HTTP_ACCEPT='application/json')['Content-Type'], 'application/json')
+        self.assertEqual(self.get_commands(HTTP_ACCEPT='text/csv').status_code, 406)
+    #:
+
+    def test_columnar_round_trip(self):
+        expected = self.get_commands().json()
+
+        response = self.get_commands(HTTP_ACCEPT='application/msgpack; columnar=true')
+        results = msgpack.unpackb(response.content)['results']
+
+        self.assertEqual(results['columns'], list(expected['results'][0]))
+        self.assertEqual([dict(zip(results['columns'], row)) for row in results['rows']], expected['results'])
+    #:
+
+    def test_columnar_only_same_shapes(self):
+        mixed = [{'id': 1}, {'id': 2, 'name': 'two'}]
+
+        self.assertEqual(to_columnar({'items': mixed}), {'items': mixed})
+        self.assertEqual(to_columnar([{'tags': [{'id': 1}]}]), {'columns': ['tags'], 'rows': [[{'columns': ['id'], 'rows': [[1]]}]]})
+    #:
+
+    def test_request_body(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        body = msgpack.packb({'vendor_id': self.vendor.pk, 'names': ['SHOW INTERFACES 1', 'show lldp']})
+        response = client.post('/commands/check-existence/batch/', body, content_type='application/msgpack')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['ids'], [Commands.objects.get(command='show interfaces 1').pk, None])
+
+        response = client.post('/commands/check-existence/batch/', b'\xc1', content_type='application/msgpack')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('MessagePack parse error', response.json()['detail'])
+    #:
+#:
+
+
+class CommandImportTests(TestCase):
+    """Imports create, override or skip commands, and roll back as a whole."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='import@example.com', password='Import-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='HPE', created_by=cls.user)
+        cls.main_tag = Tag.objects.create(name='Imported', vendor=cls.vendor, created_by=cls.user)
+        cls.existing = Commands.objects.create(
+            command='show vlan', description='Original', vendor=cls.vendor, tag=cls.main_tag, created_by=cls.user
+        )
+    #:
+
+    def run_import(self, override: bool, *commands):
+        rows = [{'command': command, 'description': description, 'example': '', 'tag': tag} for command, description, tag in commands]
+        importer = CommandImporter(self.vendor, self.main_tag, override, self.user)
+        return importer.run({'tags': [], 'commands': rows})
+    #:
+
+    def test_import(self):
+        report = self.run_import(
+            False,
+            ('show vlan', 'Imported', ''),
+            ('show lldp', 'Neighbours', 'LLDP'),
+            ('show lldp', 'Neighbours again', 'LLDP') # The later row wins
+        )
+
+        self.assertEqual(report['summary']['commands_created'], 1)
+        self.assertEqual(report['summary']['commands_skipped'], 2)
+        self.assertEqual(report['summary']['tags_created'], 1)
+
+        created = Commands.objects.get(command='show lldp')
+        self.assertEqual((created.description, created.tag.name, created.tag.parent_id), ('Neighbours again', 'LLDP', self.main_tag.pk))
+        self.assertEqual(Commands.objects.get(pk=self.existing.pk).description, 'Original')
+    #:
+
+    def test_override_and_rollback(self):
+        report = self.run_import(True, ('SHOW VLAN', 'Imported', ''), ('show lldp', 'Neighbours', 'LLDP'))
+
+        self.assertEqual((report['summary']['commands_created'], report['summary']['commands_updated']), (1, 1))
+        self.assertEqual(Commands.objects.get(pk=self.existing.pk).description, 'Imported')
+
+        created_id = Commands.objects.get(command='show lldp').pk
+        counts = rollback_import_batch(ImportBatch.objects.get(pk=report['import_batch_id']))
+
+        self.assertEqual(counts, {'commands_restored': 1, 'commands_deleted': 1})
+        restored = Commands.objects.get(pk=self.existing.pk)
+        self.assertEqual((restored.command, restored.description), ('show vlan', 'Original'))
+        self.assertFalse(Commands.objects.filter(pk=created_id).exists())
+        self.assertFalse(Tag.objects.filter(name='LLDP').exists())
+        self.assertEqual(
+            list(Tombstone.objects.filter(model_name=Tombstone.MODEL_COMMAND).values_list('object_id', 'vendor_id')),
+            [(created_id, self.vendor.pk)]
+        )
+
+        with self.assertRaises(RollbackError):
+            rollback_import_batch(ImportBatch.objects.get(pk=report['import_batch_id']))
+        #:
+    #:
+
+    def test_rollback_after_later_import(self):
+        first = self.run_import(True, ('show vlan', 'First', ''))
+        second = self.run_import(True, ('show vlan', 'Second', ''))
+
+        with self.assertRaises(RollbackError):
+            rollback_import_batch(ImportBatch.objects.get(pk=first['import_batch_id']))
+        #:
+
+        rollback_import_batch(ImportBatch.objects.get(pk=second['import_batch_id']))
+        rollback_import_batch(ImportBatch.objects.get(pk=first['import_batch_id']))
+        self.assertEqual(Commands.objects.get(pk=self.existing.pk).description, 'Original')
+    #:
+#:
+
+
+class CSVUploadTests(TestCase):
+    """A file uploaded again with the same options is answered from the first import, once."""
+
+    CSV = b'Command,Command,Description,Example\nSwitching,,,\nshow vlan,,Show VLANs,show vlan brief\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser(email='upload@example.com', password='Upload-Pass-1234')
+        cls.cisco = Vendor.objects.create(name='Cisco', created_by=cls.user)
+        cls.juniper = Vendor.objects.create(name='Juniper', created_by=cls.user)
+    #:
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    #:
+
+    def upload(self, vendor, **options):
+        csv_file = io.BytesIO(self.CSV)
+        csv_file.name = 'switching.csv'
+        response = self.client.post('/commands/csv-upload', {'csv_file': csv_file, 'vendor': vendor.pk, **options})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+    #:
+
+    def test_same_file_is_skipped(self):
+        first = self.upload(self.cisco)
+        self.assertFalse(first['duplicate_upload'])
+        self.assertEqual(first['data']['summary']['commands_created'], 1)
+
+        with mock.patch('commands.views.CommandImporter') as importer:
+            second = self.upload(self.cisco)
+        #:
+
+        importer.assert_not_called()
+        self.assertTrue(second['duplicate_upload'])
+        self.assertEqual(second['data'], first['data'])
+        self.assertEqual(CommandUpload.objects.count(), 1)
+    #:
+
+    def test_force_reimports(self):
+        self.upload(self.cisco)
+        forced = self.upload(self.cisco, force=True, override=True)
+        self.assertFalse(forced['duplicate_upload'])
+
+        # `override` is part of the options: the first forced upload of them is not marked as forced
+        again = self.upload(self.cisco, force=True, override=True)
+        self.assertFalse(again['duplicate_upload'])
+        self.assertEqual(again['data']['summary']['commands_updated'], 1)
+        self.assertEqual(CommandUpload.objects.count(), 3)
+    #:
+
+    def test_other_vendor_imports(self):
+        self.upload(self.cisco)
+        other = self.upload(self.juniper)
+
+        self.assertFalse(other['duplicate_upload'])
+        self.assertEqual(Commands.objects.filter(command='show vlan').count(), 2)
+    #:
+
+    def test_racing_upload_is_skipped(self):
+        first = self.upload(self.cisco)
+
+        # The other request recorded its upload after this one's check and before its insert
+        with mock.patch('commands.views.CommandUpload.objects.filter') as filter_uploads:
+            filter_uploads.return_value.exists.return_value = False
+            filter_uploads.return_value.first.return_value = CommandUpload.objects.get()
+            second = self.upload(self.cisco)
+        #:
+
+        self.assertTrue(second['duplicate_upload'])
+        self.assertEqual(second['data'], first['data'])
+        self.assertEqual(CommandUpload.objects.count(), 1)
+    #:
+
+    def test_unforced_unique(self):
+        values = dict(content_hash='0' * 64, vendor=self.cisco, main_tag=None, override=False, result={}, created_by=self.user)
+        CommandUpload.objects.create(**values)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CommandUpload.objects.create(**values)
+        #:
+
+        CommandUpload.objects.create(forced=True, **values)
+        CommandUpload.objects.create(forced=True, **values)
+    #:
+#:
+
+
+class UploadFormatTests(TestCase):
+    """Each import format is picked from the file name or its content and imports like the CSV template."""
+
+    JSONL = b'{"tag": "Switching"}\n{"command": "show vlan", "description": "Show VLANs", "example": "show vlan brief"}\n'
+    YAML = b'---\n- tag: Switching\n- command: show vlan\n  description: Show VLANs\n  example: show vlan brief\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser(email='formats@example.com', password='Formats-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Extreme', created_by=cls.user)
+        cls.xlsx = cls.make_xlsx()
+    #:
+
+    @staticmethod
+    def make_xlsx() -> bytes:
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        for row in [('Command', 'Command', 'Description', 'Example'), ('Switching',), ('show vlan', None, 'Show VLANs', 'show vlan brief')]:
+            workbook.active.append(row)
+        #:
+
+        output = io.BytesIO()
+        workbook.save(output)
+        return output.getvalue()
+    #:
+
+    def upload(self, file_name, raw):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        upload_file = io.BytesIO(raw)
+        upload_file.name = file_name
+        return client.post('/commands/csv-upload', {'csv_file': upload_file, 'vendor': self.vendor.pk})
+    #:
+
+    def assertImported(self, file_name, raw):
+        response = self.upload(file_name, raw)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['data']['summary']['commands_created'], 1)
+
+        command = Commands.objects.get(vendor=self.vendor)
+        self.assertEqual(
+            (command.command, command.description, command.example, command.tag.name),
+            ('show vlan', 'Show VLANs', 'show vlan brief', 'Switching')
+        )
+    #:
+
+    def test_xlsx_import(self):
+        self.assertImported('switching.xlsx', self.xlsx)
+    #:
+
+    def test_jsonl_import(self):
+        self.assertImported('switching.jsonl', self.JSONL)
+    #:
+
+    def test_yaml_import(self):
+        self.assertImported('switching.yaml', self.YAML)
+    #:
+
+    def test_format_from_extension(self):
+        for file_name, format_name in [
+            ('switching.CSV', 'csv'), ('switching.txt', 'csv'), ('switching.xlsm', 'xlsx'),
+            ('switching.ndjson', 'jsonl'), ('switching.json', 'jsonl'), ('switching.yml', 'yaml'),
+            ('archive.zip/switching.yaml', 'yaml')
+        ]:
+            with self.subTest(file_name=file_name):
+                # The extension wins over what the content looks like
+                self.assertEqual(detect_format(file_name, b'Command,Command,Description,Example\n'), format_name)
+            #:
+        #:
+    #:
+
+    def test_format_from_content(self):
+        for raw, format_name in [
+            (self.xlsx, 'xlsx'), (self.JSONL, 'jsonl'), (b'[{"command": "show vlan"}]', 'jsonl'),
+            (self.YAML, 'yaml'), (b'\xef\xbb\xbfCommand,Command,Description,Example\n', 'csv')
+        ]:
+            with self.subTest(content=raw[:16]):
+                self.assertEqual(detect_format('switching', raw), format_name)
+                self.assertEqual(detect_format(None, raw), format_name)
+            #:
+        #:
+    #:
+
+    def test_unknown_format(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zipped:
+            zipped.writestr('switching.csv', 'show vlan')
+        #:
+
+        for file_name, raw in [('switching.pdf', b'%PDF-1.7'), ('switching.json.gz', b'\x1f\x8b'), ('switching', archive.getvalue())]:
+            with self.subTest(file_name=file_name):
+                with self.assertRaises(UnsupportedFormatError):
+                    detect_format(file_name, raw)
+                #:
+
+                response = self.upload(file_name, raw)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+            #:
+        #:
+        self.assertFalse(Commands.objects.filter(vendor=self.vendor).exists())
+    #:
+#:
+
+
+class ParseUploadFilesTests(TestCase):
+    """Parsing several files gives the same result on worker processes as inline."""
+
+    FILES = [
+        ('routing.csv', b'Command,Command,Description,Example\nRouting,,,\nshow ip route,,Show routes,\n'),
+        ('switching.csv', b'Command,Command,Description,Example\nSwitching,,,\nshow vlan,,Show VLANs,show vlan brief\n'),
+    ]
+
+    def test_parse_in_worker_processes(self):
+        with override_settings(COMMAND_IMPORT_PARSE_WORKERS=1):
+            expected = parse_upload_files(self.FILES, 'Cisco', None)
+        #:
+
+        with override_settings(COMMAND_IMPORT_PARSE_WORKERS=2):
+            self.assertEqual(parse_upload_files(self.FILES, 'Cisco', None), expected)
+        #:
+
+        merged, _ = expected
+        self.assertEqual([row['command'] for row in merged['commands']], ['show ip route', 'show vlan'])
+    #:
+#:
+
+
+@override_settings(COMMAND_CHANGES_SETTLE_SECONDS=0)
+class ChangeFeedHorizonTests(TestCase):
+    """The change feed never hands out rows a still-open transaction could be writing behind."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(email='feed@example.com', password='Feed-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Fortinet', created_by=user)
+    #:
+
+    def test_open_transaction_holds_rows_back(self):
+        started = timezone.now() - timedelta(minutes=1)
+
+        with mock.patch('commands.changes.oldest_open_transaction', return_value=started):
+            self.assertEqual(collect_changes()['vendors'], [])
+        #:
+
+        self.assertEqual([row['id'] for row in collect_changes()['vendors']], [self.vendor.pk])
+    #:
+
+    @override_settings(COMMAND_CHANGES_MAX_HOLD_SECONDS=0)
+    def test_stuck_transaction_stops_holding(self):
+        started = timezone.now() - timedelta(days=1)
+
+        with mock.patch('commands.changes.oldest_open_transaction', return_value=started):
+            self.assertEqual([row['id'] for row in collect_changes()['vendors']], [self.vendor.pk])
+        #:
+    #:
+#:
+
+
+@override_settings(COMMAND_CHANGES_SETTLE_SECONDS=0)
+class CatalogEventTests(TestCase):
+    """The event stream turns change feed pages into SSE frames per subscriber."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='events@example.com', password='Events-Pass-1234')
+        cls.before = encode_cursor({section: (timezone.now() - timedelta(minutes=1), 0) for section in SECTIONS})
+        cls.cisco = Vendor.objects.create(name='Cisco', created_by=cls.user)
+        cls.juniper = Vendor.objects.create(name='Juniper', created_by=cls.user)
+    #:
+
+    def test_changes_to_events(self):
+        Tombstone.objects.create(model_name=Tombstone.MODEL_COMMAND, object_id=42, vendor_id=self.cisco.pk)
+        events = changes_to_events(collect_changes(self.before), self.before)
+
+        self.assertEqual(
+            [(vendor_id, event_type) for vendor_id, event_type, _ in events],
+            [(self.cisco.pk, 'vendor.created'), (self.juniper.pk, 'vendor.created'), (self.cisco.pk, 'command.deleted')]
+        )
+        self.assertEqual(events[2][2]['data'], {'id': 42})
+    #:
+
+    def test_publish_per_vendor(self):
+        events = changes_to_events(collect_changes(self.before), self.before)
+        fan_out = ChangeBroadcaster()
+        everything, cisco = Subscription(), Subscription(self.cisco.pk)
+        fan_out.subscribers.update({everything, cisco})
+
+        fan_out.publish(events, 'cursor')
+
+        self.assertEqual(everything.queue.get_nowait().count(b'event: vendor.created'), 2)
+        frames = cisco.queue.get_nowait()
+        self.assertEqual(frames.count(b'event: vendor.created'), 1)
+        self.assertIn(b'id: cursor', frames)
+    #:
+
+    @override_settings(COMMAND_EVENTS_QUEUE_SIZE=1)
+    def test_slow_subscriber_resyncs(self):
+        events = changes_to_events(collect_changes(self.before), self.before)
+        fan_out = ChangeBroadcaster()
+        subscription = Subscription()
+        fan_out.subscribers.add(subscription)
+
+        fan_out.publish(events, 'first')
+        fan_out.publish(events, 'second')
+
+        self.assertTrue(subscription.overflowed)
+        self.assertNotIn(subscription, fan_out.subscribers)
+        self.assertIs(subscription.queue.get_nowait(), RESYNC)
+    #:
+
+    async def test_stream_catches_up_from_last_event_id(self):
+        stream = stream_events(self.juniper.pk, self.before)
+
+        try:
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+            frames = await anext(stream)
+        #:
+
+        finally:
+            await stream.aclose()
+            broadcaster.task.cancel()
+        #:
+
+        self.assertEqual(frames.count(b'event: vendor.created'), 1)
+        self.assertIn(f'"id":{self.juniper.pk},'.encode(), frames)
+    #:
+
+    def test_view(self):
+        # The WSGI test client can't hold a stream open
+        self.assertEqual(APIClient().get('/commands/events/').status_code, 501)
+    #:
+
+    async def test_view_invalid_cursor(self):
+        response = await self.async_client.get('/commands/events/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+    #:
+#:
+
+
+class TagPathMapTests(TestCase):
+    """The tag path map follows renames, moves and deletions without reloading every tag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(email='paths@example.com', password='Paths-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Huawei', created_by=user)
+        cls.routing = Tag.objects.create(name='Routing', vendor=cls.vendor, created_by=user)
+        cls.ospf = Tag.objects.create(name='OSPF', vendor=cls.vendor, parent=cls.routing, created_by=user)
+        cls.areas = Tag.objects.create(name='Areas', vendor=cls.vendor, parent=cls.ospf, created_by=user)
+        cls.system = Tag.objects.create(name='System', vendor=cls.vendor, created_by=user)
+    #:
+
+    def test_refresh(self):
+        paths = TagPathMap()
+        self.assertEqual(paths.get()[self.areas.pk], 'Routing/OSPF/Areas')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.routing.name = 'L3'
+            self.routing.save()
+        #:
+
+        self.assertEqual(paths.get()[self.areas.pk], 'L3/OSPF/Areas')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.get(pk=self.ospf.pk).delete()
+        #:
+
+        self.assertEqual(paths.get(), {self.routing.pk: 'L3', self.system.pk: 'System'})
+    #:
+
+    def test_vendor_deleted(self):
+        paths = TagPathMap()
+        paths.get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vendor.objects.get(pk=self.vendor.pk).delete()
+        #:
+
+        self.assertEqual(paths.get(), {})
+    #:
+#:
+
+
+@mock.patch('commands.admin.ADMIN_COUNT_LIMIT', 3)
+class AdminPaginationTests(TestCase):
+    """Changelists stay navigable past the count limit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser(email='admin@example.com', password='Admin-Pass-1234')
+        vendor = Vendor.objects.create(name='MikroTik', created_by=cls.user)
+
+        for index in range(5):
+            Commands.objects.create(command=f'show {index}', vendor=vendor, created_by=cls.user)
+        #:
+    #:
+
+    def test_count_past_limit(self):
+        queryset = Commands.objects.order_by('pk')
+
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+        self.assertEqual(EstimatedCountPaginator(queryset, 2, current_page=2).count, 5)
+
+        last = EstimatedCountPaginator(queryset, 2, current_page=3)
+        self.assertEqual([command.command for command in last.page(3)], ['show 4'])
+    #:
+
+    def test_changelist_past_limit(self):
+        self.client.force_login(self.user)
+
+        with mock.patch('commands.admin.CommandsAdmin.list_per_page', 2):
+            response = self.client.get('/admin/commands/commands/', {'p': 3, 'o': '1'})
+        #:
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+    #:
+#:
+
+
+class AdminPurgeTests(TestCase):
+    """Vendors and tags deleted in the admin are purged in the background; names are searched exactly."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser(email='admin-purge@example.com', password='Admin-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Cisco', created_by=cls.user)
+        cls.routing = Tag.objects.create(name='Routing', vendor=cls.vendor, created_by=cls.user)
+        cls.system = Tag.objects.create(name='System', vendor=cls.vendor, created_by=cls.user)
+        Commands.objects.create(command='show ip route', vendor=cls.vendor, tag=cls.routing, created_by=cls.user)
+    #:
+
+    def setUp(self):
+        self.client.force_login(self.user)
+    #:
+
+    def test_delete_view(self):
+        with mock.patch('django.db.models.deletion.Collector.collect') as collect:
+            response = self.client.post(f'/admin/commands/vendor/{self.vendor.pk}/delete/', {'post': 'yes'})
+        #:
+
+        self.assertRedirects(response, '/admin/commands/vendor/')
+        collect.assert_not_called()
+        self.assertTrue(Vendor.objects.filter(pk=self.vendor.pk).exists())
+
+        [job] = run_pending_jobs()
+        self.assertEqual((job.target, job.target_id, job.status, job.commands_deleted), (PurgeJob.TARGET_VENDOR, self.vendor.pk, 'DONE', 1))
+        self.assertFalse(Vendor.objects.exists() or Tag.objects.exists() or Commands.objects.exists())
+    #:
+
+    def test_delete_selected(self):
+        response = self.client.post('/admin/commands/tag/', {
+            'action': 'delete_selected', '_selected_action': [self.routing.pk, self.system.pk], 'post': 'yes'
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            sorted(PurgeJob.objects.values_list('target', 'target_id')),
+            sorted([(PurgeJob.TARGET_TAG, self.routing.pk), (PurgeJob.TARGET_TAG, self.system.pk)])
+        )
+        self.assertEqual(Tag.objects.count(), 2)
+
+        run_pending_jobs()
+        self.assertFalse(Tag.objects.exists() or Commands.objects.exists())
+    #:
+
+    def test_search_exact_name(self):
+        for model_name, query, found in [('vendor', 'CISCO', ['Cisco']), ('vendor', 'Cis', []), ('tag', 'routing', ['Routing'])]:
+            with self.subTest(model_name=model_name, query=query):
+                response = self.client.get(f'/admin/commands/{model_name}/', {'q': query})
+                self.assertEqual([obj.name for obj in response.context['cl'].result_list], found)
+            #:
+        #:
+    #:
+#:
+
+
+class CheckListIndexesTests(TestCase):
+    """check_list_indexes tells an index search from an index walked end to end."""
+
+    def test_full_index_scan(self):
+        check = CheckListIndexes()
+
+        for plan, full in [
+            ('SEARCH commands_commands USING INDEX commands_vendor_created_idx (vendor_id=?)', False),
+            ('SCAN commands_commands USING INDEX commands_created_idx', True),
+            (
+                'Limit\n  ->  Index Scan using commands_vendor_created_idx on commands_commands\n'
+                '        Index Cond: (vendor_id = 1)', False
+            ),
+            (
+                'Limit\n  ->  Index Scan Backward using commands_created_idx on commands_commands\n'
+                '        Filter: ((version_key)::text >= \'000015\'::text)', True
+            ),
+        ]:
+            self.assertEqual(check.full_index_scan(plan), full, plan)
+        #:
+    #:
+
+    def test_unverified_without_rows(self):
+        with self.assertRaisesMessage(CommandError, 'Not verified'):
+            call_command('check_list_indexes', stdout=io.StringIO())
+        #:
+    #:
+#:
+
+
+class CheckListIndexesSeededTests(TestCase):
+    """On a catalog with a few vendors, platforms and tag trees every list query is served by an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(email='indexes@example.com', password='Indexes-Pass-1234')
+        rows = []
+
+        for vendor_index in range(4):
+            vendor = Vendor.objects.create(name=f'Vendor {vendor_index}', created_by=user)
+            platforms = [
+                Platform.objects.create(name=f'Platform {vendor_index}.{index}', vendor=vendor, created_by=user)
+                for index in range(4)
+            ]
+            tags = []
+
+            for root_index in range(3):
+                root = Tag.objects.create(name=f'Tag {vendor_index}.{root_index}', vendor=vendor, created_by=user)
+                tags += [root] + [
+                    Tag.objects.create(name=f'Tag {vendor_index}.{root_index}.{index}', vendor=vendor, parent=root, created_by=user)
+                    for index in range(3)
+                ]
+            #:
+
+            for index in range(250):
+                version = f'{12 + index % 5}.{index % 7}'
+                rows.append(Commands(
+                    command=f'show {vendor_index} {index}', vendor=vendor, created_by=user,
+                    platform=platforms[index % len(platforms)], tag=tags[index % len(tags)],
+                    version=version, version_key=version_key(version)
+                ))
+            #:
+        #:
+        Commands.objects.bulk_create(rows)
+    #:
+
+    def test_all_cases_pass(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        #:
+
+        output = io.StringIO()
+        call_command('check_list_indexes', stdout=output)
+
+        self.assertIn('All command list queries use an index.', output.getvalue())
+        self.assertNotIn('FAIL', output.getvalue())
+    #:
+#:
+
+
+class CommandExistsBatchTests(TestCase):
+    """Ids come back in the submitted order, matched the way the unique index compares names."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser(email='exists@example.com', password='Exists-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Aruba', created_by=cls.user)
+        cls.vlan = Commands.objects.create(command='show vlan', vendor=cls.vendor, created_by=cls.user)
+        cls.street = Commands.objects.create(command='show straße', vendor=cls.vendor, created_by=cls.user)
+    #:
+
+    def check_existence(self, vendor_id, names):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/commands/check-existence/batch/', {'vendor_id': vendor_id, 'names': names}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['ids']
+    #:
+
+    def test_ids_in_order(self):
+        self.assertEqual(
+            self.check_existence(self.vendor.pk, ['show lldp', 'SHOW VLAN', 'show vlan', 'Show Vlan']),
+            [None, self.vlan.pk, self.vlan.pk, self.vlan.pk]
+        )
+    #:
+
+    def test_non_ascii_names(self):
+        # str.upper() would look for 'SHOW STRASSE', which UPPER() never produces
+        self.assertEqual(
+            self.check_existence(self.vendor.pk, ['show straße', 'SHOW STRAßE', 'show strasse']),
+            [self.street.pk, self.street.pk, None]
+        )
+    #:
+
+    def test_unknown_vendor(self):
+        self.assertEqual(self.check_existence(self.vendor.pk + 100, ['show vlan']), [None])
+    #:
+#:
+
+
+class CaseInsensitiveUniqueTests(TestCase):
+    """Names that differ only by case are refused by the database constraints and by the serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='unique@example.com', password='Unique-Pass-1234')
+        cls.vendor = Vendor.objects.create(name='Cisco', created_by=cls.user)
+        cls.platform = Platform.objects.create(name='Catalyst', vendor=cls.vendor, created_by=cls.user)
+        cls.tag = Tag.objects.create(name='Routing', vendor=cls.vendor, created_by=cls.user)
+        Tag.objects.create(name='OSPF', vendor=cls.vendor, parent=cls.tag, created_by=cls.user)
+        Commands.objects.create(command='show version', vendor=cls.vendor, created_by=cls.user)
+    #:
+
+    def test_constraints(self):
+        for model, values in [
+            (Vendor, {'name': 'CISCO'}),
+            (Platform, {'name': 'catalyst', 'vendor': self.vendor}),
+            (Tag, {'name': 'ROUTING', 'vendor': self.vendor}),
+            (Tag, {'name': 'ospf', 'vendor': self.vendor, 'parent': self.tag}),
+            (Commands, {'command': 'SHOW VERSION', 'vendor': self.vendor}),
+        ]:
+            with self.subTest(model=model.__name__, **{key: str(value) for key, value in values.items()}):
+                with self.assertRaises(IntegrityError), transaction.atomic():
+                    model.objects.create(created_by=self.user, **values)
+                #:
+            #:
+        #:
+
+        # The same name under another vendor is fine
+        juniper = Vendor.objects.create(name='Juniper', created_by=self.user)
+        Commands.objects.create(command='SHOW VERSION', vendor=juniper, created_by=self.user)
+    #:
+
+    def test_serializers(self):
+        for serializer_class, data in [
+            (VendorFullSerializer, {'name': 'cisco'}),
+            (PlatformFullSerializer, {'name': 'CATALYST', 'vendor': self.vendor.pk}),
+            (TagFullSerializer, {'name': 'routing', 'vendor': self.vendor.pk}),
+            (TagFullSerializer, {'name': 'Ospf', 'vendor': self.vendor.pk, 'parent': self.tag.pk}),
+            (CommandFullSerializer, {'command': 'Show Version', 'vendor': self.vendor.pk}),
+        ]:
+            with self.subTest(serializer=serializer_class.__name__, **data):
+                serializer = serializer_class(data=data)
+                self.assertFalse(serializer.is_valid())
+                self.assertIn(next(iter(data)), serializer.errors)
+            #:
+        #:
+    #:
+#:
@@ -0,0 +1,203 @@
+"""
+
+Helpers for multi-file command uploads: reading the uploaded files (zip
+archives are expanded, spreadsheets are not), hashing the set for re-upload detection and parsing
+the files in parallel.
+
+Parallel parsing runs on one pool of COMMAND_IMPORT_PARSE_WORKERS processes
+per web process, shared by every upload, so concurrent uploads queue for
+those workers instead of each forking its own.
+
+"""
+
+import hashlib
+import io
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .parsing.csv_parsing import MergeParsedFiles
+from .parsing.registry import parse_upload, is_spreadsheet
+
+
+class UploadError(Exception):
+    pass
+#:
+
+
+def is_ignored_member(name: str) -> bool:
+    # Folders and the metadata files archivers like to add
+    base_name = name.rsplit('/', 1)[-1]
+    return name.endswith('/') or name.startswith('__MACOSX/') or base_name.startswith('.')
+#:
+
+
+def read_upload_files(uploaded_files) -> list:
+    """
+    Returns [(name, raw bytes)] for the uploaded files, with zip archives
+    replaced by their members ('archive.zip/member.csv').
+    """
+    files = []
+    total_bytes = 0
+
+    for uploaded_file in uploaded_files:
+        raw = uploaded_file.read()
+
+        if zipfile.is_zipfile(io.BytesIO(raw)) and not is_spreadsheet(uploaded_file.name, raw):
+            with zipfile.ZipFile(io.BytesIO(raw)) as archive:
+                for member in archive.infolist():
+                    if is_ignored_member(member.filename):
+                        continue
+                    #:
+
+                    # Check the declared size before inflating anything
+                    total_bytes += member.file_size
+                    if total_bytes > settings.COMMAND_UPLOAD_MAX_BYTES:
+                        raise UploadError('The uploaded files are too large once extracted.')
+                    #:
+                    files.append((f'{uploaded_file.name}/{member.filename}', archive.read(member)))
+                #:
+            #:
+        #:
+
+        else:
+            total_bytes += len(raw)
+            files.append((uploaded_file.name, raw))
+        #:
+
+        if len(files) > settings.COMMAND_UPLOAD_MAX_FILES:
+            raise UploadError(f'At most {settings.COMMAND_UPLOAD_MAX_FILES} files can be uploaded at once.')
+        #:
+    #:
+
+    if total_bytes > settings.COMMAND_UPLOAD_MAX_BYTES:
+        raise UploadError('The uploaded files are too large.')
+    #:
+
+    if not files:
+        raise UploadError('No files to import.')
+    #:
+
+    names = [name for name, _ in files]
+    if len(set(names)) != len(names):
+        raise UploadError('Two uploaded files have the same name.')
+    #:
+    return files
+#:
+
+
+def hash_upload_files(files: list) -> str:
+    """One hash for the whole set, independent of upload order."""
+    digest = hashlib.sha256()
+
+    for name, raw in sorted(files, key=lambda item: item[0]):
+        digest.update(name.encode())
+        digest.update(b'\0')
+        digest.update(hashlib.sha256(raw).digest())
+    #:
+    return digest.hexdigest()
+#:
+
+
+_parse_pool = None
+_parse_pool_workers = 0
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """The shared parse pool, started on first use (worker processes are forked as they're needed)."""
+    global _parse_pool, _parse_pool_workers
+
+    with _parse_pool_lock:
+        workers = settings.COMMAND_IMPORT_PARSE_WORKERS
+
+        if _parse_pool is None or _parse_pool_workers != workers:
+            if _parse_pool is not None:
+                _parse_pool.shutdown(wait=False)
+            #:
+            _parse_pool = ProcessPoolExecutor(max_workers=workers)
+            _parse_pool_workers = workers
+        #:
+        return _parse_pool
+    #:
+#:
+
+
+def discard_parse_pool(pool: ProcessPoolExecutor) -> None:
+    """Drops a pool whose worker died, the next upload starts a new one."""
+    global _parse_pool
+
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+        #:
+    #:
+    pool.shutdown(wait=False)
+#:
+
+
+def parse_upload_files(files: list, vendor_name: str, main_tag_name) -> tuple:
+    """
+    Parses every file (on the shared worker processes when there are several)
+    and returns (merged data, [(name, parsed data)]).
+    """
+    names = [name for name, _ in files]
+    contents = [raw for _, raw in files]
+    workers = min(len(files), settings.COMMAND_IMPORT_PARSE_WORKERS)
+
+    if workers > 1:
+        pool = get_parse_pool()
+
+        try:
+            parsed = list(pool.map(
+                parse_upload,
+                [vendor_name] * len(files),
+                [main_tag_name] * len(files),
+                names,
+                contents
+            ))
+        #:
+
+        except BrokenProcessPool:
+            discard_parse_pool(pool)
+            raise
+        #:
+    #:
+
+    else:
+        parsed = [parse_upload(vendor_name, main_tag_name, name, raw) for name, raw in files]
+    #:
+
+    parsed_files = list(zip(names, parsed))
+    return MergeParsedFiles(vendor_name, parsed_files), parsed_files
+#:
+
+
+def summarize_by_file(result: dict, parsed_files: list) -> list:
+    """Per-file breakdown of an import report produced from merged files."""
+    by_file = {
+        name: {
+            'file': name,
+            'total_commands_in_file': len(parsed_data.get('commands', [])),
+            'total_tags_in_file': len(parsed_data.get('tags', [])),
+            'commands_created': 0,
+            'commands_updated': 0,
+            'commands_skipped': 0,
+        }
+        for name, parsed_data in sorted(parsed_files, key=lambda item: item[0])
+    }
+
+    for detail_key, counter in (('created_commands', 'commands_created'),
+                                ('updated_commands', 'commands_updated'),
+                                ('skipped_commands', 'commands_skipped')):
+        for details in result['details'][detail_key]:
+            if details.get('file') in by_file:
+                by_file[details['file']][counter] += 1
+            #:
+        #:
+    #:
+    return list(by_file.values())
+#:
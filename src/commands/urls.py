@@ -25,7 +25,7 @@ urlpatterns = [
     # List all vendors
     path('vendors/get-all/', views.VendorListSet.as_view(), name='vendor-list'),
     
-    # Delete a specific vendor created by the current user (needs primary key)
+    # Delete a specific vendor created by the current user (needs primary key), answers 202 with the purge job
     path('vendors/my-delete/<int:pk>/', views.UserVendorDelete.as_view(), name='user-vendor-delete'),
 
 
@@ -51,6 +51,10 @@ urlpatterns = [
     
     # Allow any authenticated user to update a Tag
     path('tags/update/<int:pk>/', views.TagUpdateAPIView.as_view(), name='tag-update'),
+    # Re-parent a tag and its branch (POST {"parent": id or null, "merge": bool})
+    path('tags/move/<int:pk>/', views.TagMoveAPIView.as_view(), name='tag-move'),
+    # Merge a tag and its branch into another tag (POST {"target": id})
+    path('tags/merge/<int:pk>/', views.TagMergeAPIView.as_view(), name='tag-merge'),
     
     # List Tags created by the current user
     path('tags/my-list/', views.UserTagListSet.as_view(), name='user-tag-list'),
@@ -59,7 +63,7 @@ urlpatterns = [
     # List all Tags
     path('tags/get-all-tree/', views.TagTreeListSet.as_view(), name='tag-list-tree'),
     
-    # Delete a specific Tag created by the current user (needs primary key)
+    # Delete a specific Tag and its subtags created by the current user (needs primary key), answers 202 with the purge job
     path('tags/my-delete/<int:pk>/', views.UserTagDelete.as_view(), name='user-tag-delete'),
 
 
@@ -69,21 +73,50 @@ urlpatterns = [
     path('commands/create/', views.CommandCreateAPIView.as_view(), name='command-create'),
     # Allow any authenticated user to upload a CSV of commands
     path('commands/csv-upload', views.CommandCSVUploadView.as_view() , name = 'csv-upload'),
+    # Upload several CSV files (or zip archives of them) as one import
+    path('commands/csv-upload-multi', views.CommandMultiFileUploadView.as_view() , name = 'csv-upload-multi'),
     
     # Allow any authenticated user to update a Command (needs primary key)
     path('commands/update/<int:pk>/', views.CommandUpdateAPIView.as_view(), name='command-update'),
     
+    # Replace the parameters of many commands (POST {"commands": [{"command_id": .., "parameters": [..]}]})
+    path('commands/parameters/bulk-replace/', views.CommandParametersBulkReplaceView.as_view(), name='command-parameters-bulk-replace'),
+
     # Checks if a command exists based on its name and vendor ID
     path('commands/check-existence/', views.CommandExistsAPIView.as_view(), name='command-check-existence'),
+    # Checks many command names for one vendor at once (POST {"vendor_id": .., "names": [..]})
+    path('commands/check-existence/batch/', views.CommandExistsBatchAPIView.as_view(), name='command-check-existence-batch'),
     
     # List Commands created by the current user
     path('commands/my-list/', views.UserCommandListSet.as_view(), name='user-command-list'),
-    # List all Commands
+    # List all Commands (?include=parameters embeds each command's parameters)
     path('commands/get-all/', views.CommandListSet.as_view(), name='command-list'),
     # List all Commands with filtering options
     path('commands/get-filtered/', views.CommandFilteredListView.as_view(), name='command-list-filtered'),
+    # Counts per vendor/platform/tag/version, accepts the same filters as get-filtered
+    path('commands/facets/', views.CommandFacetsView.as_view(), name='command-facets'),
+    # Serialized row cache stats for this worker (hits, misses, bytes)
+    path('commands/row-cache-metrics/', views.CommandRowCacheMetricsView.as_view(), name='command-row-cache-metrics'),
+    # Everything changed or deleted since ?cursor= (optionally ?vendor_id=, ?limit=), for offline sync
+    path('commands/changes/', views.CommandChangesView.as_view(), name='command-changes'),
+    # Live create/update/delete events as text/event-stream (optionally ?vendor_id=), ASGI only
+    path('commands/events/', views.CommandEventsView.as_view(), name='command-events'),
     
     # Delete a specific Command created by the current user (needs primary key)
     path('commands/my-delete/<int:pk>/', views.UserCommandDelete.as_view(), name='user-command-delete'),
 
+
+    # --- Import Batch Paths ---
+    # List imports (optionally ?vendor_id=)
+    path('commands/import-batches/', views.ImportBatchListView.as_view(), name='import-batch-list'),
+    # Undo everything an import created or changed (needs primary key)
+    path('commands/import-batches/<int:pk>/rollback/', views.ImportBatchRollbackView.as_view(), name='import-batch-rollback'),
+
+
+    # --- Purge Job Paths ---
+    # Vendor and tag deletes run as background purges (optionally ?vendor_id=, ?status=)
+    path('commands/purge-jobs/', views.PurgeJobListView.as_view(), name='purge-job-list'),
+    # Progress of one purge (needs primary key)
+    path('commands/purge-jobs/<int:pk>/', views.PurgeJobDetailView.as_view(), name='purge-job-detail'),
+
 ]
@@ -0,0 +1,257 @@
+"""
+
+Values-based serializers for the read-only list endpoints.
+
+The list endpoints only read a few columns, yet a ModelSerializer builds a
+model instance per row and runs every field through its to_representation.
+The serializers here select the same columns with .values_list() (joining
+the related names in the same query) and zip them into plain dicts of the
+same shape. Tag paths (what Tag.__str__ returns) come from a tag id -> path
+map kept per process and refreshed when the taxonomy version moves, instead
+of walking the parents row by row.
+
+Each one mirrors a ModelSerializer in serializers.py; commands/tests.py
+checks that both produce the same output.
+
+"""
+
+import threading
+
+from rest_framework.response import Response
+
+from .cache import get_taxonomy_version
+from .changes import settle_horizon
+from .models import Tag, CommandParameter, Tombstone
+
+
+class TagPathMap:
+    """
+    Tag id -> full path ('Parent/Child'). Built from every tag once, then, each
+    time the taxonomy version moves, brought up to date from only the tags
+    changed (date_updated) and deleted (tombstones) since the last read; the
+    paths themselves are recomputed in memory. Reads go up to the change feed's
+    settle horizon (changes.py) and the next one starts there, so a tag written
+    by a transaction still committing at the time is picked up next time.
+    """
+
+    def __init__(self):
+        self._tags = {} # id -> (name, parent_id, vendor_id)
+        self._paths = {}
+        self._version = None
+        self._since = None
+        self._lock = threading.Lock()
+    #:
+
+    def get(self, tag_ids=()) -> dict:
+        """The current map; refreshed early if one of `tag_ids` is missing (a tag newer than the map)."""
+        version = get_taxonomy_version()
+
+        with self._lock:
+            if version == self._version and all(tag_id in self._paths for tag_id in tag_ids):
+                return self._paths
+            #:
+
+            self.refresh()
+
+            if not all(tag_id in self._paths for tag_id in tag_ids):
+                self.refresh(full=True)
+            #:
+
+            self._version = version
+            return self._paths
+        #:
+    #:
+
+    def refresh(self, full: bool = False) -> None:
+        # Caller holds the lock
+        since, horizon = self._since, settle_horizon()
+        fields = ('id', 'name', 'parent_id', 'vendor_id')
+
+        if full or since is None:
+            self._tags = {pk: tag for pk, *tag in Tag.objects.values_list(*fields)}
+        #:
+
+        else:
+            for pk, *tag in Tag.objects.filter(date_updated__gte=since).values_list(*fields):
+                self._tags[pk] = tuple(tag)
+            #:
+
+            deleted = Tombstone.objects.filter(
+                date_deleted__gte=since, model_name__in=[Tombstone.MODEL_TAG, Tombstone.MODEL_VENDOR]
+            ).values_list('model_name', 'object_id')
+            self.forget(list(deleted))
+        #:
+
+        self._paths = self.build(self._tags)
+        self._since = horizon
+    #:
+
+    def forget(self, deleted: list) -> None:
+        """Drops deleted tags with their subtags (a tag's tombstone stands for its subtree) and deleted vendors' tags."""
+        vendor_ids = {pk for model_name, pk in deleted if model_name == Tombstone.MODEL_VENDOR}
+        gone = {pk for model_name, pk in deleted if model_name == Tombstone.MODEL_TAG}
+
+        if not gone and not vendor_ids:
+            return
+        #:
+
+        children = {}
+        for pk, (_, parent_id, vendor_id) in self._tags.items():
+            children.setdefault(parent_id, []).append(pk)
+
+            if vendor_id in vendor_ids:
+                gone.add(pk)
+            #:
+        #:
+
+        pending = list(gone)
+        while pending:
+            for child in children.get(pending.pop(), []):
+                if child not in gone:
+                    gone.add(child)
+                    pending.append(child)
+                #:
+            #:
+        #:
+
+        for pk in gone:
+            self._tags.pop(pk, None)
+        #:
+    #:
+
+    def build(self, tags: dict) -> dict:
+        paths = {}
+
+        for pk in tags:
+            # Walk up to the first tag whose path is known, then fill in on the way down
+            chain = []
+            current = pk
+
+            while current is not None and current not in paths and current in tags and current not in chain:
+                chain.append(current)
+                current = tags[current][1]
+            #:
+
+            prefix = paths.get(current)
+
+            for tag_id in reversed(chain):
+                name = tags[tag_id][0]
+                prefix = f"{prefix}/{name}" if prefix else name
+                paths[tag_id] = prefix
+            #:
+        #:
+        return paths
+    #:
+#:
+
+
+tag_paths = TagPathMap()
+
+
+class ValuesSerializer:
+    """
+    Read-only, list-only counterpart of a ModelSerializer. `fields` pairs each
+    output key with the .values_list() lookup that fills it.
+    """
+
+    fields = ()
+
+    def values(self, queryset):
+        """The lazy values_list() query behind the rows (can be sliced and counted)."""
+        return queryset.values_list(*[lookup for _, lookup in self.fields])
+    #:
+
+    def to_rows(self, values) -> list:
+        names = [name for name, _ in self.fields]
+        return [dict(zip(names, row)) for row in values]
+    #:
+
+    def keyed_rows(self, queryset) -> list:
+        """[((pk, date_updated), row)] for the serialized row cache (rowcache.py)."""
+        values = list(queryset.values_list(*[lookup for _, lookup in self.fields], 'pk', 'date_updated'))
+        rows = self.to_rows([row[:-2] for row in values])
+        return [(row[-2:], data) for row, data in zip(values, rows)]
+    #:
+#:
+
+
+class VendorBasicValuesSerializer(ValuesSerializer):
+    fields = (('id', 'id'), ('name', 'name'))
+#:
+
+
+class PlatformBasicValuesSerializer(ValuesSerializer):
+    fields = (('id', 'id'), ('name', 'name'))
+#:
+
+
+class TagBasicValuesSerializer(ValuesSerializer):
+    fields = (('id', 'id'), ('name', 'name'))
+#:
+
+
+class CommandBasicValuesSerializer(ValuesSerializer):
+    # Same keys as CommandBasicSerializer; vendor/platform/tag are their __str__
+    fields = (
+        ('id', 'id'),
+        ('command', 'command'),
+        ('description', 'description'),
+        ('example', 'example'),
+        ('version', 'version'),
+        ('vendor', 'vendor__name'),
+        ('platform', 'platform__name'),
+        ('tag', 'tag_id'),
+        ('method', 'method'),
+    )
+
+    def to_rows(self, values) -> list:
+        rows = super().to_rows(values)
+        tag_ids = {row['tag'] for row in rows if row['tag'] is not None}
+        paths = tag_paths.get(tag_ids) if tag_ids else {}
+
+        for row in rows:
+            if row['tag'] is not None:
+                row['tag'] = paths.get(row['tag'])
+            #:
+        #:
+        return rows
+    #:
+#:
+
+
+class CommandBasicParametersValuesSerializer(CommandBasicValuesSerializer):
+    """CommandBasicParametersSerializer: the parameters of every row come from one extra query."""
+
+    def to_rows(self, values) -> list:
+        rows = super().to_rows(values)
+        parameters = {}
+
+        queryset = CommandParameter.objects.filter(command_id__in=[row['id'] for row in rows]).order_by('id')
+        for command_id, pk, value in queryset.values_list('command_id', 'id', 'value'):
+            parameters.setdefault(command_id, []).append({'id': pk, 'value': value})
+        #:
+
+        for row in rows:
+            row['parameters'] = parameters.get(row['id'], [])
+        #:
+        return rows
+    #:
+#:
+
+
+class ValuesListMixin:
+    """list() for ListAPIViews with a `values_serializer_class`: no model instances are built."""
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.values_serializer_class()
+        values = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(values)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_rows(page))
+        #:
+        return Response(serializer.to_rows(values))
+    #:
+#:
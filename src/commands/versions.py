@@ -0,0 +1,100 @@
+"""
+
+Sortable keys for command versions.
+
+`Commands.version` is free text shaped like 15.2.3 or 15.2(3)T, which sorts
+wrong as a string (15.10 < 15.9) and can only be searched with a scan. Its
+key spells every numeric part as a kind digit (1 for a dotted part, 2 for the
+one in parentheses) and a fixed width run of digits, followed by the train
+letter if there is one:
+
+    15.2       -> 10000151000002
+    15.2.3     -> 100001510000021000003
+    15.2(3)T   -> 100001510000022000003T
+    15.10.1    -> 100001510000101000001
+
+Plain string order of the keys is version order, and since the keys are only
+digits and one upper-case letter it holds under any database collation. A
+release sorts after its prefix (15.2 < 15.2.1), a release in parentheses after
+the dotted ones of the same prefix (15.2.9 < 15.2(1)), and a lettered release
+after both. The kind digit keeps 15.2.3 and 15.2(3) apart.
+
+A version with a part longer than the fixed width, or with more parts than
+fit in VERSION_KEY_MAX_LENGTH, has no key: it could not be ordered against
+the others. Range filters refuse such values (version_key_validator).
+
+"""
+
+import re
+
+from django.core.exceptions import ValidationError
+
+
+VERSION_KEY_SEGMENT_WIDTH = 6
+VERSION_KEY_MAX_LENGTH = 80
+
+# Kind digits written before each numeric part
+VERSION_KEY_DOTTED = '1'
+VERSION_KEY_PARENTHESISED = '2'
+
+VERSION_PATTERN = re.compile(r'^(\d+(?:\.\d+)+)(?:\((\d+)\))?([A-Za-z])?$')
+
+
+def version_key(version: str):
+    """The sort key of `version`, None when it is empty or not a version_validator shaped string."""
+    match = VERSION_PATTERN.match((version or '').strip())
+
+    if match is None:
+        return None
+    #:
+
+    numbers, inner, letter = match.groups()
+    segments = [(VERSION_KEY_DOTTED, number) for number in numbers.split('.')]
+
+    if inner:
+        segments.append((VERSION_KEY_PARENTHESISED, inner))
+    #:
+
+    if any(len(number.lstrip('0')) > VERSION_KEY_SEGMENT_WIDTH for kind, number in segments):
+        return None # Would not sort right against the padded ones
+    #:
+
+    key = ''.join(kind + str(int(number)).zfill(VERSION_KEY_SEGMENT_WIDTH) for kind, number in segments) + (letter or '').upper()
+
+    if len(key) > VERSION_KEY_MAX_LENGTH:
+        return None # Cut short it would compare equal to other versions
+    #:
+    return key
+#:
+
+
+def version_key_validator(value: str) -> None:
+    """For version filter values: they have to have a key to compare with."""
+    if version_key(value) is None:
+        raise ValidationError(
+            f"Versions with parts of more than {VERSION_KEY_SEGMENT_WIDTH} digits, "
+            f"or too many parts, can't be compared."
+        )
+    #:
+#:
+
+
+def version_upper_bound(version: str):
+    """
+    Exclusive key bound for "`version` or earlier", sub-releases included:
+    15.2 -> the key of 15.3, so 15.2.9 and 15.2(3)T are still below it.
+    None when `version` ends in a letter (the key itself is then the bound, inclusive).
+    """
+    key = version_key(version)
+
+    if key is None or not key[-1].isdigit():
+        return None
+    #:
+
+    head, last = key[:-VERSION_KEY_SEGMENT_WIDTH], int(key[-VERSION_KEY_SEGMENT_WIDTH:])
+
+    if last + 1 >= 10 ** VERSION_KEY_SEGMENT_WIDTH:
+        return None
+    #:
+    return head + str(last + 1).zfill(VERSION_KEY_SEGMENT_WIDTH)
+#:
@@ -2,7 +2,7 @@ from commands.models import Commands
 import django_filters.rest_framework
 
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.generics import CreateAPIView, ListAPIView, UpdateAPIView, DestroyAPIView
+from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView, DestroyAPIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.permissions import AllowAny
 from rest_framework.pagination import PageNumberPagination
@@ -11,14 +11,35 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db import transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from .serializers import CSVUploadSerializer
 
-from .models import Vendor, Platform, Tag, Commands
+from .models import Vendor, Platform, Tag, Commands, CommandParameter, CommandUpload, ImportBatch, PurgeJob
 from .serializers import *
 from .filters import CommandFilter
-from .parsing.csv_parsing import ParseCsv
-import chardet
+from .facets import cached_command_facets
+from .changes import collect_changes, decode_cursor, InvalidCursor
+from .events import stream_events
+from .rowcache import CachedRowListMixin, row_cache
+from .values import (
+    ValuesListMixin, VendorBasicValuesSerializer, PlatformBasicValuesSerializer,
+    TagBasicValuesSerializer, CommandBasicValuesSerializer, CommandBasicParametersValuesSerializer
+)
+from .purging import enqueue_purge
+from .bulk import replace_parameters
+from .reorganizing import move_tag, merge_tags, TagTreeError, TagNameConflict
+from .importing import CommandImporter, record_upload, rollback_import_batch, RollbackError
+import hashlib
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 class CommandPagination(PageNumberPagination):
@@ -28,8 +49,21 @@ class CommandPagination(PageNumberPagination):
 #:
 
 
+class PurgeOnDestroyMixin:
+    """
+    destroy() for vendors and tags: the delete runs in the background as a
+    purge job (commands/purging.py), the response is the job to poll.
+    """
+
+    def destroy(self, request, *args, **kwargs):
+        job, _ = enqueue_purge(self.get_object(), request.user)
+        return Response(PurgeJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    #:
+#:
+
+
 # CRUD Admin
-class AdminVendorViewSet(ModelViewSet):
+class AdminVendorViewSet(PurgeOnDestroyMixin, ModelViewSet):
     queryset = Vendor.objects.all()
     serializer_class = VendorFullSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -73,15 +107,16 @@ class UserVendorListSet(ListAPIView):
     #:
 #:
 
-class VendorListSet(ListAPIView):
+class VendorListSet(ValuesListMixin, ListAPIView):
     queryset = Vendor.objects.all()
     serializer_class = VendorBasicSerializer
+    values_serializer_class = VendorBasicValuesSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
 #:
 
 # Delete
-class UserVendorDelete(DestroyAPIView):
+class UserVendorDelete(PurgeOnDestroyMixin, DestroyAPIView):
     serializer_class = VendorFullSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
 
@@ -144,9 +179,10 @@ class UserPlatformListSet(ListAPIView):
     #:
 #:
 
-class PlatformListSet(ListAPIView):
+class PlatformListSet(ValuesListMixin, ListAPIView):
     queryset = Platform.objects.all()
     serializer_class = PlatformBasicSerializer
+    values_serializer_class = PlatformBasicValuesSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
 
@@ -179,7 +215,7 @@ class UserPlatformDelete(DestroyAPIView):
 # Tags
 
 # CRUD Admin
-class AdminTagViewSet(ModelViewSet):
+class AdminTagViewSet(PurgeOnDestroyMixin, ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagFullSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -212,6 +248,66 @@ class TagUpdateAPIView(UpdateAPIView):
     #:
 #:
 
+# Re-parent a tag with its whole branch
+class TagMoveAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, pk, *args, **kwargs):
+        try:
+            tag = Tag.objects.get(pk=pk)
+        #:
+
+        except Tag.DoesNotExist:
+            return Response({'error': 'Tag not found.'}, status=status.HTTP_404_NOT_FOUND)
+        #:
+
+        serializer = TagMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            counts = move_tag(tag, serializer.validated_data['parent'], serializer.validated_data['merge'])
+        #:
+
+        except TagNameConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        #:
+
+        except TagTreeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        #:
+
+        return Response({'message': 'Tag moved.', **counts}, status=status.HTTP_200_OK)
+    #:
+#:
+
+# Fold a tag (and its branch) into another one
+class TagMergeAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, pk, *args, **kwargs):
+        try:
+            tag = Tag.objects.get(pk=pk)
+        #:
+
+        except Tag.DoesNotExist:
+            return Response({'error': 'Tag not found.'}, status=status.HTTP_404_NOT_FOUND)
+        #:
+
+        serializer = TagMergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            counts = merge_tags(tag, serializer.validated_data['target'])
+        #:
+
+        except TagTreeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        #:
+
+        return Response({'message': 'Tags merged.', **counts}, status=status.HTTP_200_OK)
+    #:
+#:
+
 # Read
 class UserTagListSet(ListAPIView):
     serializer_class = TagFullSerializer
@@ -230,9 +326,10 @@ class UserTagListSet(ListAPIView):
     #:
 #:
 
-class TagListSet(ListAPIView):
+class TagListSet(ValuesListMixin, ListAPIView):
     queryset = Tag.objects.all()
     serializer_class = TagBasicSerializer
+    values_serializer_class = TagBasicValuesSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
 
@@ -269,7 +366,7 @@ class TagTreeListSet(ListAPIView):
 #:
 
 # Delete
-class UserTagDelete(DestroyAPIView):
+class UserTagDelete(PurgeOnDestroyMixin, DestroyAPIView):
     serializer_class = TagFullSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
 
@@ -283,9 +380,48 @@ class UserTagDelete(DestroyAPIView):
 # Commands
 
 # CRUD Admin
-class AdminCommandViewSet(ModelViewSet):
+class IncludeParametersMixin:
+    """
+    `?include=parameters` swaps in the serializers that embed each command's
+    parameters, prefetched with one query for the whole page instead of one
+    per command.
+    """
+
+    parameters_serializer_class = None
+    parameters_values_serializer_class = None
+
+    def include_parameters(self) -> bool:
+        return 'parameters' in self.request.query_params.get('include', '').split(',')
+    #:
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if self.include_parameters():
+            queryset = queryset.prefetch_related(Prefetch('parameters', queryset=CommandParameter.objects.order_by('id')))
+        #:
+        return queryset
+    #:
+
+    def get_serializer_class(self):
+        if self.include_parameters():
+            return self.parameters_serializer_class
+        #:
+        return super().get_serializer_class()
+    #:
+
+    def get_values_serializer_class(self):
+        if self.include_parameters():
+            return self.parameters_values_serializer_class
+        #:
+        return super().get_values_serializer_class()
+    #:
+#:
+
+class AdminCommandViewSet(IncludeParametersMixin, CachedRowListMixin, ModelViewSet):
     queryset = Commands.objects.all()
     serializer_class = CommandFullSerializer
+    parameters_serializer_class = CommandFullParametersSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
 #:
 
@@ -315,6 +451,21 @@ class CommandUpdateAPIView(UpdateAPIView):
         serializer.save()
 #:
 
+# Replaces the parameters of many commands at once
+class CommandParametersBulkReplaceView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = CommandParametersBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        counts = replace_parameters({
+            item['command_id']: item['parameters'] for item in serializer.validated_data['commands']
+        })
+        return Response({'message': 'Parameters replaced.', **counts}, status=status.HTTP_200_OK)
+    #:
+#:
+
 # Checks if the command exists
 class CommandExistsAPIView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -357,21 +508,64 @@ class CommandExistsAPIView(APIView):
     #:
 #:
 
+# Checks which of many commands exist for a vendor
+class CommandExistsBatchAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = CommandExistsBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        vendor_id = serializer.validated_data['vendor_id']
+        names = serializer.validated_data['names']
+
+        # One set-based query on the (UPPER(command), vendor) unique index. The database
+        # upper-cases both sides and hands back the submitted name each row matched:
+        # Python's str.upper() disagrees with SQL UPPER() outside ASCII ('ß' -> 'SS',
+        # SQLite leaves non-ASCII letters alone), so keys computed here would miss.
+        # An unknown vendor simply matches nothing.
+        submitted = list(dict.fromkeys(names))
+        quote = connection.ops.quote_name
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT submitted.column1, {quote("id")} '
+                f'FROM (VALUES {", ".join(["(%s)"] * len(submitted))}) submitted '
+                f'JOIN {quote(Commands._meta.db_table)} '
+                f'ON UPPER({quote("command")}) = UPPER(submitted.column1) AND {quote("vendor_id")} = %s',
+                [*submitted, vendor_id]
+            )
+            existing = dict(cursor.fetchall())
+        #:
+
+        # Ids are returned in the same order as the submitted names, null when missing
+        return Response(
+            {'ids': [existing.get(name) for name in names]},
+            status=status.HTTP_200_OK
+        )
+    #:
+#:
+
 # Read
-class UserCommandListSet(ListAPIView):
+class UserCommandListSet(IncludeParametersMixin, CachedRowListMixin, ListAPIView):
+    queryset = Commands.objects.all().select_related('vendor', 'platform', 'tag')
     serializer_class = CommandFullSerializer
+    parameters_serializer_class = CommandFullParametersSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
     pagination_class = CommandPagination
 
     def get_queryset(self):
         user = self.request.user
-        return Commands.objects.filter(created_by=user).select_related('vendor', 'platform', 'tag')
+        return super().get_queryset().filter(created_by=user)
     #:
 #:
 
-class CommandListSet(ListAPIView):
+class CommandListSet(IncludeParametersMixin, CachedRowListMixin, ListAPIView):
     queryset = Commands.objects.all().select_related('vendor', 'platform', 'tag')
     serializer_class = CommandBasicSerializer
+    values_serializer_class = CommandBasicValuesSerializer
+    parameters_serializer_class = CommandBasicParametersSerializer
+    parameters_values_serializer_class = CommandBasicParametersValuesSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
     pagination_class = CommandPagination
@@ -389,9 +583,12 @@ class UserCommandDelete(DestroyAPIView):
 #:
 
 # Filtered List
-class CommandFilteredListView(ListAPIView):
+class CommandFilteredListView(IncludeParametersMixin, CachedRowListMixin, ListAPIView):
     queryset = Commands.objects.all().select_related('vendor', 'platform', 'tag')
     serializer_class = CommandBasicSerializer
+    values_serializer_class = CommandBasicValuesSerializer
+    parameters_serializer_class = CommandBasicParametersSerializer
+    parameters_values_serializer_class = CommandBasicParametersValuesSerializer
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
     filterset_class = CommandFilter # Point to filter class
     permission_classes = [AllowAny]
@@ -399,13 +596,126 @@ class CommandFilteredListView(ListAPIView):
     pagination_class = CommandPagination
 #:
 
+# Hit rate and size of the serialized row cache in this process
+class CommandRowCacheMetricsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(row_cache.metrics())
+    #:
+#:
+
+# Facet counts for the filter sidebars, takes the same params as the filtered list
+class CommandFacetsView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        filterset = CommandFilter(request.query_params, queryset=Commands.objects.all())
+
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        #:
+
+        # Only the filter params take part in the key, in a stable order
+        params = sorted(
+            (name, value) for name, value in filterset.form.cleaned_data.items() if value not in (None, '')
+        )
+        return Response(cached_command_facets(params, filterset.qs), status=status.HTTP_200_OK)
+    #:
+#:
+
+
+# Changes since a cursor, for clients syncing an offline copy (see changes.py)
+class CommandChangesView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        cursor = request.query_params.get('cursor', '')
+        vendor_id = request.query_params.get('vendor_id', None)
+        limit = request.query_params.get('limit', None)
+
+        try:
+            vendor_id = int(vendor_id) if vendor_id is not None else None
+            limit = min(int(limit), settings.COMMAND_CHANGES_MAX_PAGE_SIZE) if limit is not None else None
+        #:
+
+        except ValueError:
+            return Response({'error': 'vendor_id and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        #:
+
+        if limit is not None and limit < 1:
+            return Response({'error': 'limit must be at least 1.'}, status=status.HTTP_400_BAD_REQUEST)
+        #:
+
+        try:
+            changes = collect_changes(cursor=cursor, vendor_id=vendor_id, limit=limit)
+        #:
+
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        #:
+        return Response(changes, status=status.HTTP_200_OK)
+    #:
+#:
+
+
+# Live catalog changes as server-sent events (see events.py). A plain async
+# Django view: DRF views are sync, and a sync view would hold a worker per client
+class CommandEventsView(View):
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'error': 'The event stream is only served through the ASGI application.'}, status=501)
+        #:
+
+        vendor_id = request.GET.get('vendor_id', None)
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('cursor', '')
+
+        try:
+            vendor_id = int(vendor_id) if vendor_id is not None else None
+            decode_cursor(last_event_id)
+        #:
+
+        except (ValueError, InvalidCursor):
+            return JsonResponse({'error': 'Invalid vendor_id or cursor.'}, status=400)
+        #:
+
+        response = StreamingHttpResponse(stream_events(vendor_id, last_event_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep proxies (nginx) from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    #:
+#:
+
 
 # --- CSV Upload View ---
+def previous_upload_response(message: str, upload_options: dict) -> Response:
+    """The stored result of the newest upload recorded with the same file and options."""
+    previous_upload = CommandUpload.objects.filter(**upload_options).first()
+
+    return Response(
+        {
+            'message': message,
+            'duplicate_upload': True,
+            'previous_upload_date': previous_upload.date_created,
+            'data': previous_upload.result,
+        },
+        status=status.HTTP_200_OK
+    )
+#:
+
+
 class CommandCSVUploadView(APIView):
     parser_classes = (MultiPartParser, FormParser)
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     def post(self, request, *args, **kwargs):
+        # Upload-only dependencies (chardet, the parsers) load on the first upload, not at startup
+        from .parsing.registry import parse_upload, UnsupportedFormatError
+
         serializer = CSVUploadSerializer(data=request.data)
 
         if serializer.is_valid():
@@ -413,228 +723,63 @@ class CommandCSVUploadView(APIView):
             vendor_obj = serializer.validated_data.get('vendor')
             main_tag_obj = serializer.validated_data.get('main_tag')
             override_existing = serializer.validated_data.get('override')
-
-            # Lists to store detailed results
-            created_commands_details = []
-            updated_commands_details = []
-            skipped_commands_details = []
-            created_tags_details = []
+            force_import = serializer.validated_data.get('force')
 
             try:
                 raw_file_content = csv_file.read()
+                content_hash = hashlib.sha256(raw_file_content).hexdigest()
 
-                detection_result = chardet.detect(raw_file_content)
-                detected_encoding = detection_result['encoding']
+                upload_options = dict(content_hash=content_hash, vendor=vendor_obj, main_tag=main_tag_obj, override=override_existing)
+                duplicate_message = 'This CSV file was already imported with the same options. No changes were made.'
 
-                try:
-                    decoded_file = raw_file_content.decode(detected_encoding)
-                #:
-                
-                except (UnicodeDecodeError, TypeError):
-                    print(f"Failed to decode with {detected_encoding}. Attempting UTF-8 fallback.")
-                    decoded_file = raw_file_content.decode('utf-8', errors='replace')
+                # The same file with the same options was imported before: answer with that
+                # result instead of parsing and writing every row again
+                if not force_import and CommandUpload.objects.filter(**upload_options).exists():
+                    return previous_upload_response(duplicate_message, upload_options)
                 #:
-                
-                parsed_data = ParseCsv(
+
+                # CSV, XLSX, JSON Lines or YAML, detected from the upload
+                parsed_data = parse_upload(
                     vendor_name=vendor_obj.name,
-                    csv_file_content=decoded_file,
-                    main_tag_name_for_csv_context=main_tag_obj.name if main_tag_obj else None
+                    main_tag_name=main_tag_obj.name if main_tag_obj else None,
+                    file_name=csv_file.name,
+                    raw=raw_file_content
                 )
 
-                total_commands_processed = len(parsed_data.get('commands', []))
-                total_tags_processed = len(parsed_data.get('tags', []))
-
                 with transaction.atomic():
-                    csv_parsed_tags_parent = main_tag_obj
-
-                    # Handle main_tag_obj being a name from input and needing creation as root
-                    if csv_parsed_tags_parent is None and serializer.initial_data.get('main_tag'):
-                        main_tag_name_from_input = serializer.initial_data.get('main_tag')
-                        
-                        csv_parsed_tags_parent, created = Tag.objects.get_or_create(
-                            name__iexact=main_tag_name_from_input,
-                            vendor=vendor_obj,
-                            parent__isnull=True,
-                            defaults={
-                                'name': main_tag_name_from_input,
-                                'created_by': request.user if request.user.is_authenticated else None
-                            }
-                        )
-                        
-                        if created:
-                            created_tags_details.append({
-                                'name': csv_parsed_tags_parent.name,
-                                'parent': csv_parsed_tags_parent.parent.name if csv_parsed_tags_parent.parent else None,
-                                'status': 'Created (Main Tag)'
-                            })
-                        #:
-                    #:
-                    
-                    # Process tags found in CSV
-                    for cat_info in parsed_data.get('tags', []):
-                        tag_name = cat_info['name']
-                        
-                        if csv_parsed_tags_parent and tag_name.lower() == csv_parsed_tags_parent.name.lower():
-                            # This is the main tag itself, not a new child created from CSV
-                            tag_obj = csv_parsed_tags_parent
-                            created = False
-                        #:
-                        
-                        else:
-                            tag_obj, created = Tag.objects.get_or_create(
-                                name__iexact=tag_name,
-                                vendor=vendor_obj,
-                                parent=csv_parsed_tags_parent,
-                                defaults={
-                                    'name': tag_name,
-                                    'created_by': request.user if request.user.is_authenticated else None
-                                }
-                            )
-                        #:
-                        
-                        if created:
-                            created_tags_details.append({
-                                'name': tag_obj.name,
-                                'parent': tag_obj.parent.name if tag_obj.parent else None,
-                                'status': 'Created'
-                            })
-                        #:
-
-
-                    # Process Commands
-                    for cmd_info in parsed_data.get('commands', []):
-                        command_name = cmd_info['command']
-                        description = cmd_info['description']
-                        example = cmd_info['example']
-                        csv_tag_name = cmd_info['tag'] # This is the specific tag for THIS command
-
-                        final_command_tag_obj = None
-
-                        if csv_tag_name:
-                            try:
-                                final_command_tag_obj = Tag.objects.get(
-                                    name__iexact=csv_tag_name,
-                                    vendor=vendor_obj,
-                                    parent=csv_parsed_tags_parent # Ensure it's under the desired parent
-                                )
-                            #:
-                            
-                            except Tag.DoesNotExist:
-                                # If it doesn't exist, create it under the 'csv_parsed_tags_parent'
-                                final_command_tag_obj, _ = Tag.objects.get_or_create(
-                                    name__iexact=csv_tag_name,
-                                    vendor=vendor_obj,
-                                    parent=csv_parsed_tags_parent, # Assign parent here
-                                    defaults={
-                                        'name': csv_tag_name,
-                                        'created_by': request.user if request.user.is_authenticated else None
-                                    }
-                                )
-                                if _:
-                                    created_tags_details.append({
-                                        'name': final_command_tag_obj.name,
-                                        'parent': final_command_tag_obj.parent.name if final_command_tag_obj.parent else None,
-                                        'status': 'Created (from Command Tag)'
-                                    })
-                            #:
-                        #:
-                        
-                        elif csv_parsed_tags_parent:
-                            final_command_tag_obj = csv_parsed_tags_parent
-                        #:
-
-                        
-                        platform_obj, _ = Platform.objects.get_or_create( 
-                            name='N/A',
-                            vendor=vendor_obj,
-                            defaults={'created_by': request.user if request.user.is_authenticated else None}
-                        )
-
-                        lookup_params = {
-                            'command__iexact': command_name,
-                            'vendor': vendor_obj,
-                        }
-                        
-                        defaults = {
-                            'command': command_name,
-                            'description': description,
-                            'example': example,
-                            'tag': final_command_tag_obj,
-                            'platform': platform_obj,
-                            'created_by': request.user if request.user.is_authenticated else None,
-                            'method': 'BULK'
-                        }
-
-                        try:
-                            
-                            command_obj, created = Commands.objects.update_or_create(
-                                **lookup_params,
-                                defaults=defaults
-                            )
-                            
-                            if created:
-                                created_commands_details.append({
-                                    'command': command_obj.command,
-                                    'description': command_obj.description,
-                                    'tag': command_obj.tag.name if command_obj.tag else 'N/A',
-                                    'status': 'Created Successfully'
-                                })
-                            #:
-                                
-                            elif override_existing: # If the command was note created and a the override bool is true
-                                updated_commands_details.append({
-                                    'command': command_obj.command,
-                                    'description': command_obj.description,
-                                    'tag': command_obj.tag.name if command_obj.tag else 'N/A',
-                                    'status': 'Updated Successfully'
-                                })
-                            #:
-                                
-                            else: # Existed, but update_existing is False, so skip
-                                skipped_commands_details.append({
-                                    'command': command_name,
-                                    'reason': 'Command already exists and update_existing flag is false',
-                                    'status': 'Skipped'
-                                })
-                            #:
-                            
-                        except Exception as create_error:
-                            # Catching any other errors during command creation (e.g., validation)
-                            skipped_commands_details.append({
-                                'command': command_name,
-                                'reason': f'Error during creation/updating: {str(create_error)}',
-                                'status': 'Failed'
-                            })
-                            print(f"Error creating/updating command '{command_name}': {create_error}")
-                        #:
+                    upload = record_upload(**upload_options, force=force_import, user=request.user)
+
+                    if upload is None:
+                        # An identical upload got recorded while this one was parsing
+                        return previous_upload_response(duplicate_message, upload_options)
                     #:
 
+                    result = CommandImporter(
+                        vendor=vendor_obj,
+                        main_tag=main_tag_obj,
+                        override=override_existing,
+                        user=request.user,
+                        upload=upload
+                    ).run(parsed_data)
+
+                    upload.result = result
+                    upload.save(update_fields=['result'])
+                #:
+
                 return Response(
                     {
                         'message': 'CSV file upload process completed.',
-                        'data': {
-                            'vendor_name': vendor_obj.name,
-                            'main_tag_name': main_tag_obj.name if main_tag_obj else 'N/A',
-                            'summary': {
-                                'total_commands_in_csv': total_commands_processed,
-                                'commands_created': len(created_commands_details),
-                                'commands_updated': len(updated_commands_details),
-                                'commands_skipped': len(skipped_commands_details),
-                                'total_tags_in_csv': total_tags_processed,
-                                'tags_created': len(created_tags_details),
-                            },
-                            'details': {
-                                'created_commands': created_commands_details,
-                                'updated_commands': updated_commands_details,
-                                'skipped_commands': skipped_commands_details,
-                                'created_tags': created_tags_details,
-                            }
-                        }
+                        'duplicate_upload': False,
+                        'data': result
                     },
                     status=status.HTTP_200_OK
                 )
             #:
 
+            except UnsupportedFormatError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            #:
+
             except Exception as e:
                 import traceback
                 print(f"\n--- DEBUG: Exception during processing ---")
@@ -654,3 +799,177 @@ class CommandCSVUploadView(APIView):
         #:
     #:
 #:
+
+
+# --- Multi-file Upload View ---
+class CommandMultiFileUploadView(APIView):
+    """
+    Imports several command files, or zip archives of them, as one import:
+    the files are parsed in parallel, merged in file name order and written
+    in a single batch. The report is also broken down per file.
+    """
+    parser_classes = (MultiPartParser, FormParser)
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        # Upload-only dependencies (chardet, the parsers, zipfile) load on the first upload, not at startup
+        import zipfile
+        from .parsing.registry import UnsupportedFormatError
+        from .uploads import read_upload_files, hash_upload_files, parse_upload_files, summarize_by_file, UploadError
+
+        serializer = MultiFileUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        vendor_obj = serializer.validated_data.get('vendor')
+        main_tag_obj = serializer.validated_data.get('main_tag')
+        override_existing = serializer.validated_data.get('override')
+        force_import = serializer.validated_data.get('force')
+
+        try:
+            files = read_upload_files(serializer.validated_data.get('files'))
+        #:
+
+        except (UploadError, zipfile.BadZipFile) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        #:
+
+        upload_options = dict(content_hash=hash_upload_files(files), vendor=vendor_obj, main_tag=main_tag_obj, override=override_existing)
+        duplicate_message = 'These files were already imported with the same options. No changes were made.'
+
+        if not force_import and CommandUpload.objects.filter(**upload_options).exists():
+            return previous_upload_response(duplicate_message, upload_options)
+        #:
+
+        try:
+            parsed_data, parsed_files = parse_upload_files(
+                files,
+                vendor_name=vendor_obj.name,
+                main_tag_name=main_tag_obj.name if main_tag_obj else None
+            )
+
+            with transaction.atomic():
+                upload = record_upload(**upload_options, force=force_import, user=request.user)
+
+                if upload is None:
+                    # An identical upload got recorded while these were parsing
+                    return previous_upload_response(duplicate_message, upload_options)
+                #:
+
+                result = CommandImporter(
+                    vendor=vendor_obj,
+                    main_tag=main_tag_obj,
+                    override=override_existing,
+                    user=request.user,
+                    upload=upload
+                ).run(parsed_data)
+                result['files'] = summarize_by_file(result, parsed_files)
+
+                upload.result = result
+                upload.save(update_fields=['result'])
+            #:
+        #:
+
+        except UnsupportedFormatError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        #:
+
+        except Exception as e:
+            logger.exception("Multi-file import failed")
+            return Response(
+                {'error': f'An error occurred during file processing and import: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        #:
+
+        return Response(
+            {
+                'message': f'{len(files)} files imported.',
+                'duplicate_upload': False,
+                'data': result
+            },
+            status=status.HTTP_200_OK
+        )
+    #:
+#:
+
+# --- Import Batches ---
+class ImportBatchListView(ListAPIView):
+    serializer_class = ImportBatchSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = CommandPagination
+
+    def get_queryset(self):
+        queryset = ImportBatch.objects.all()
+
+        # Add filtering by vendor_id
+        vendor_id = self.request.query_params.get('vendor_id', None)
+
+        if vendor_id is not None:
+            queryset = queryset.filter(vendor=vendor_id)
+        #:
+        return queryset
+    #:
+#:
+
+# Vendor/tag purges, newest first
+class PurgeJobListView(ListAPIView):
+    serializer_class = PurgeJobSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = CommandPagination
+
+    def get_queryset(self):
+        queryset = PurgeJob.objects.all()
+
+        # Add filtering by vendor_id and status
+        vendor_id = self.request.query_params.get('vendor_id', None)
+        job_status = self.request.query_params.get('status', None)
+
+        if vendor_id is not None:
+            queryset = queryset.filter(vendor_id=vendor_id)
+        #:
+
+        if job_status is not None:
+            queryset = queryset.filter(status=job_status.upper())
+        #:
+        return queryset
+    #:
+#:
+
+# Progress of one purge
+class PurgeJobDetailView(RetrieveAPIView):
+    queryset = PurgeJob.objects.all()
+    serializer_class = PurgeJobSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+#:
+
+# Reverts everything one import created or changed
+class ImportBatchRollbackView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, pk, *args, **kwargs):
+        try:
+            batch = ImportBatch.objects.get(pk=pk)
+        #:
+
+        except ImportBatch.DoesNotExist:
+            return Response({'error': 'Import batch not found.'}, status=status.HTTP_404_NOT_FOUND)
+        #:
+
+        try:
+            counts = rollback_import_batch(batch)
+        #:
+
+        except RollbackError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        #:
+
+        return Response(
+            {
+                'message': 'Import rolled back.',
+                'import_batch_id': batch.pk,
+                **counts
+            },
+            status=status.HTTP_200_OK
+        )
+    #:
+#:
@@ -0,0 +1,69 @@
+"""
+
+API parsers
+
+`ORJSONParser` is the parsing half of common.renderers.ORJSONRenderer: same
+media type and errors as DRF's JSONParser, decoded by orjson. Without orjson
+installed, or for a body in another charset than UTF-8, it is plain JSONParser.
+
+`MessagePackParser` accepts application/msgpack request bodies (needs msgpack,
+settings.py only enables it when it is installed).
+
+"""
+
+__all__ = (
+    'ORJSONParser',
+    'MessagePackParser',
+)
+
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class ORJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        #:
+
+        try:
+            return orjson.loads(stream.read())
+        #:
+
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+        #:
+    #:
+#:
+
+
+class MessagePackParser(BaseParser):
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        #:
+
+        except (msgpack.ExtraData, msgpack.FormatError, msgpack.StackError, ValueError) as exc:
+            raise ParseError('MessagePack parse error - %s' % (str(exc) or type(exc).__name__))
+        #:
+    #:
+#:
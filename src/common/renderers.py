@@ -0,0 +1,125 @@
+"""
+
+API renderers
+
+`ORJSONRenderer` renders JSON with orjson, which is several times faster than
+the stdlib encoder DRF uses. Types orjson doesn't know (Decimal, lazy
+translation strings, querysets, ...) go through DRF's own JSONEncoder.default,
+and so do datetimes, dates and times, whose format is then always DRF's
+rather than orjson's own (which e.g. keeps microseconds whatever DRF does
+with them). The output matches JSONRenderer's. Without orjson installed it
+is plain JSONRenderer.
+
+`MessagePackRenderer` renders the same data as MessagePack for bulk clients
+(Accept: application/msgpack). With `columnar=true` in the accepted media
+type, every list of same-shaped objects is sent as one header of field
+names plus a list of value rows: {"columns": [...], "rows": [[...], ...]}.
+It needs msgpack installed; settings.py only enables it when it is.
+
+"""
+
+__all__ = (
+    'ORJSONRenderer',
+    'MessagePackRenderer',
+    'to_columnar',
+)
+
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.mediatypes import _MediaType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# U+2028/U+2029 are valid JSON but end a line in JavaScript; JSONRenderer escapes them too
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        # orjson only indents by 2, leave anything else to the stdlib encoder
+        if orjson is None or indent not in (None, 2):
+            return super().render(data, accepted_media_type, renderer_context)
+        #:
+
+        if data is None:
+            return b''
+        #:
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        #:
+
+        ret = orjson.dumps(data, default=self.encoder.default, option=option)
+
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+            #:
+        #:
+        return ret
+    #:
+#:
+
+
+def to_columnar(data):
+    """Lists of dicts that all have the same keys become {"columns": keys, "rows": values}, at any depth."""
+    if isinstance(data, dict):
+        return {key: to_columnar(value) for key, value in data.items()}
+    #:
+
+    if isinstance(data, (list, tuple)):
+        if data and all(isinstance(item, dict) for item in data):
+            columns = list(data[0].keys())
+
+            if all(list(item.keys()) == columns for item in data):
+                return {
+                    'columns': columns,
+                    'rows': [[to_columnar(item[column]) for column in columns] for item in data],
+                }
+            #:
+        #:
+        return [to_columnar(item) for item in data]
+    #:
+    return data
+#:
+
+
+class MessagePackRenderer(BaseRenderer):
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        #:
+
+        if _MediaType(accepted_media_type or '').params.get('columnar', '').lower() in ('1', 'true'):
+            data = to_columnar(data)
+        #:
+
+        # Anything msgpack has no type for (datetimes, Decimal, UUID, ...) is
+        # encoded the way the JSON renderer would, so both formats agree
+        return msgpack.packb(data, default=self.encoder.default, use_bin_type=True)
+    #:
+#:
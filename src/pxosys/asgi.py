@@ -3,6 +3,10 @@ ASGI config for pxosys project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The catalog event stream (commands/events/) is only served through this
+entry point, e.g. ``uvicorn pxosys.asgi:application``: each subscriber is an
+idle coroutine here, where under WSGI it would hold a whole worker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
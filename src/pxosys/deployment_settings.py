@@ -10,6 +10,18 @@ CSRF_TRUSTED_ORIGINS = ['https://' + os.environ.get('RENDER_EXTERNAL_HOSTNAME')]
 
 DEBUG = False
 
+# CACHES comes from settings.py: Redis when REDIS_URL is set on the service,
+# else the pxosys_cache table build.sh creates. Either is shared by all workers.
+
+# settings.py picked its renderers with DEBUG on
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": (
+        "common.renderers.ORJSONRenderer",
+        *(("common.renderers.MessagePackRenderer",) if MSGPACK_ENABLED else ()),
+    ),
+}
+
 SECRET_KEY = os.environ.get('SECRET_KEY')
 
 CORS_ALLOWED_ORIGINS = [
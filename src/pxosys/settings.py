@@ -12,16 +12,23 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
-from dotenv import load_dotenv
+from importlib.util import find_spec
 
 import os
 import dj_database_url
 
-load_dotenv()
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Local development reads a .env next to manage.py or at the repository root.
+# Deployments set real environment variables, so neither the lookup up the
+# directory tree nor python-dotenv itself is paid for on every worker start
+for env_file in (BASE_DIR / '.env', BASE_DIR.parent / '.env'):
+    if env_file.is_file():
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
+        break
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -34,18 +41,111 @@ ALLOWED_HOSTS = []
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "account.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # orjson based (common/renderers.py, common/parsers.py); the browsable API only while debugging
+    "DEFAULT_RENDERER_CLASSES": (
+        "common.renderers.ORJSONRenderer",
+        *(("rest_framework.renderers.BrowsableAPIRenderer",) if DEBUG else ()),
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "common.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# MessagePack for bulk clients (Accept: application/msgpack), when msgpack is installed
+MSGPACK_ENABLED = find_spec('msgpack') is not None
+
+if MSGPACK_ENABLED:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] += ("common.renderers.MessagePackRenderer",)
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] += ("common.parsers.MessagePackParser",)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# Shared cache. Catalog versions, facets and cached users must be seen by every
+# worker process, or a write in one never invalidates what the others cached:
+# Redis when REDIS_URL is set, a database table otherwise (manage.py createcachetable).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'pxosys_cache',
+        }
+    }
+
+# Seconds an authenticated user's flags stay cached (account/authentication.py): in
+# each process, and in the shared cache when it isn't database-backed. A save or
+# delete drops the process' own copy and the shared one once it commits; other
+# processes see it after AUTH_USER_CACHE_LOCAL_SECONDS. Changes made with
+# queryset.update() only show after AUTH_USER_CACHE_TIMEOUT.
+AUTH_USER_CACHE_LOCAL_SECONDS = 5
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Password hashing pool (account/hashing.py). Hashes beyond workers + queue
+# are refused with a 503 instead of tying up request workers.
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASHING_QUEUE_SIZE', 8))
+# Hashes running at once across all worker processes (slots in the shared cache);
+# the per-process pool above doesn't bound anything under sync workers
+PASSWORD_HASHING_SHARED_SLOTS = int(os.environ.get('PASSWORD_HASHING_SHARED_SLOTS', 8))
+# Seconds a request waits for its hash before giving up with a 503, and the
+# Retry-After sent with those 503s
+PASSWORD_HASHING_TIMEOUT = 10
+PASSWORD_HASHING_RETRY_AFTER = 5
+
+# Catalog caching (see commands/cache.py). A process re-reads the shared
+# catalog versions at most this often, so other processes see a write this late.
+COMMAND_CACHE_VERSION_LOCAL_SECONDS = 1
+# Seconds a resolved vendor/platform/tag name is reused (commands/resolvers.py)
+COMMAND_RESOLVER_TTL = 60
+COMMAND_FACETS_CACHE_TIMEOUT = 300
+# Seconds cached facet counts keep being served after a catalog write (commands/facets.py)
+COMMAND_FACETS_STALE_SECONDS = 30
+# Memory cap of the per-process serialized command row cache (commands/rowcache.py)
+COMMAND_ROW_CACHE_MAX_BYTES = int(os.environ.get('COMMAND_ROW_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+# Seconds a cached serialized row is served before it is serialized again
+COMMAND_ROW_CACHE_TTL = 300
+
+# Change feed (commands/changes.py). Rows younger than the settle window, or than
+# the oldest open transaction on PostgreSQL, are left for the next sync, so rows
+# from transactions still committing aren't skipped. Without PostgreSQL the
+# window has to outlast the longest write transaction (an import): keep it above
+# the request timeout. A transaction open longer than MAX_HOLD no longer holds the feed.
+COMMAND_CHANGES_PAGE_SIZE = 1000
+COMMAND_CHANGES_MAX_PAGE_SIZE = 5000
+COMMAND_CHANGES_SETTLE_SECONDS = 5
+COMMAND_CHANGES_MAX_HOLD_SECONDS = 3600
+
+# Catalog event stream (commands/events.py, needs the ASGI entry point)
+COMMAND_EVENTS_POLL_INTERVAL = 2
+COMMAND_EVENTS_HEARTBEAT_SECONDS = 15
+COMMAND_EVENTS_QUEUE_SIZE = 100 # Polls a subscriber may fall behind before it is told to resync
+
+# Multi-file command uploads (commands/uploads.py)
+COMMAND_IMPORT_PARSE_WORKERS = int(os.environ.get('COMMAND_IMPORT_PARSE_WORKERS', min(os.cpu_count() or 1, 4)))
+COMMAND_UPLOAD_MAX_FILES = 200
+COMMAND_UPLOAD_MAX_BYTES = 50 * 1024 * 1024 # After zip extraction
+
+# Vendor/tag purges (commands/purging.py)
+COMMAND_PURGE_CHUNK_SIZE = 2000 # Commands deleted per transaction
+# Run purges on a thread of the web process; off, they wait for `manage.py purge`
+COMMAND_PURGE_IN_PROCESS = os.environ.get('COMMAND_PURGE_IN_PROCESS', 'True') == 'True'
+
 # Application definition
 
 INSTALLED_APPS = [